@@ -0,0 +1,2418 @@
+"""Benchmark suite for Voice Translator Pro
+
+Feeds recorded audio fixtures through the translation pipeline using a stub
+(or local) recognizer and a local stand-in for the translation API, then
+reports per-stage and end-to-end latency percentiles, throughput and peak RSS.
+
+Usage:
+    python benchmark.py pipeline --output results.json
+    python benchmark.py pipeline --baseline results.json --tolerance 0.15
+"""
+import argparse
+import array
+import asyncio
+import collections
+import functools
+import hashlib
+import json
+import math
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import tracemalloc
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import speech_recognition as sr
+
+from translation_server import TranslationServer
+from voice_translator import (CAPTURE_PROFILES, DETECT_MODES, HISTORY_TABLE_SQL, CaptureSession, HistoryLoader,
+                              LatencyController, MultiSourceCoordinator, PhraseTable, PipelineMetrics, ProcessOffload,
+                              SessionRecorder, SessionRecording, SPEECH_CACHE_MB, SpeechClipCache, SpeechOutput,
+                              TRANSLATE_API_URL, TranslationMemory, TranslationPipeline, Tracer, TranscriptLog,
+                              TranscriptView, UIUpdateQueue, UsageStatistics, migrate_history_schema)
+
+# Phrases used when synthetic fixtures are generated (transcript, language)
+SAMPLE_TRANSCRIPTS = [
+    ("hello how are you today", "en"),
+    ("thank you very much for your help with the project", "en"),
+    ("where is the nearest train station", "en"),
+    ("buenos días me gustaría reservar una mesa para dos personas", "es"),
+    ("je voudrais un café et un croissant s'il vous plaît", "fr"),
+    ("wie spät ist es und wann fährt der nächste zug", "de"),
+    ("मुझे हवाई अड्डे जाना है कृपया मेरी मदद करें", "hi"),
+    ("the meeting has been moved to tomorrow afternoon at three o'clock", "en"),
+]
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+
+def percentile(values, pct):
+    """Return the pct-th percentile of values using linear interpolation"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(math.floor(rank))
+    high = int(math.ceil(rank))
+    if low == high:
+        return ordered[low]
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples):
+    """Summarize a list of durations (seconds) as millisecond percentiles"""
+    return {
+        "count": len(samples),
+        "mean_ms": (sum(samples) / len(samples) * 1000) if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p90_ms": percentile(samples, 90) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": (max(samples) * 1000) if samples else 0.0,
+    }
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unavailable"""
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        # peak_wset on Windows, otherwise the current RSS is the best psutil offers
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes on Linux
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        return None
+
+
+def open_handle_counts(db_path=None):
+    """(open file handles, handles on db_path and its journals) for this process, or (None, None)"""
+    paths = None
+    try:
+        import psutil
+        process = psutil.Process()
+        total = process.num_handles() if sys.platform == "win32" else process.num_fds()
+        paths = [f.path for f in process.open_files()]
+    except ImportError:
+        fd_dir = "/proc/self/fd"
+        if not os.path.isdir(fd_dir):
+            return None, None
+        total = 0
+        paths = []
+        for name in os.listdir(fd_dir):
+            try:
+                paths.append(os.readlink(os.path.join(fd_dir, name)))
+                total += 1
+            except OSError:
+                continue
+    database = sum(1 for path in paths if db_path and path.startswith(db_path))
+    return total, database
+
+
+def audio_fingerprint(audio):
+    """Stable identifier for an AudioData instance"""
+    return hashlib.sha1(audio.frame_data).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+def synthesize_speech_like(transcript, sample_rate=SAMPLE_RATE):
+    """Generate speech-like PCM (modulated harmonics with pauses) sized to the transcript"""
+    words = transcript.split()
+    frames = bytearray()
+    amplitude = 6000
+    for word in words:
+        duration = 0.08 * max(len(word), 2)
+        pitch = 110 + (sum(map(ord, word)) % 120)
+        count = int(duration * sample_rate)
+        for n in range(count):
+            t = n / sample_rate
+            envelope = math.sin(math.pi * n / count)
+            value = envelope * amplitude * (
+                math.sin(2 * math.pi * pitch * t) +
+                0.5 * math.sin(2 * math.pi * pitch * 2 * t) +
+                0.25 * math.sin(2 * math.pi * pitch * 3 * t)
+            ) / 1.75
+            frames += int(value).to_bytes(2, "little", signed=True)
+        # Short pause between words
+        frames += b"\x00\x00" * int(0.06 * sample_rate)
+    return bytes(frames)
+
+
+def generate_fixtures(directory):
+    """Write WAV fixtures with sidecar transcripts into directory"""
+    os.makedirs(directory, exist_ok=True)
+    for index, (transcript, lang) in enumerate(SAMPLE_TRANSCRIPTS):
+        base = os.path.join(directory, f"utterance_{index:02d}_{lang}")
+        with wave.open(base + ".wav", "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(SAMPLE_WIDTH)
+            wav.setframerate(SAMPLE_RATE)
+            wav.writeframes(synthesize_speech_like(transcript))
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(transcript)
+    return directory
+
+
+def load_fixtures(directory):
+    """Load (AudioData, transcript) pairs from WAV files with matching .txt transcripts"""
+    fixtures = []
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(".wav"):
+            continue
+        path = os.path.join(directory, name)
+        with wave.open(path, "rb") as wav:
+            if wav.getnchannels() != 1:
+                print(f"Skipping {name}: only mono fixtures are supported")
+                continue
+            audio = sr.AudioData(wav.readframes(wav.getnframes()), wav.getframerate(), wav.getsampwidth())
+        transcript_path = os.path.splitext(path)[0] + ".txt"
+        transcript = None
+        if os.path.exists(transcript_path):
+            with open(transcript_path, encoding="utf-8") as f:
+                transcript = f.read().strip()
+        fixtures.append((audio, transcript))
+    return fixtures
+
+
+# ---------------------------------------------------------------------------
+# Stand-in backends
+# ---------------------------------------------------------------------------
+
+class StubRecognizer:
+    """Recognizer stand-in that returns fixture transcripts after a simulated delay"""
+    def __init__(self, fixtures, seconds_per_audio_second=0.05):
+        self.transcripts = {audio_fingerprint(audio): text for audio, text in fixtures if text}
+        self.seconds_per_audio_second = seconds_per_audio_second
+
+    def recognize_google(self, audio):
+        duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        time.sleep(duration * self.seconds_per_audio_second)
+        try:
+            return self.transcripts[audio_fingerprint(audio)]
+        except KeyError:
+            raise sr.UnknownValueError()
+
+
+class SegmentStubRecognizer(StubRecognizer):
+    """Stub recognizer for re-segmented audio: answers with the fixture closest in duration"""
+    def __init__(self, fixtures, seconds_per_audio_second=0.05):
+        super().__init__(fixtures, seconds_per_audio_second)
+        self.durations = [
+            (len(audio.frame_data) / (audio.sample_rate * audio.sample_width), text)
+            for audio, text in fixtures if text
+        ]
+
+    def recognize_google(self, audio):
+        duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        time.sleep(duration * self.seconds_per_audio_second)
+        if not self.durations:
+            raise sr.UnknownValueError()
+        return min(self.durations, key=lambda item: abs(item[0] - duration))[1]
+
+
+class LocalRecognizer:
+    """Offline recognizer using CMU Sphinx when pocketsphinx is installed"""
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def recognize_google(self, audio):
+        return self.recognizer.recognize_sphinx(audio)
+
+
+def cpu_bound_recognize(audio, transcripts, passes=4):
+    """Stand-in for local recognition: pure Python passes over the samples, then the fixture transcript
+
+    Module level so worker processes can run it.
+    """
+    samples = array.array("h", audio.frame_data)
+    energy = 0
+    for _ in range(passes):
+        for value in samples:
+            energy += value * value
+    try:
+        return transcripts[audio_fingerprint(audio)]
+    except KeyError:
+        raise sr.UnknownValueError()
+
+
+class CPUBoundRecognizer:
+    """Recognizer that runs cpu_bound_recognize in the calling thread"""
+    def __init__(self, transcripts, passes=4):
+        self.transcripts = transcripts
+        self.passes = passes
+
+    def recognize_google(self, audio):
+        return cpu_bound_recognize(audio, self.transcripts, self.passes)
+
+
+class FakeClock:
+    """Monotonic clock that only moves when advanced, for simulating hours in minutes"""
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    """Threading HTTP server that ignores clients hanging up mid-response (e.g. after a timeout)"""
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class FakeTranslateServer:
+    """Local HTTP server answering in the translate_a/single response format
+
+    Latency is `latency` seconds plus `per_char` seconds per source character,
+    with an optional uniform `jitter`. A `slow_fraction` of requests take an
+    extra `slow_latency` seconds, and requests answer HTTP 503 with probability
+    `error_fraction` plus `error_per_char` per source character.
+    """
+    def __init__(self, latency=0.05, per_char=0.0, jitter=0.0, slow_fraction=0.0, slow_latency=0.0,
+                 error_fraction=0.0, error_per_char=0.0, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.per_char = per_char
+        self.jitter = jitter
+        self.slow_fraction = slow_fraction
+        self.slow_latency = slow_latency
+        self.error_fraction = error_fraction
+        self.error_per_char = error_per_char
+        # Answers for src=auto report the language of known sample texts
+        self.languages = dict(SAMPLE_TRANSCRIPTS)
+        self.requests = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                text = query.get("q", [""])[0]
+                source = query.get("sl", ["auto"])[0]
+                target = query.get("tl", ["en"])[0]
+                with server._lock:
+                    server.requests += 1
+                time.sleep(server.delay_for(text))
+                if random.random() < server.error_fraction + server.error_per_char * len(text):
+                    self.send_error(503)
+                    return
+                body = json.dumps([
+                    [[f"[{target}] {text}", text, None, None, 1]],
+                    None,
+                    source if source != "auto" else server.languages.get(text, "en")
+                ]).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = QuietHTTPServer((host, port), Handler)
+        self.thread = None
+
+    def delay_for(self, text):
+        """Simulated service time for one request"""
+        delay = self.latency + self.per_char * len(text) + random.uniform(0, self.jitter)
+        if random.random() < self.slow_fraction:
+            delay += self.slow_latency
+        return delay
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/translate_a/single"
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# ---------------------------------------------------------------------------
+# Suites
+# ---------------------------------------------------------------------------
+
+def build_pipeline(fixtures, args, api_url, db_path):
+    """Pipeline wired to local stand-ins according to command line options"""
+    if args.stt == "sphinx":
+        recognizer = LocalRecognizer()
+    else:
+        recognizer = StubRecognizer(fixtures, seconds_per_audio_second=args.stt_delay)
+    return TranslationPipeline(
+        recognizer=recognizer,
+        translator_factory=None,
+        api_url=api_url,
+        db_path=db_path,
+        detect_mode=args.detect_mode,
+        memory_threshold=args.memory_threshold or None,
+        # Repeated fixtures must keep reaching the recognizer, the translation service and the database
+        coalesce=False,
+        duplicate_window=None
+    )
+
+
+def run_pipeline_suite(args):
+    """Run every fixture through the pipeline and collect latency statistics"""
+    if args.fixtures:
+        fixture_dir = args.fixtures
+    else:
+        fixture_dir = generate_fixtures(os.path.join(tempfile.mkdtemp(prefix="vt_bench_"), "fixtures"))
+    fixtures = load_fixtures(fixture_dir)
+    if not fixtures:
+        raise SystemExit(f"No WAV fixtures found in {fixture_dir}")
+
+    db_dir = tempfile.mkdtemp(prefix="vt_bench_db_")
+    db_path = os.path.join(db_dir, "translation_history.db")
+
+    stage_samples = {}
+    errors = 0
+    jobs = [fixtures[i % len(fixtures)][0] for i in range(args.iterations * len(fixtures))]
+
+    with FakeTranslateServer(latency=args.translate_latency, jitter=args.translate_jitter) as server:
+        pipeline = build_pipeline(fixtures, args, server.url, db_path)
+
+        # Warm up connections and caches outside of the measured window
+        for audio, _ in fixtures[:1]:
+            pipeline.process(audio, args.target)
+
+        lock = threading.Lock()
+
+        def run_one(audio):
+            nonlocal errors
+            try:
+                result = pipeline.process(audio, args.target)
+            except Exception as e:
+                print(f"Pipeline error: {e}")
+                with lock:
+                    errors += 1
+                return
+            with lock:
+                for stage, seconds in result["timings"].items():
+                    stage_samples.setdefault(stage, []).append(seconds)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            list(executor.map(run_one, jobs))
+        elapsed = time.perf_counter() - started
+
+    completed = len(jobs) - errors
+    return {
+        "suite": "pipeline",
+        "config": {
+            "fixtures": fixture_dir,
+            "utterances": len(jobs),
+            "concurrency": args.concurrency,
+            "stt": args.stt,
+            "stt_delay": args.stt_delay,
+            "translate_latency": args.translate_latency,
+            "translate_jitter": args.translate_jitter,
+            "target": args.target,
+            "detect_mode": args.detect_mode,
+            "memory_threshold": args.memory_threshold,
+        },
+        "stages": {stage: summarize(samples) for stage, samples in stage_samples.items()},
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "throughput_per_s": completed / elapsed if elapsed > 0 else 0.0,
+        "counters": pipeline.metrics.snapshot()["counters"],
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_trace_suite(args):
+    """Microbenchmark trace points to verify that disabled levels cost close to nothing"""
+    value = "recognized text"
+    number = args.number
+
+    def measure(statement):
+        # Best of several repeats filters out scheduler noise
+        return min(timeit.repeat(statement, number=number, repeat=5)) / number * 1e9
+
+    def empty_call(message, *args):
+        pass
+
+    disabled = Tracer(level="info", echo=False)
+    sampled = disabled.sampled(100)
+    recording = Tracer(level="debug", echo=False)
+    devnull = open(os.devnull, "w")
+    echoing = Tracer(level="debug", echo=True)
+    stdout = sys.stdout
+    try:
+        results = {
+            "empty_call_ns": measure(lambda: empty_call("Recognized text: %s", value)),
+            "disabled_ns": measure(lambda: disabled.debug("Recognized text: %s", value)),
+            "disabled_sampled_ns": measure(lambda: sampled.debug("Recognized text: %s", value)),
+            "ring_buffer_ns": measure(lambda: recording.debug("Recognized text: %s", value)),
+        }
+        # Console output paths, with stdout pointed at the null device
+        sys.stdout = devnull
+        results["echo_ns"] = measure(lambda: echoing.debug("Recognized text: %s", value))
+        results["print_fstring_ns"] = measure(lambda: print(f"Recognized text: {value}"))
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+
+    overhead = results["disabled_ns"] - results["empty_call_ns"]
+    failures = []
+    if overhead > args.max_disabled_overhead_ns:
+        failures.append(f"disabled trace point overhead {overhead:.0f} ns exceeds "
+                        f"{args.max_disabled_overhead_ns:.0f} ns")
+    return {
+        "suite": "trace",
+        "config": {"number": number, "max_disabled_overhead_ns": args.max_disabled_overhead_ns},
+        "microbench": results,
+        "disabled_overhead_ns": overhead,
+        "failures": failures,
+    }
+
+
+def run_hedge_suite(args):
+    """Compare translate latency with and without hedging against a primary with injected slowness"""
+    texts = [text for text, _ in SAMPLE_TRANSCRIPTS]
+    jobs = [texts[i % len(texts)] for i in range(args.requests)]
+    scenarios = {}
+
+    def run_scenario(name, hedging, budget, primary_errors=0.0):
+        primary = FakeTranslateServer(latency=args.translate_latency, jitter=args.translate_jitter,
+                                      slow_fraction=args.slow_fraction, slow_latency=args.slow_latency,
+                                      error_fraction=primary_errors)
+        alternate = FakeTranslateServer(latency=args.translate_latency, jitter=args.translate_jitter)
+        with primary, alternate:
+            pipeline = TranslationPipeline(
+                recognizer=StubRecognizer([]),
+                translator_factory=None,
+                api_url=primary.url,
+                alt_api_url=alternate.url,
+                latency_budget=budget,
+                hedging=hedging
+            )
+            samples = []
+            lock = threading.Lock()
+
+            def run_one(text):
+                started = time.perf_counter()
+                pipeline.translate(text, "auto", args.target)
+                with lock:
+                    samples.append(time.perf_counter() - started)
+
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                list(executor.map(run_one, jobs))
+            pipeline.shutdown()
+            counters = pipeline.metrics.snapshot()["counters"]
+            scenarios[name] = {
+                "translate": summarize(samples),
+                "primary_requests": primary.requests,
+                "alternate_requests": alternate.requests,
+                "hedged_requests": counters["hedged_requests"],
+                "deadline_exceeded": counters["deadline_exceeded"],
+                "breaker_skips": counters["breaker_skips"],
+            }
+
+    # The unhedged baseline gets a budget large enough that slow requests are never cut short
+    run_scenario("unhedged", hedging=False, budget=args.slow_latency * 4 + 10)
+    run_scenario("hedged", hedging=True, budget=args.budget)
+    run_scenario("primary_failing", hedging=True, budget=args.budget, primary_errors=1.0)
+
+    return {
+        "suite": "hedge",
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "translate_latency": args.translate_latency,
+            "slow_fraction": args.slow_fraction,
+            "slow_latency": args.slow_latency,
+            "budget": args.budget,
+        },
+        "stages": {f"{name}.translate": result["translate"] for name, result in scenarios.items()},
+        "scenarios": scenarios,
+    }
+
+
+def run_ui_suite(args):
+    """Measure Tk event loop responsiveness while a worker thread floods it with results"""
+    import tkinter as tk
+
+    def run_mode(mode):
+        try:
+            root = tk.Tk()
+        except tk.TclError as e:
+            raise SystemExit(f"The ui suite needs a display: {e}")
+        root.withdraw()
+        source = tk.Text(root, height=5)
+        translated = tk.Text(root, height=5)
+        status = tk.Label(root)
+        for widget in (source, translated, status):
+            widget.pack()
+        queue = UIUpdateQueue(root, fps=args.fps)
+        applied = [0]
+
+        def show_result(index):
+            def apply():
+                # Same work update_ui_with_translation does per result
+                for widget, text in ((source, f"utterance {index}"), (translated, f"translation {index}")):
+                    widget.config(state="normal")
+                    widget.delete("1.0", tk.END)
+                    widget.insert("1.0", text)
+                    widget.config(state="disabled")
+                status.config(text="Status: Translation Complete")
+                applied[0] += 1
+            return apply
+
+        def set_status(text):
+            return lambda: status.config(text=text)
+
+        def producer():
+            interval = 1.0 / args.rate
+            next_at = time.perf_counter()
+            for index in range(int(args.rate * args.duration)):
+                if mode == "direct":
+                    root.after(0, set_status("Status: Processing..."))
+                    root.after(0, show_result(index))
+                else:
+                    # Only status texts may be coalesced; every result must be drawn, as in the app
+                    queue.post(set_status("Status: Processing..."), key="status")
+                    queue.post(show_result(index))
+                next_at += interval
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+        # Probe: a main-loop callback every 10 ms measures how late the loop runs it
+        lateness = []
+        probe_interval = 0.010
+
+        def probe(expected):
+            now = time.perf_counter()
+            lateness.append(max(0.0, now - expected))
+            if now - started < args.duration:
+                root.after(int(probe_interval * 1000), probe, time.perf_counter() + probe_interval)
+            else:
+                root.quit()
+
+        if mode == "dispatcher":
+            queue.start()
+        started = time.perf_counter()
+        worker = threading.Thread(target=producer, daemon=True)
+        worker.start()
+        root.after(0, probe, time.perf_counter())
+        root.mainloop()
+        worker.join()
+        # Apply what was still queued when the probe stopped the loop, so every result is counted
+        queue.flush()
+        drain_until = time.perf_counter() + 5.0
+        while applied[0] < int(args.rate * args.duration) and time.perf_counter() < drain_until:
+            root.update()
+        queue.stop()
+        root.destroy()
+        return {
+            "probe_lateness": summarize(lateness),
+            "results_posted": int(args.rate * args.duration),
+            "results_applied": applied[0],
+            "coalesced": queue.coalesced,
+        }
+
+    modes = {mode: run_mode(mode) for mode in ("direct", "dispatcher")}
+    failures = [f"{mode}: {result['results_applied']} results applied, {result['results_posted']} posted"
+                for mode, result in modes.items() if result["results_applied"] != result["results_posted"]]
+    return {
+        "suite": "ui",
+        "config": {"rate_per_s": args.rate, "duration_s": args.duration, "fps": args.fps},
+        "stages": {f"{mode}.probe_lateness": result["probe_lateness"] for mode, result in modes.items()},
+        "scenarios": {mode: {k: v for k, v in result.items() if k != "probe_lateness"}
+                      for mode, result in modes.items()},
+        "failures": failures,
+    }
+
+
+def run_transcript_suite(args):
+    """Per-line render cost of the rolling transcript as a session grows"""
+    import tkinter as tk
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        raise SystemExit(f"The transcript suite needs a display: {e}")
+    root.withdraw()
+
+    def run_mode(max_lines, total):
+        source = tk.Text(root, height=5, wrap="word")
+        translated = tk.Text(root, height=5, wrap="word")
+        source.pack()
+        translated.pack()
+        view = TranscriptView(source, translated, max_lines=max_lines)
+        windows = {}
+        window = max(1, total // 10)
+        samples = []
+        for index in range(total):
+            text, lang = SAMPLE_TRANSCRIPTS[index % len(SAMPLE_TRANSCRIPTS)]
+            started = time.perf_counter()
+            view.append(text, lang, f"[{args.target}] {text}", args.target)
+            # Include the redraw the user would see
+            root.update_idletasks()
+            samples.append(time.perf_counter() - started)
+            if len(samples) == window:
+                windows[f"lines_{index + 1}"] = summarize(samples)
+                samples = []
+        source.destroy()
+        translated.destroy()
+        return windows
+
+    capped = run_mode(args.max_lines, args.lines)
+    uncapped = run_mode(None, args.uncapped_lines)
+    root.destroy()
+    return {
+        "suite": "transcript",
+        "config": {"lines": args.lines, "max_lines": args.max_lines, "uncapped_lines": args.uncapped_lines},
+        "stages": {
+            **{f"capped.{name}": stats for name, stats in capped.items()},
+            **{f"uncapped.{name}": stats for name, stats in uncapped.items()},
+        },
+    }
+
+async def stream_client(port, client_id, utterances, args, record):
+    """Simulated remote client streaming utterances separated by silence in paced chunks"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    sample_rate = utterances[0].sample_rate
+    writer.write(
+        f"POST /translate?target={args.target}&sample_rate={sample_rate}&session=client-{client_id} HTTP/1.1\r\n"
+        f"Host: 127.0.0.1\r\nTransfer-Encoding: chunked\r\n\r\n".encode("ascii")
+    )
+    speech_ended = []
+
+    async def send():
+        chunk_bytes = int(sample_rate * args.chunk_seconds) * SAMPLE_WIDTH
+        silence = b"\x00" * (int(sample_rate * args.gap) * SAMPLE_WIDTH)
+        for audio in utterances:
+            for payload, is_speech in ((audio.frame_data, True), (silence, False)):
+                for offset in range(0, len(payload), chunk_bytes):
+                    chunk = payload[offset:offset + chunk_bytes]
+                    writer.write(f"{len(chunk):X}\r\n".encode("ascii") + chunk + b"\r\n")
+                    await writer.drain()
+                    await asyncio.sleep(len(chunk) / (sample_rate * SAMPLE_WIDTH) / args.speed)
+                if is_speech:
+                    speech_ended.append(time.perf_counter())
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def receive():
+        status = await reader.readline()
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        if b" 503 " in status:
+            record["rejected"] += 1
+            return
+        buffer = b""
+        while True:
+            size = int((await reader.readline()).strip() or b"0", 16)
+            if size == 0:
+                return
+            buffer += await reader.readexactly(size)
+            await reader.readexactly(2)
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                message = json.loads(line)
+                arrived = time.perf_counter()
+                if message.get("done"):
+                    continue
+                if "error" in message:
+                    record["errors"] += 1
+                    continue
+                index = message["segment"]
+                if index < len(speech_ended):
+                    record["result"].append(arrived - speech_ended[index])
+                record["server"].append(message["latency_ms"] / 1000)
+                record["segments"] += 1
+
+    sender = asyncio.ensure_future(send())
+    try:
+        await receive()
+    finally:
+        sender.cancel()
+        try:
+            await sender
+        except (asyncio.CancelledError, ConnectionError):
+            pass
+        writer.close()
+
+
+def run_server_suite(args):
+    """Load test the streaming server with simulated clients uploading paced audio"""
+    fixtures = load_fixtures(generate_fixtures(os.path.join(tempfile.mkdtemp(prefix="vt_bench_"), "fixtures")))
+    db_path = os.path.join(tempfile.mkdtemp(prefix="vt_bench_db_"), "translation_history.db")
+
+    with FakeTranslateServer(latency=args.translate_latency, jitter=args.translate_jitter) as translate_server:
+        pipeline = TranslationPipeline(
+            recognizer=SegmentStubRecognizer(fixtures, seconds_per_audio_second=args.stt_delay),
+            translator_factory=None,
+            api_url=translate_server.url,
+            db_path=db_path,
+            memory_threshold=None,
+            coalesce=False,
+            duplicate_window=None
+        )
+        server = TranslationServer(pipeline, port=0, max_connections=args.max_connections,
+                                   max_concurrent=args.max_concurrent, per_connection=args.per_connection,
+                                   default_target=args.target)
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        asyncio.run_coroutine_threadsafe(server.start(), loop).result()
+
+        record = {"result": [], "server": [], "segments": 0, "errors": 0, "rejected": 0}
+
+        async def run_clients():
+            clients = []
+            for client_id in range(args.clients):
+                utterances = [fixtures[(client_id + i) % len(fixtures)][0] for i in range(args.utterances)]
+                clients.append(stream_client(server.port, client_id, utterances, args, record))
+                # Stagger connections the way real clients arrive
+                await asyncio.sleep(args.ramp / max(1, args.clients))
+            await asyncio.gather(*clients)
+
+        started = time.perf_counter()
+        asyncio.run(run_clients())
+        elapsed = time.perf_counter() - started
+
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        pipeline.shutdown()
+
+    return {
+        "suite": "server",
+        "config": {
+            "clients": args.clients,
+            "utterances_per_client": args.utterances,
+            "speed": args.speed,
+            "max_connections": args.max_connections,
+            "max_concurrent": args.max_concurrent,
+            "per_connection": args.per_connection,
+            "translate_latency": args.translate_latency,
+        },
+        "stages": {
+            "end_of_speech_to_result": summarize(record["result"]),
+            "server_latency": summarize(record["server"]),
+        },
+        "scenarios": {"server": server.health()},
+        "errors": record["errors"],
+        "rejected": record["rejected"],
+        "throughput_per_s": record["segments"] / elapsed if elapsed > 0 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def run_sources_suite(args):
+    """Per-source latency with one busy source and several quiet ones, fair vs FIFO scheduling"""
+    fixtures = load_fixtures(generate_fixtures(os.path.join(tempfile.mkdtemp(prefix="vt_bench_"), "fixtures")))
+    scenarios = {}
+    stages = {}
+
+    def run_scenario(name, fair):
+        db_path = os.path.join(tempfile.mkdtemp(prefix="vt_bench_db_"), "translation_history.db")
+        with FakeTranslateServer(latency=args.translate_latency, jitter=args.translate_jitter) as server:
+            pipeline = TranslationPipeline(
+                recognizer=StubRecognizer(fixtures, seconds_per_audio_second=args.stt_delay),
+                translator_factory=None,
+                api_url=server.url,
+                db_path=db_path,
+                memory_threshold=None,
+                coalesce=False,
+                duplicate_window=None
+            )
+            done = threading.Semaphore(0)
+            coordinator = MultiSourceCoordinator(
+                pipeline,
+                on_result=lambda *result: done.release(),
+                on_error=lambda session, error: done.release(),
+                recognize_workers=args.recognize_workers,
+                translate_workers=args.translate_workers,
+                max_pending=args.max_pending,
+                fair=fair
+            )
+            sessions = [coordinator.add_session(CaptureSession("busy", target_lang=args.target), start=False)]
+            sessions += [coordinator.add_session(CaptureSession(f"quiet-{n}", target_lang=args.target), start=False)
+                         for n in range(1, args.sources)]
+
+            def feed(session, rate, count):
+                for n in range(count):
+                    coordinator.submit(session, fixtures[n % len(fixtures)][0])
+                    time.sleep(1.0 / rate)
+
+            counts = [int(args.duration * args.busy_rate)] + [int(args.duration * args.rate)] * (args.sources - 1)
+            feeders = [threading.Thread(target=feed, args=(session, rate, count))
+                       for session, rate, count in zip(sessions, [args.busy_rate] + [args.rate] * (args.sources - 1),
+                                                      counts)]
+            started = time.perf_counter()
+            for feeder in feeders:
+                feeder.start()
+            for feeder in feeders:
+                feeder.join()
+            dropped = coordinator.recognize_queue.dropped
+            # Wait for every phrase that was not dropped
+            for _ in range(sum(counts) - dropped):
+                if not done.acquire(timeout=args.budget * 4 + 30):
+                    break
+            elapsed = time.perf_counter() - started
+            coordinator.shutdown()
+            pipeline.shutdown()
+
+        snapshot = pipeline.metrics.snapshot()["stages"]
+        for session in sessions:
+            stats = snapshot.get(session.latency_stage)
+            if stats and stats["count"]:
+                stages[f"{name}.{session.name}"] = {key: stats[key] for key in
+                                                    ("count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")}
+        scenarios[name] = {"phrases": sum(counts), "dropped": dropped, "elapsed_s": round(elapsed, 2),
+                           "errors": pipeline.metrics.snapshot()["counters"]["errors"]}
+
+    run_scenario("fifo", fair=False)
+    run_scenario("fair", fair=True)
+    return {
+        "suite": "sources",
+        "config": {
+            "sources": args.sources,
+            "busy_rate": args.busy_rate,
+            "rate": args.rate,
+            "duration": args.duration,
+            "recognize_workers": args.recognize_workers,
+            "translate_workers": args.translate_workers,
+            "max_pending": args.max_pending,
+        },
+        "stages": stages,
+        "scenarios": scenarios,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def run_segments_suite(args):
+    """Compare whole-text and sentence-level parallel translation of long phrases"""
+    english = [text for text, lang in SAMPLE_TRANSCRIPTS if lang == "en"]
+    rng = random.Random(7)
+    jobs = [". ".join(rng.choice(english) for _ in range(args.sentences)) + "." for _ in range(args.requests)]
+    scenarios = {}
+    stages = {}
+
+    def run_scenario(name, segment_chars):
+        with FakeTranslateServer(latency=args.translate_latency, per_char=args.per_char,
+                                 jitter=args.translate_jitter, error_per_char=args.error_per_char) as server:
+            pipeline = TranslationPipeline(
+                recognizer=StubRecognizer([]),
+                translator_factory=None,
+                api_url=server.url,
+                latency_budget=args.budget,
+                hedging=False,
+                segment_chars=segment_chars,
+                segment_retries=args.retries
+            )
+            totals = []
+            first_output = []
+            failed = 0
+            lock = threading.Lock()
+
+            def run_one(text):
+                nonlocal failed
+                started = time.perf_counter()
+                first = []
+                _, used_fallback = pipeline.translate(
+                    text, "en", args.target,
+                    on_partial=lambda partial: first or first.append(time.perf_counter() - started)
+                )
+                elapsed = time.perf_counter() - started
+                with lock:
+                    totals.append(elapsed)
+                    first_output.append(first[0] if first else elapsed)
+                    failed += used_fallback
+
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                list(executor.map(run_one, jobs))
+            pipeline.shutdown()
+            counters = pipeline.metrics.snapshot()["counters"]
+            stages[f"{name}.first_output"] = summarize(first_output)
+            stages[f"{name}.complete"] = summarize(totals)
+            scenarios[name] = {
+                "requests": server.requests,
+                "incomplete": failed,
+                "segment_retries": counters["segment_retries"],
+                "deadline_exceeded": counters["deadline_exceeded"],
+            }
+
+    run_scenario("whole", None)
+    run_scenario("sentences", args.segment_chars)
+    return {
+        "suite": "segments",
+        "config": {
+            "requests": args.requests,
+            "sentences": args.sentences,
+            "concurrency": args.concurrency,
+            "translate_latency": args.translate_latency,
+            "per_char": args.per_char,
+            "error_per_char": args.error_per_char,
+            "retries": args.retries,
+            "segment_chars": args.segment_chars,
+            "budget": args.budget,
+        },
+        "stages": stages,
+        "scenarios": scenarios,
+    }
+
+def run_detect_suite(args):
+    """Detection latency, CPU time and accuracy per utterance for each source language mode"""
+    fixtures = load_fixtures(generate_fixtures(os.path.join(tempfile.mkdtemp(prefix="vt_bench_"), "fixtures")))
+    languages = dict(SAMPLE_TRANSCRIPTS)
+    by_language = {}
+    for audio, text in fixtures:
+        by_language.setdefault(languages[text], []).append((audio, text))
+    # A speaker talks for a while before the next one takes over
+    order = list(by_language)
+    jobs = []
+    for n in range(args.utterances):
+        speaker = by_language[order[(n // args.switch_every) % len(order)]]
+        jobs.append(speaker[n % len(speaker)])
+
+    scenarios = {}
+    stages = {}
+    for mode in DETECT_MODES:
+        with FakeTranslateServer(latency=args.translate_latency, jitter=args.translate_jitter) as server:
+            pipeline = TranslationPipeline(
+                recognizer=StubRecognizer(fixtures, seconds_per_audio_second=0.0),
+                translator_factory=None,
+                api_url=server.url,
+                db_path=os.path.join(tempfile.mkdtemp(prefix="vt_bench_db_"), "translation_history.db"),
+                detect_mode=mode,
+                memory_threshold=None,
+                coalesce=False,
+                duplicate_window=None
+            )
+            # Load langdetect profiles outside the measured window
+            pipeline.detect_language("warm up")
+            detect_samples = []
+            cpu_started = time.process_time()
+            wrong = 0
+            for audio, text in jobs:
+                result = pipeline.process(audio, args.target, save=lambda *row: None)
+                detect_samples.append(result["timings"]["detect"])
+                wrong += result["source_lang"] != languages[text]
+            cpu_per_utterance = (time.process_time() - cpu_started) / len(jobs)
+            pipeline.shutdown()
+        snapshot = pipeline.metrics.snapshot()
+        stages[f"{mode}.detect"] = summarize(detect_samples)
+        detect_cpu = snapshot["stages"].get("detect_cpu", {"count": 0, "mean_ms": 0.0})
+        scenarios[mode] = {
+            "local_detections": detect_cpu["count"],
+            "detections_skipped": snapshot["counters"]["detections_skipped"],
+            "detect_cpu_ms_per_utterance": round(detect_cpu["count"] * detect_cpu["mean_ms"] / len(jobs), 3),
+            "process_cpu_ms_per_utterance": round(cpu_per_utterance * 1000, 3),
+            "wrong_language": wrong,
+        }
+
+    base = scenarios["local"]
+    for mode in ("sticky", "auto"):
+        scenarios[mode]["cpu_saved_ms_per_utterance"] = round(
+            base["detect_cpu_ms_per_utterance"] - scenarios[mode]["detect_cpu_ms_per_utterance"], 3)
+        scenarios[mode]["latency_saved_ms_per_utterance"] = round(
+            stages["local.detect"]["mean_ms"] - stages[f"{mode}.detect"]["mean_ms"], 3)
+    return {
+        "suite": "detect",
+        "config": {"utterances": args.utterances, "switch_every": args.switch_every, "target": args.target},
+        "stages": stages,
+        "scenarios": scenarios,
+    }
+
+def synthetic_phrases(count, vocabulary=20000, seed=11):
+    """Distinct pseudo-word phrases of one to four words with fake translations"""
+    rng = random.Random(seed)
+    syllables = ["ka", "lo", "mi", "ren", "ta", "vo", "shi", "pa", "dun", "el", "ro", "quo", "zi", "ban"]
+    words = list({"".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(vocabulary)})
+    phrases = {}
+    while len(phrases) < count:
+        phrase = " ".join(rng.choice(words) for _ in range(rng.choice((1, 2, 2, 3, 3, 4))))
+        phrases[phrase] = f"<{phrase.upper()}>"
+    return list(phrases.items()), words
+
+
+def run_phrases_suite(args):
+    """Phrase table compile time, memory footprint, lookup latency and hot reload delay"""
+    entries, words = synthetic_phrases(args.entries)
+    directory = tempfile.mkdtemp(prefix="vt_bench_phrases_")
+    path = os.path.join(directory, "en-xx.tsv")
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(f"{phrase}\t{translation}\n" for phrase, translation in entries)
+
+    started = time.perf_counter()
+    table = PhraseTable(directory, reload_interval=0.1)
+    compile_s = time.perf_counter() - started
+    del table
+
+    # Build again under tracemalloc, which is too slow to time the first build with
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    table = PhraseTable(directory, reload_interval=0.1)
+    traced_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    report = table.memory_report()
+
+    rng = random.Random(3)
+    phrases = [phrase for phrase, _ in entries]
+    workloads = {
+        "exact": [rng.choice(phrases) for _ in range(args.lookups)],
+        # Utterances stitched together from known phrases are translated fully offline
+        "composed": [" ".join(rng.choice(phrases) for _ in range(3)) for _ in range(args.lookups)],
+        "partial": [" ".join([rng.choice(phrases)] + [rng.choice(words) + "x" for _ in range(6)])
+                    for _ in range(args.lookups)],
+        "miss": [" ".join(rng.choice(words) + "x" for _ in range(8)) for _ in range(args.lookups)],
+    }
+    stages = {}
+    scenarios = {}
+    for name, texts in workloads.items():
+        samples = []
+        full = 0
+        for text in texts:
+            lookup_started = time.perf_counter()
+            _, _, fully_matched = table.lookup(text, "en", "xx")
+            samples.append(time.perf_counter() - lookup_started)
+            full += fully_matched
+        stages[f"lookup.{name}"] = summarize(samples)
+        scenarios[name] = {"lookups": len(texts), "fully_matched": full}
+
+    # Hot reload: append an entry and time until lookups see it
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("brand new phrase\t<NEW>\n")
+    reload_started = time.perf_counter()
+    while table.lookup("brand new phrase", "en", "xx")[2] is False:
+        if time.perf_counter() - reload_started > 60:
+            break
+        time.sleep(0.01)
+    reload_s = time.perf_counter() - reload_started
+
+    return {
+        "suite": "phrases",
+        "config": {"entries": args.entries, "lookups": args.lookups},
+        "stages": stages,
+        "scenarios": scenarios,
+        "microbench": {
+            "compile_ms": compile_s * 1000,
+            "reload_visible_ms": reload_s * 1000,
+            "estimated_mb": report["bytes"] / 1048576,
+            "traced_mb": traced_bytes / 1048576,
+            "bytes_per_entry": traced_bytes / max(1, report["entries"]),
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_memory_suite(args):
+    """Translation memory build time, index size and lookup latency over a large history table"""
+    rng = random.Random(5)
+    # Words of random letters: syllable-built words share too few trigrams to resemble real text
+    letters = "etaoinshrdlucmfwypvbgkjqxz"
+    weights = [13, 9, 8, 8, 7, 7, 6, 6, 6, 4, 4, 3, 3, 2, 2, 2, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1]
+    words = list({"".join(rng.choices(letters, weights, k=rng.randint(2, 9))) for _ in range(args.vocabulary)})
+    db_path = os.path.join(tempfile.mkdtemp(prefix="vt_bench_db_"), "translation_history.db")
+    conn = sqlite3.connect(db_path)
+    migrate_history_schema(conn)
+    sentences = set()
+    while len(sentences) < args.entries:
+        sentences.add(" ".join(rng.choice(words) for _ in range(rng.randint(6, 12))))
+    sentences = list(sentences)
+    conn.executemany(
+        "INSERT INTO history (timestamp, source_text, source_lang, translated_text, target_lang) VALUES (?, ?, ?, ?, ?)",
+        (("2025-01-01 00:00:00", sentence, "en", f"<{sentence.upper()}>", "xx") for sentence in sentences)
+    )
+    conn.commit()
+    conn.close()
+
+    memory = TranslationMemory(db_path, threshold=args.threshold)
+    rss_before = peak_rss_mb()
+    started = time.perf_counter()
+    memory.sync()
+    build_s = time.perf_counter() - started
+    rss_after = peak_rss_mb()
+
+    def near(sentence):
+        # Same words with different case and punctuation, one of them dropped
+        sentence_words = sentence.split()
+        del sentence_words[rng.randrange(len(sentence_words))]
+        return " ".join(sentence_words).capitalize() + "?"
+
+    near_sources = [rng.choice(sentences) for _ in range(args.lookups)]
+    workloads = {
+        "exact": [rng.choice(sentences) for _ in range(args.lookups)],
+        "near": [near(source) for source in near_sources],
+        "miss": [" ".join(rng.choice(words) for _ in range(rng.randint(6, 12))) for _ in range(args.lookups)],
+    }
+    stages = {}
+    scenarios = {}
+    for name, texts in workloads.items():
+        samples = []
+        hits = 0
+        for text in texts:
+            lookup_started = time.perf_counter()
+            match = memory.lookup(text, "en", "xx")
+            samples.append(time.perf_counter() - lookup_started)
+            hits += match is not None
+        stages[f"lookup.{name}"] = summarize(samples)
+        scenarios[name] = {"lookups": len(texts), "hits": hits, "hit_rate": round(hits / len(texts), 3)}
+    # Share of near variants that are actually above the threshold, i.e. the best possible hit rate
+    scenarios["near"]["eligible"] = sum(
+        TranslationMemory.similarity(TranslationMemory.shingles(text), TranslationMemory.shingles(source))
+        >= args.threshold for text, source in zip(workloads["near"], near_sources)
+    )
+
+    return {
+        "suite": "memory",
+        "config": {"entries": args.entries, "lookups": args.lookups, "threshold": args.threshold},
+        "stages": stages,
+        "scenarios": scenarios,
+        "microbench": {
+            "build_ms": build_s * 1000,
+            "rows_per_s": memory.entries / build_s if build_s > 0 else 0.0,
+            "estimated_mb": memory.memory_bytes() / 1048576,
+            "peak_rss_growth_mb": (rss_after - rss_before) if rss_before is not None and rss_after is not None else 0.0,
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_offload_suite(args):
+    """Batch throughput of CPU-bound recognition and detection in threads vs worker processes, 1 to N workers"""
+    fixtures = load_fixtures(generate_fixtures(os.path.join(tempfile.mkdtemp(prefix="vt_bench_"), "fixtures")))
+    transcripts = {audio_fingerprint(audio): text for audio, text in fixtures if text}
+    jobs = [audio for audio, text in fixtures if text] * args.iterations
+    counts = sorted({1, args.max_workers} | {2 ** power for power in range(1, 8) if 2 ** power < args.max_workers})
+    scenarios = {}
+    stages = {}
+
+    with FakeTranslateServer(latency=args.translate_latency) as server:
+        for mode in ("threads", "processes"):
+            for workers in counts:
+                offload = None
+                warm_s = 0.0
+                if mode == "processes":
+                    offload = ProcessOffload(workers, recognize_function=functools.partial(
+                        cpu_bound_recognize, transcripts=transcripts, passes=args.passes))
+                    warm_s = offload.warm()
+                pipeline = TranslationPipeline(
+                    recognizer=CPUBoundRecognizer(transcripts, args.passes),
+                    translator_factory=None,
+                    api_url=server.url,
+                    hedging=False,
+                    memory_threshold=None,
+                    coalesce=False,
+                    duplicate_window=None,
+                    offload=offload
+                )
+                pipeline.detect_language("warm up")
+
+                # A thread standing in for the Tk loop: how late do its 5 ms timers fire while the batch runs?
+                stop = threading.Event()
+                lateness = []
+
+                def probe():
+                    while not stop.is_set():
+                        started = time.perf_counter()
+                        time.sleep(0.005)
+                        lateness.append(time.perf_counter() - started - 0.005)
+
+                probe_thread = threading.Thread(target=probe, daemon=True)
+                probe_thread.start()
+                totals = []
+                errors = 0
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(pipeline.process, audio, args.target, save=lambda *result: None)
+                               for audio in jobs]
+                    for future in futures:
+                        try:
+                            totals.append(future.result()["timings"]["total"])
+                        except Exception:
+                            errors += 1
+                elapsed = time.perf_counter() - started
+                stop.set()
+                probe_thread.join()
+                pipeline.shutdown()
+
+                name = f"{mode}-{workers}"
+                throughput = (len(jobs) - errors) / elapsed if elapsed > 0 else 0.0
+                baseline = scenarios.get(f"{mode}-1", {}).get("throughput_per_s", throughput)
+                stages[f"{name}.total"] = summarize(totals)
+                stages[f"{name}.probe_late"] = summarize(lateness)
+                scenarios[name] = {
+                    "utterances": len(jobs),
+                    "errors": errors,
+                    "throughput_per_s": round(throughput, 2),
+                    "speedup": round(throughput / baseline, 2) if baseline else 0.0,
+                    "warm_ms": round(warm_s * 1000, 1),
+                }
+
+    return {
+        "suite": "offload",
+        "config": {"iterations": args.iterations, "workers": counts, "passes": args.passes,
+                   "cpus": os.cpu_count(), "translate_latency": args.translate_latency},
+        "stages": stages,
+        "scenarios": scenarios,
+        "throughput_per_s": scenarios[f"processes-{counts[-1]}"]["throughput_per_s"],
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_soak_suite(args):
+    """Hours of simulated speech through the app's code paths, failing when memory, threads or handles grow"""
+    import gc
+
+    fixtures = load_fixtures(generate_fixtures(os.path.join(tempfile.mkdtemp(prefix="vt_bench_"), "fixtures")))
+    fixtures = [(audio, text) for audio, text in fixtures if text]
+    data_dir = tempfile.mkdtemp(prefix="vt_bench_soak_")
+    db_path = os.path.join(data_dir, "translation_history.db")
+    clock = FakeClock()
+
+    root = transcript = None
+    if args.ui:
+        import tkinter as tk
+        try:
+            root = tk.Tk()
+        except tk.TclError as e:
+            raise SystemExit(f"The soak suite needs a display with --ui: {e}")
+        root.withdraw()
+        transcript = TranscriptView(tk.Text(root), tk.Text(root))
+        ui_updates = UIUpdateQueue(root)
+        ui_updates.start()
+
+    tracemalloc.start()
+    samples = []
+    errors = 0
+    utterances = 0
+    with FakeTranslateServer(latency=args.translate_latency, error_fraction=args.error_fraction) as server:
+        pipeline = TranslationPipeline(
+            recognizer=StubRecognizer(fixtures, seconds_per_audio_second=0.0),
+            translator_factory=None,
+            api_url=server.url,
+            db_path=db_path,
+            phrase_dir=os.path.join(data_dir, "phrases")
+        )
+        # Reload checks and circuit breaker cool-downs follow simulated time
+        pipeline.phrase_table.clock = clock
+        pipeline.hedger.clock = clock
+        for breaker in pipeline.hedger.breakers.values():
+            breaker.clock = clock
+        transcript_log = TranscriptLog(os.path.join(data_dir, "transcripts"))
+        coordinator = MultiSourceCoordinator(pipeline, on_error=lambda session, error: None)
+        sources = [coordinator.add_session(CaptureSession(f"source-{n}", target_lang=args.target), start=False)
+                   for n in range(args.sources)]
+
+        def on_translated(source_text, source_lang, translated_text, target_lang):
+            transcript_log.write(source_text, source_lang, translated_text, target_lang)
+            if transcript is not None:
+                ui_updates.post(lambda: transcript.append(source_text, source_lang, translated_text, target_lang))
+                ui_updates.post(lambda: None, key="status")
+
+        def process(audio):
+            # Same shape as the app: captured phrases go to a fixed pool of phrase workers
+            nonlocal errors
+            try:
+                pipeline.process(audio, args.target, on_translated=on_translated)
+            except Exception:
+                errors += 1
+
+        def sample():
+            gc.collect()
+            total_handles, database_handles = open_handle_counts(db_path)
+            samples.append({
+                "minute": round(clock() / 60, 1),
+                "utterances": utterances,
+                "traced_mb": round(tracemalloc.get_traced_memory()[0] / 1048576, 3),
+                "threads": threading.active_count(),
+                "handles": total_handles,
+                "database_handles": database_handles,
+                "objects": len(gc.get_objects()),
+            })
+
+        end = args.hours * 3600
+        next_sample = 0.0
+        baseline_snapshot = None
+        in_flight = collections.deque()
+        phrase_executor = ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="phrase")
+        started = time.perf_counter()
+        while clock() < end:
+            audio = fixtures[utterances % len(fixtures)][0]
+            in_flight.append(phrase_executor.submit(process, audio))
+            if sources:
+                coordinator.submit(sources[utterances % len(sources)], audio)
+            while len(in_flight) > args.concurrency:
+                in_flight.popleft().result()
+            if root is not None:
+                root.update()
+            utterances += 1
+            clock.advance(len(audio.frame_data) / (audio.sample_rate * audio.sample_width) + args.gap)
+            if clock() >= next_sample:
+                for future in in_flight:
+                    future.result()
+                in_flight.clear()
+                while coordinator.depth():
+                    time.sleep(0.01)
+                sample()
+                if baseline_snapshot is None and clock() >= args.warmup_minutes * 60:
+                    baseline_snapshot = tracemalloc.take_snapshot()
+                    baseline_index = len(samples) - 1
+                next_sample += args.sample_minutes * 60
+        for future in in_flight:
+            future.result()
+        while coordinator.depth():
+            time.sleep(0.01)
+        sample()
+        elapsed = time.perf_counter() - started
+        final_snapshot = tracemalloc.take_snapshot()
+        phrase_executor.shutdown()
+        coordinator.shutdown()
+        transcript_log.close()
+        pipeline.shutdown()
+    tracemalloc.stop()
+    if root is not None:
+        ui_updates.stop()
+        root.destroy()
+
+    if baseline_snapshot is None:
+        baseline_snapshot, baseline_index = final_snapshot, len(samples) - 1
+    first, last = samples[baseline_index], samples[-1]
+    hours = max(1e-9, (last["minute"] - first["minute"]) / 60)
+    growth = {
+        "memory_mb_per_hour": (last["traced_mb"] - first["traced_mb"]) / hours,
+        "threads": last["threads"] - first["threads"],
+        "handles": (last["handles"] - first["handles"]) if last["handles"] is not None else 0,
+        "database_handles": (last["database_handles"] - first["database_handles"])
+        if last["database_handles"] is not None else 0,
+    }
+    budgets = {
+        "memory_mb_per_hour": args.memory_budget,
+        "threads": args.thread_budget,
+        "handles": args.handle_budget,
+        "database_handles": args.database_handle_budget,
+    }
+    failures = [f"{name} grew by {growth[name]:.2f}, budget {budgets[name]}"
+                for name in budgets if growth[name] > budgets[name]]
+    top_growth = [str(stat) for stat in final_snapshot.compare_to(baseline_snapshot, "lineno")[:args.top]]
+
+    return {
+        "suite": "soak",
+        "config": {"hours": args.hours, "gap": args.gap, "sources": args.sources, "ui": args.ui,
+                   "warmup_minutes": args.warmup_minutes, "budgets": budgets},
+        "stages": {stage: {key: stats[key] for key in ("count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")}
+                   for stage, stats in pipeline.metrics.snapshot()["stages"].items()
+                   if stats["count"] and stage in PipelineMetrics.STAGES},
+        "scenarios": {"growth": {name: round(value, 3) for name, value in growth.items()},
+                      "final": {key: value for key, value in last.items()}},
+        "samples": samples,
+        "top_growth": top_growth,
+        "errors": errors,
+        "throughput_per_s": utterances / elapsed if elapsed > 0 else 0.0,
+        "simulated_speedup": (clock() / elapsed) if elapsed > 0 else 0.0,
+        "failures": failures,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def synthetic_speech_timeline(sentences, min_words, max_words, gap, hesitation, seed):
+    """Word timings for a talk: (word, start, end, pause_after, ends_sentence) with pauses inside sentences"""
+    rng = random.Random(seed)
+    vocabulary = sorted({word for text, lang in SAMPLE_TRANSCRIPTS if lang == "en" for word in text.split()})
+    words = []
+    clock = 0.0
+    for _ in range(sentences):
+        count = rng.randint(min_words, max_words)
+        for index in range(count):
+            duration = rng.uniform(0.2, 0.45)
+            last = index == count - 1
+            if last:
+                pause = rng.uniform(*gap)
+            elif rng.random() < hesitation:
+                # Hesitations and breaths inside a sentence
+                pause = rng.uniform(0.5, 1.0)
+            else:
+                pause = rng.uniform(0.05, 0.25)
+            words.append((rng.choice(vocabulary), clock, clock + duration, pause, last))
+            clock += duration + pause
+    return words
+
+
+def run_profiles_suite(args):
+    """End-of-sentence to result latency and broken sentences for each speech profile and the auto-tuner"""
+    workloads = {
+        "conversation": synthetic_speech_timeline(args.sentences, 3, 9, (0.6, 1.2), 0.05, seed=21),
+        "lecture": synthetic_speech_timeline(args.sentences, 12, 35, (0.9, 2.0), 0.12, seed=22),
+    }
+    modes = [(name, name, False) for name in CAPTURE_PROFILES] + [("auto", "accuracy", True)]
+    stages = {}
+    scenarios = {}
+    with FakeTranslateServer(latency=args.translate_latency, per_char=args.per_char) as server:
+        pipeline = TranslationPipeline(translator_factory=None, api_url=server.url, hedging=False,
+                                       memory_threshold=None, coalesce=False, duplicate_window=None)
+        for workload, words in workloads.items():
+            for mode, profile, auto_tune in modes:
+                controller = LatencyController(profile, target_latency=args.target_latency, auto_tune=auto_tune)
+                latencies = []
+                segments = 0
+                cut_sentences = 0
+                worker_free = 0.0
+                finishes = []
+                index = 0
+                while index < len(words):
+                    settings = dict(controller.settings)
+                    start = words[index][1]
+                    # Segment the way Recognizer.listen does: a long enough pause or the phrase limit ends it
+                    end_index = index
+                    while True:
+                        _, _, end, pause, _ = words[end_index]
+                        if end - start >= settings["phrase_time_limit"]:
+                            available = end
+                            break
+                        if end_index == len(words) - 1 or pause >= settings["pause_threshold"]:
+                            available = end + settings["pause_threshold"]
+                            break
+                        end_index += 1
+                    segment = words[index:end_index + 1]
+                    text = " ".join(word[0] for word in segment)
+                    audio_seconds = segment[-1][2] - segment[0][1]
+                    # One worker handles phrases in order, as the listening loop's results appear
+                    queue_depth = sum(1 for finish in finishes if finish > available)
+                    translate_started = time.perf_counter()
+                    pipeline.translate(text, "en", args.target)
+                    processing = audio_seconds * args.stt_rate + time.perf_counter() - translate_started
+                    finish = max(available, worker_free) + processing
+                    worker_free = finish
+                    finishes.append(finish)
+                    controller.observe(finish - available, queue_depth, audio_seconds)
+                    latencies.extend(finish - word[2] for word in segment if word[4])
+                    segments += 1
+                    cut_sentences += not segment[-1][4]
+                    index = end_index + 1
+                sentence_count = sum(1 for word in words if word[4])
+                stages[f"{workload}.{mode}"] = summarize(latencies)
+                scenarios[f"{workload}.{mode}"] = {
+                    "sentences": sentence_count,
+                    "phrases": segments,
+                    "cut_mid_sentence": cut_sentences,
+                    "within_target": round(sum(latency <= args.target_latency for latency in latencies)
+                                           / max(1, len(latencies)), 3),
+                    "adjustments": controller.adjustments,
+                    "final_pause_s": controller.settings["pause_threshold"],
+                    "final_phrase_limit_s": controller.settings["phrase_time_limit"],
+                }
+        pipeline.shutdown()
+
+    return {
+        "suite": "profiles",
+        "config": {"sentences": args.sentences, "target_latency": args.target_latency, "stt_rate": args.stt_rate,
+                   "translate_latency": args.translate_latency, "per_char": args.per_char},
+        "stages": stages,
+        "scenarios": scenarios,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+class FakeSynthesizer:
+    """Stand-in speech engine: writes silent WAV clips after a delay that grows with text length"""
+    available = True
+
+    def __init__(self, latency=0.15, per_char=0.004, seconds_per_char=0.06, sample_rate=SAMPLE_RATE):
+        self.latency = latency
+        self.per_char = per_char
+        self.seconds_per_char = seconds_per_char
+        self.sample_rate = sample_rate
+        self.calls = 0
+
+    def voice_for(self, lang):
+        return f"fake-{lang}"
+
+    def synthesize(self, text, lang, voice, path):
+        self.calls += 1
+        time.sleep(self.latency + self.per_char * len(text))
+        with wave.open(path, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(SAMPLE_WIDTH)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(bytes(SAMPLE_WIDTH * int(self.sample_rate * self.seconds_per_char * len(text))))
+
+
+class TimedPlayer:
+    """Stand-in audio output that sleeps for a clip's length (divided by speed) and records when it played"""
+
+    def __init__(self, speed=1.0):
+        self.speed = speed
+        self.played = []
+
+    def __call__(self, path):
+        started = time.perf_counter()
+        with wave.open(path, "rb") as wav:
+            duration = wav.getnframes() / wav.getframerate()
+        if self.speed:
+            time.sleep(duration / self.speed)
+        self.played.append((started, time.perf_counter()))
+
+
+def run_speech_suite(args):
+    """Time to first audio and playback stalls for spoken output, cold and from the clip cache"""
+    rng = random.Random(17)
+    vocabulary = sorted({word for text, lang in SAMPLE_TRANSCRIPTS if lang == "en" for word in text.split()})
+
+    def sentence(min_words=5, max_words=12):
+        return " ".join(rng.choice(vocabulary) for _ in range(rng.randint(min_words, max_words))).capitalize() + "."
+
+    long_texts = [" ".join(sentence() for _ in range(args.sentences)) for _ in range(args.utterances)]
+    frequent = [sentence(2, 4) for _ in range(args.frequent)]
+    stages = {}
+    scenarios = {}
+
+    def run(name, speech, player, texts):
+        first_audio, stalls = [], []
+        for text in texts:
+            player.played.clear()
+            started = time.perf_counter()
+            speech.speak(text, args.target)
+            speech.wait()
+            if player.played:
+                first_audio.append(player.played[0][0] - started)
+                stalls.extend(max(0.0, start - previous_end)
+                              for (_, previous_end), (start, _) in zip(player.played, player.played[1:]))
+        stages[f"{name}.first_audio"] = summarize(first_audio)
+        if stalls:
+            stages[f"{name}.stall"] = summarize(stalls)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, max_chars in (("whole_text", None), ("sentences", 80)):
+            synthesizer = FakeSynthesizer(args.synth_latency, args.per_char)
+            player = TimedPlayer(args.playback_speed)
+            cache = SpeechClipCache(os.path.join(tmp, name), max_bytes=args.cache_mb * 1048576)
+            speech = SpeechOutput(cache, synthesizer, player, max_chars=max_chars)
+            run(f"{name}.cold", speech, player, long_texts)
+            if max_chars:
+                # The same talk again, now entirely from the cache
+                run(f"{name}.cached", speech, player, long_texts)
+            scenarios[name] = {"synthesized": synthesizer.calls, "cache_hits": cache.hits,
+                               "cached_clips": len(cache), "cache_mb": round(cache.bytes / 1048576, 2)}
+            speech.shutdown()
+
+        # Mostly short stock phrases among one-off sentences, with a cache too small for everything
+        synthesizer = FakeSynthesizer(args.synth_latency, args.per_char)
+        player = TimedPlayer(speed=0)
+        cache = SpeechClipCache(os.path.join(tmp, "frequent"), max_bytes=args.frequent_cache_kb * 1024)
+        speech = SpeechOutput(cache, synthesizer, player)
+        texts = [rng.choice(frequent) if rng.random() < args.frequent_share else sentence()
+                 for _ in range(args.phrases)]
+        run("frequent", speech, player, texts)
+        scenarios["frequent"] = {"phrases": len(texts), "synthesized": synthesizer.calls,
+                                 "hit_rate": round(cache.hits / max(1, cache.hits + cache.misses), 3),
+                                 "evictions": cache.evictions, "cached_clips": len(cache),
+                                 "cache_kb": round(cache.bytes / 1024, 1)}
+        speech.shutdown()
+
+    return {
+        "suite": "speech",
+        "config": {"utterances": args.utterances, "sentences": args.sentences, "synth_latency": args.synth_latency,
+                   "per_char": args.per_char, "playback_speed": args.playback_speed, "phrases": args.phrases,
+                   "frequent": args.frequent, "frequent_share": args.frequent_share,
+                   "frequent_cache_kb": args.frequent_cache_kb},
+        "stages": stages,
+        "scenarios": scenarios,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_replay_suite(args):
+    """Replay a recorded session through the pipeline and compare timings and results with the recording"""
+    work_dir = tempfile.mkdtemp(prefix="vt_bench_replay_")
+    stages = {}
+    with FakeTranslateServer(latency=args.translate_latency, jitter=args.translate_jitter) as server:
+        api_url = TRANSLATE_API_URL if args.translate == "live" else server.url
+        recording_path = args.recording
+        if not recording_path:
+            # Record a synthetic session first: fixtures spoken one after another with pauses in between
+            fixtures = load_fixtures(generate_fixtures(os.path.join(work_dir, "fixtures")))
+            pipeline = build_pipeline(fixtures, args, api_url, os.path.join(work_dir, "recorded.db"))
+            recorder = SessionRecorder(os.path.join(work_dir, "recordings"))
+            rng = random.Random(5)
+            at = 0.0
+            for index in range(args.segments):
+                audio, _ = fixtures[index % len(fixtures)]
+                at += len(audio.frame_data) / (audio.sample_rate * audio.sample_width) + rng.uniform(0.3, 1.5)
+                token = recorder.append(audio, source="synthetic", at=at)
+                recorder.record_result(token, pipeline.process(audio, args.target))
+            recorder.close()
+            pipeline.shutdown()
+            recording_path = recorder.path
+
+        with SessionRecording(recording_path) as recording:
+            if not recording.segments:
+                raise SystemExit(f"No segments recorded in {recording_path}")
+            reads = []
+            for segment in recording.segments:
+                started = time.perf_counter()
+                recording.audio(segment)
+                reads.append(time.perf_counter() - started)
+            stages["audio_read"] = summarize(reads)
+            recorded = [segment["result"] for segment in recording.segments if segment["result"]]
+            for stage in ("recognize", "translate", "total"):
+                samples = [result["timings"][stage] for result in recorded if stage in result.get("timings", {})]
+                if samples:
+                    stages[f"recorded.{stage}"] = summarize(samples)
+
+            # The stub recognizer answers with what was recognized when the session was recorded
+            fixtures = [(recording.audio(segment), segment["result"].get("source_text"))
+                        for segment in recording.segments if segment["result"]]
+            pipeline = build_pipeline(fixtures, args, api_url, os.path.join(work_dir, "replay.db"))
+            lateness = []
+            replay_started = time.monotonic()
+
+            def process(segment, audio):
+                if args.speed:
+                    lateness.append(time.monotonic() - replay_started - segment["at"] / args.speed)
+                target = (segment["result"] or {}).get("target_lang", args.target)
+                return pipeline.process(audio, target)
+
+            results = recording.replay(process, speed=args.speed, workers=args.concurrency)
+            elapsed = time.monotonic() - replay_started
+            pipeline.shutdown()
+
+            completed = [result for result in results if not isinstance(result, Exception)]
+            for stage in ("recognize", "detect", "translate", "db_write", "total"):
+                samples = [result["timings"][stage] for result in completed if stage in result["timings"]]
+                if samples:
+                    stages[f"replay.{stage}"] = summarize(samples)
+            if lateness:
+                stages["schedule_lateness"] = summarize(lateness)
+            changed = sum(
+                1 for segment, result in zip(recording.segments, results)
+                if segment["result"] and not isinstance(result, Exception)
+                and result["translated_text"] != segment["result"].get("translated_text")
+            )
+            scenarios = {"replay": {
+                "segments": len(recording.segments),
+                "with_results": len(recorded),
+                "changed_translations": changed,
+                "recorded_duration_s": round(recording.duration, 2),
+                "replay_elapsed_s": round(elapsed, 2),
+            }}
+
+    return {
+        "suite": "replay",
+        "config": {"recording": recording_path, "speed": args.speed, "concurrency": args.concurrency,
+                   "stt": args.stt, "translate": args.translate, "translate_latency": args.translate_latency},
+        "stages": stages,
+        "scenarios": scenarios,
+        "errors": len(results) - len(completed),
+        "throughput_per_s": len(completed) / elapsed if elapsed > 0 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+class CountingRecognizer(StubRecognizer):
+    """Stub recognizer that counts how often recognition actually runs"""
+    def __init__(self, fixtures, seconds_per_audio_second=0.05):
+        super().__init__(fixtures, seconds_per_audio_second)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def recognize_google(self, audio):
+        with self._lock:
+            self.calls += 1
+        return super().recognize_google(audio)
+
+
+def run_coalesce_suite(args):
+    """Duplicate requests in flight at once, with and without single-flight coalescing"""
+    fixtures = load_fixtures(generate_fixtures(os.path.join(tempfile.mkdtemp(prefix="vt_bench_"), "fixtures")))
+    # Same words, different audio: another capture of the phrase, so only translation can be shared
+    retakes = [(sr.AudioData(audio.frame_data + bytes(SAMPLE_WIDTH * 160), audio.sample_rate, audio.sample_width),
+                text) for audio, text in fixtures]
+    workloads = {
+        # Repeated "Process Last Audio" clicks on the same captured audio
+        "same_audio": [[audio] * args.duplicates for audio, _ in fixtures],
+        # Overlapping live processing of a phrase captured twice
+        "same_text": [[audio] + [retake] * (args.duplicates - 1) for (audio, _), (retake, _) in zip(fixtures, retakes)],
+    }
+    stages = {}
+    scenarios = {}
+    with FakeTranslateServer(latency=args.translate_latency, jitter=args.translate_jitter) as server:
+        for workload, groups in workloads.items():
+            for coalesce in (False, True):
+                name = f"{workload}.{'coalesced' if coalesce else 'independent'}"
+                db_path = os.path.join(tempfile.mkdtemp(prefix="vt_bench_db_"), "translation_history.db")
+                recognizer = CountingRecognizer(fixtures + retakes, seconds_per_audio_second=args.stt_delay)
+                pipeline = TranslationPipeline(
+                    recognizer=recognizer, translator_factory=None, api_url=server.url, db_path=db_path,
+                    hedging=False, memory_threshold=None, coalesce=coalesce,
+                    duplicate_window=args.duplicate_window if coalesce else None
+                )
+                requests_before = server.requests
+                latencies = []
+                errors = 0
+                with ThreadPoolExecutor(max_workers=args.duplicates) as executor:
+                    for _ in range(args.iterations):
+                        futures = [executor.submit(pipeline.process, audio, args.target)
+                                   for group in groups for audio in group]
+                        for future in futures:
+                            try:
+                                latencies.append(future.result()["timings"]["total"])
+                            except Exception:
+                                errors += 1
+                        # Let the duplicate window expire so each iteration saves its results again
+                        if coalesce:
+                            time.sleep(args.duplicate_window)
+                counters = pipeline.metrics.snapshot()["counters"]
+                pipeline.shutdown()
+                conn = sqlite3.connect(db_path)
+                rows = conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+                conn.close()
+                stages[name] = summarize(latencies)
+                scenarios[name] = {
+                    "calls": len(latencies) + errors,
+                    "recognitions": recognizer.calls,
+                    "translate_requests": server.requests - requests_before,
+                    "history_rows": rows,
+                    "coalesced_recognitions": counters["coalesced_recognitions"],
+                    "coalesced_detections": counters["coalesced_detections"],
+                    "coalesced_translations": counters["coalesced_translations"],
+                    "duplicate_saves": counters["duplicate_saves"],
+                    "errors": errors,
+                }
+
+    return {
+        "suite": "coalesce",
+        "config": {"duplicates": args.duplicates, "iterations": args.iterations, "stt_delay": args.stt_delay,
+                   "translate_latency": args.translate_latency, "duplicate_window": args.duplicate_window},
+        "stages": stages,
+        "scenarios": scenarios,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_history_suite(args):
+    """Tk frame latency while a large history table loads, on the Tk thread vs in background chunks"""
+    import tkinter as tk
+    from tkinter import ttk
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="vt_bench_db_"), "translation_history.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute(HISTORY_TABLE_SQL)
+    rng = random.Random(3)
+    texts = [text for text, _ in SAMPLE_TRANSCRIPTS]
+    conn.executemany(
+        "INSERT INTO history (timestamp, source_text, source_lang, translated_text, target_lang) VALUES (?, ?, ?, ?, ?)",
+        [(f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00",
+          rng.choice(texts), "en", f"[hi] {rng.choice(texts)}", "hi") for _ in range(args.rows)]
+    )
+    conn.commit()
+    conn.close()
+
+    def lock_database(seconds, locked):
+        # Another writer holding the database, as a long history write or a backup would
+        holder = sqlite3.connect(db_path)
+        holder.execute("BEGIN EXCLUSIVE")
+        locked.set()
+        time.sleep(seconds)
+        holder.rollback()
+        holder.close()
+
+    def run_mode(mode, lock_seconds=0.0):
+        try:
+            root = tk.Tk()
+        except tk.TclError as e:
+            raise SystemExit(f"The history suite needs a display: {e}")
+        root.withdraw()
+        tree = ttk.Treeview(root, columns=("ID", "Timestamp", "Source Text", "Source Language",
+                                           "Translated Text", "Target Language"), show="headings")
+        tree.pack()
+        updates = UIUpdateQueue(root)
+        executor = ThreadPoolExecutor(max_workers=1)
+        loader = HistoryLoader(tree, updates, executor, chunk_size=args.chunk_size)
+        lateness = []
+        done = [False]
+        probe_interval = 0.010
+
+        def load_on_tk_thread():
+            # What load_history used to do inside a button callback
+            conn = sqlite3.connect(db_path)
+            rows = conn.execute(HistoryLoader.QUERY).fetchall()
+            conn.close()
+            tree.delete(*tree.get_children())
+            for row in rows:
+                tree.insert("", "end", values=HistoryLoader.format_row(row))
+            done[0] = True
+
+        def start():
+            if mode == "tk_thread":
+                root.after(0, load_on_tk_thread)
+            else:
+                loader.load(lambda: db_path)
+                if mode == "cancelled":
+                    # The user clicks Refresh again while the first load is still arriving
+                    root.after(int(args.cancel_after * 1000), loader.load, lambda: db_path)
+
+        def probe(expected):
+            now = time.perf_counter()
+            lateness.append(max(0.0, now - expected))
+            finished = done[0] if mode == "tk_thread" else not loader.loading
+            if finished:
+                root.quit()
+            else:
+                root.after(int(probe_interval * 1000), probe, time.perf_counter() + probe_interval)
+
+        if lock_seconds:
+            locked = threading.Event()
+            threading.Thread(target=lock_database, args=(lock_seconds, locked), daemon=True).start()
+            locked.wait()
+        updates.start()
+        started = time.perf_counter()
+        root.after(0, probe, time.perf_counter())
+        start()
+        root.mainloop()
+        elapsed = time.perf_counter() - started
+        shown = len(tree.get_children())
+        updates.stop()
+        executor.shutdown(wait=True)
+        root.destroy()
+        return {"frame_lateness": summarize(lateness), "load_s": round(elapsed, 3), "rows_shown": shown}
+
+    modes = {
+        "tk_thread": run_mode("tk_thread"),
+        "chunked": run_mode("chunked"),
+        "cancelled": run_mode("cancelled"),
+        "tk_thread_locked": run_mode("tk_thread", args.lock_seconds),
+        "chunked_locked": run_mode("chunked", args.lock_seconds),
+    }
+    failures = [f"{mode}: {result['rows_shown']} rows shown, expected {args.rows}"
+                for mode, result in modes.items() if result["rows_shown"] != args.rows]
+    return {
+        "suite": "history",
+        "config": {"rows": args.rows, "chunk_size": args.chunk_size, "cancel_after_s": args.cancel_after,
+                   "lock_seconds": args.lock_seconds},
+        "stages": {f"{mode}.frame_lateness": result["frame_lateness"] for mode, result in modes.items()},
+        "scenarios": {mode: {k: v for k, v in result.items() if k != "frame_lateness"}
+                      for mode, result in modes.items()},
+        "failures": failures,
+    }
+
+
+def run_usage_suite(args):
+    """Insert overhead of the usage buckets, statistics query cost as history grows, and rebuild time"""
+    rng = random.Random(17)
+    texts = [text for text, _ in SAMPLE_TRANSCRIPTS]
+    pairs = [("en", "hi"), ("en", "fr"), ("hi", "en"), ("fr", "en"), ("de", "en"), ("es", "en")]
+    now = datetime.now()
+
+    def history_row(seconds_ago):
+        source_lang, target_lang = rng.choice(pairs)
+        text = rng.choice(texts)
+        roll = rng.random()
+        if roll < 0.02:
+            translated = f"Translation unavailable for: {text}"
+        elif roll < 0.03:
+            translated = f"Translation timed out for: {text}"
+        else:
+            translated = f"[{target_lang}] {text}"
+        timestamp = (now - timedelta(seconds=seconds_ago)).strftime("%Y-%m-%d %H:%M:%S")
+        return timestamp, text, source_lang, translated, target_lang, int(rng.random() < 0.05)
+
+    def fresh_database():
+        db_path = os.path.join(tempfile.mkdtemp(prefix="vt_bench_db_"), "translation_history.db")
+        conn = sqlite3.connect(db_path)
+        migrate_history_schema(conn)
+        return conn
+
+    insert_sql = ("INSERT INTO history (timestamp, source_text, source_lang, translated_text, target_lang, "
+                  "degraded) VALUES (?, ?, ?, ?, ?, ?)")
+    stages = {}
+    scenarios = {}
+    failures = []
+
+    # One committed transaction per translation, as the pipeline saves them
+    incremental = None
+    for mode in ("plain", "with_usage"):
+        conn = fresh_database()
+        samples = []
+        for i in range(args.inserts):
+            row = history_row((args.inserts - i) * 60)
+            started = time.perf_counter()
+            cursor = conn.cursor()
+            cursor.execute(insert_sql, row)
+            if mode == "with_usage":
+                UsageStatistics.record(cursor, row[0], row[1], row[2], row[3], row[4], row[5])
+            conn.commit()
+            samples.append(time.perf_counter() - started)
+        stages[f"insert.{mode}"] = summarize(samples)
+        if mode == "with_usage":
+            incremental = conn
+        else:
+            conn.close()
+
+    # The buckets kept up on insert must match the ones rebuilt from the rows
+    kept = UsageStatistics.hourly(incremental)
+    UsageStatistics.rebuild(incremental)
+    incremental.commit()
+    rebuilt = UsageStatistics.hourly(incremental)
+    incremental.close()
+    scenarios["consistency"] = {"buckets": len(kept), "mismatched": len([b for b in kept if b not in rebuilt])
+                                + abs(len(kept) - len(rebuilt))}
+    if kept != rebuilt:
+        failures.append(f"incremental buckets differ from rebuilt ones ({len(kept)} vs {len(rebuilt)} buckets)")
+
+    # Statistics for the last N days from the buckets vs grouping the history rows
+    since = (now - timedelta(days=args.days - 1)).strftime("%Y-%m-%d")
+    scan_sql = """
+        SELECT substr(timestamp, 1, 10), source_lang, target_lang, COUNT(*), SUM(length(source_text)),
+               SUM(length(translated_text)), SUM(degraded)
+        FROM history WHERE timestamp >= ?
+        GROUP BY 1, 2, 3
+    """
+    for rows in args.rows:
+        conn = fresh_database()
+        span = args.history_days * 86400
+        conn.executemany(insert_sql, (history_row(rng.randrange(span)) for _ in range(rows)))
+        conn.commit()
+        started = time.perf_counter()
+        UsageStatistics.rebuild(conn)
+        conn.commit()
+        rebuild_s = time.perf_counter() - started
+        buckets = UsageStatistics.daily(conn, args.days)
+        bucket_samples = []
+        scan_samples = []
+        for _ in range(args.queries):
+            started = time.perf_counter()
+            UsageStatistics.totals(conn, args.days)
+            UsageStatistics.daily(conn, args.days)
+            bucket_samples.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            conn.execute(scan_sql, (since,)).fetchall()
+            scan_samples.append(time.perf_counter() - started)
+        conn.close()
+        stages[f"query.buckets.{rows}"] = summarize(bucket_samples)
+        stages[f"query.scan.{rows}"] = summarize(scan_samples)
+        scenarios[f"rows_{rows}"] = {
+            "rebuild_ms": round(rebuild_s * 1000, 1),
+            "daily_rows": len(buckets),
+            "buckets_p50_ms": round(percentile(bucket_samples, 50) * 1000, 3),
+            "scan_p50_ms": round(percentile(scan_samples, 50) * 1000, 3),
+        }
+
+    return {
+        "suite": "usage",
+        "config": {"inserts": args.inserts, "rows": args.rows, "history_days": args.history_days,
+                   "days": args.days, "queries": args.queries},
+        "stages": stages,
+        "scenarios": scenarios,
+        "failures": failures,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+SUITES = {
+    "pipeline": run_pipeline_suite,
+    "trace": run_trace_suite,
+    "hedge": run_hedge_suite,
+    "ui": run_ui_suite,
+    "transcript": run_transcript_suite,
+    "server": run_server_suite,
+    "sources": run_sources_suite,
+    "segments": run_segments_suite,
+    "detect": run_detect_suite,
+    "phrases": run_phrases_suite,
+    "memory": run_memory_suite,
+    "offload": run_offload_suite,
+    "soak": run_soak_suite,
+    "profiles": run_profiles_suite,
+    "speech": run_speech_suite,
+    "replay": run_replay_suite,
+    "coalesce": run_coalesce_suite,
+    "history": run_history_suite,
+    "usage": run_usage_suite,
+}
+
+
+# ---------------------------------------------------------------------------
+# Reporting and baseline comparison
+# ---------------------------------------------------------------------------
+
+def print_report(results):
+    """Print a human readable summary of suite results"""
+    print(f"\n=== {results['suite']} ===")
+    for key, value in results.get("config", {}).items():
+        print(f"  {key}: {value}")
+    if results.get("stages"):
+        width = max(12, max(len(stage) for stage in results["stages"]) + 2)
+        print(f"\n  {'stage':<{width}}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+        for stage, stats in results["stages"].items():
+            print(f"  {stage:<{width}}{stats['count']:>7}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}"
+                  f"{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}")
+    if results.get("microbench"):
+        print()
+        for name, value in results["microbench"].items():
+            print(f"  {name:<24}{value:>12.1f}")
+    for name, scenario in results.get("scenarios", {}).items():
+        details = ", ".join(f"{key}={value}" for key, value in scenario.items() if not isinstance(value, dict))
+        print(f"  {name}: {details}")
+    if results.get("top_growth"):
+        print("\n  allocation growth since warm-up:")
+        for line in results["top_growth"]:
+            print(f"    {line}")
+    for key in ("errors", "rejected", "throughput_per_s", "peak_rss_mb"):
+        if key in results and results[key] is not None:
+            value = results[key]
+            print(f"  {key}: {value:.2f}" if isinstance(value, float) else f"  {key}: {value}")
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Return a list of regressions where results are worse than baseline by more than tolerance"""
+    regressions = []
+    for stage, stats in results.get("stages", {}).items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            # Ignore sub-millisecond stages where noise dominates
+            if base[metric] >= 1.0 and stats[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{stage}.{metric}: {base[metric]:.1f} -> {stats[metric]:.1f}")
+    for name, value in results.get("microbench", {}).items():
+        base = baseline.get("microbench", {}).get(name)
+        if base and value > base * (1 + tolerance):
+            regressions.append(f"{name}: {base:.1f} -> {value:.1f}")
+    base_tp = baseline.get("throughput_per_s")
+    if base_tp and results.get("throughput_per_s", 0) < base_tp * (1 - tolerance):
+        regressions.append(f"throughput_per_s: {base_tp:.2f} -> {results['throughput_per_s']:.2f}")
+    base_rss = baseline.get("peak_rss_mb")
+    if base_rss and results.get("peak_rss_mb") and results["peak_rss_mb"] > base_rss * (1 + tolerance):
+        regressions.append(f"peak_rss_mb: {base_rss:.1f} -> {results['peak_rss_mb']:.1f}")
+    return regressions
+
+
+def add_common_arguments(parser):
+    """Options shared by every suite"""
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against a previous JSON result and fail on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed relative slowdown before a metric counts as a regression")
+
+
+def add_pipeline_arguments(parser):
+    """Options for suites that drive the full pipeline"""
+    parser.add_argument("--fixtures", help="Directory of mono WAV files with matching .txt transcripts "
+                                           "(synthetic fixtures are generated when omitted)")
+    parser.add_argument("--iterations", type=int, default=5, help="Passes over the fixture set")
+    parser.add_argument("--concurrency", type=int, default=1, help="Utterances processed in parallel")
+    parser.add_argument("--stt", choices=["stub", "sphinx"], default="stub", help="Speech recognizer stand-in")
+    parser.add_argument("--stt-delay", type=float, default=0.05,
+                        help="Stub recognizer delay in seconds per second of audio")
+    parser.add_argument("--translate-latency", type=float, default=0.05,
+                        help="Fake translation server base latency in seconds")
+    parser.add_argument("--translate-jitter", type=float, default=0.02,
+                        help="Fake translation server uniform jitter in seconds")
+    parser.add_argument("--target", default="hi", help="Target language code")
+    parser.add_argument("--detect-mode", choices=DETECT_MODES, default="local",
+                        help="Source language detection mode")
+    parser.add_argument("--memory-threshold", type=float, default=0,
+                        help="Reuse translations from earlier passes above this similarity (0 disables, so "
+                             "repeated fixtures keep measuring the translation service)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Voice Translator Pro benchmark suite")
+    subparsers = parser.add_subparsers(dest="suite", required=True)
+
+    pipeline_parser = subparsers.add_parser("pipeline", help="End-to-end pipeline latency and throughput")
+    add_pipeline_arguments(pipeline_parser)
+    add_common_arguments(pipeline_parser)
+
+    trace_parser = subparsers.add_parser("trace", help="Cost of enabled and disabled trace points")
+    trace_parser.add_argument("--number", type=int, default=200000, help="Calls per measurement")
+    trace_parser.add_argument("--max-disabled-overhead-ns", type=float, default=100.0,
+                              help="Fail when a disabled trace point costs more than this over an empty call")
+    add_common_arguments(trace_parser)
+
+    hedge_parser = subparsers.add_parser("hedge", help="Bounded p99 with hedged requests and circuit breakers")
+    hedge_parser.add_argument("--requests", type=int, default=400, help="Translations per scenario")
+    hedge_parser.add_argument("--concurrency", type=int, default=4, help="Translations in flight at once")
+    hedge_parser.add_argument("--translate-latency", type=float, default=0.05,
+                              help="Base latency of both fake translation servers in seconds")
+    hedge_parser.add_argument("--translate-jitter", type=float, default=0.02,
+                              help="Uniform jitter of both fake translation servers in seconds")
+    hedge_parser.add_argument("--slow-fraction", type=float, default=0.05,
+                              help="Fraction of primary requests with injected slowness")
+    hedge_parser.add_argument("--slow-latency", type=float, default=2.0,
+                              help="Extra seconds added to slow primary requests")
+    hedge_parser.add_argument("--budget", type=float, default=1.5, help="Per-utterance latency budget in seconds")
+    hedge_parser.add_argument("--target", default="hi", help="Target language code")
+    add_common_arguments(hedge_parser)
+
+    ui_parser = subparsers.add_parser("ui", help="Tk responsiveness under a synthetic high-rate result stream")
+    ui_parser.add_argument("--rate", type=float, default=500.0, help="Results posted per second")
+    ui_parser.add_argument("--duration", type=float, default=5.0, help="Seconds to run each mode")
+    ui_parser.add_argument("--fps", type=int, default=30, help="Dispatcher frame rate cap")
+    add_common_arguments(ui_parser)
+
+    transcript_parser = subparsers.add_parser("transcript", help="Rolling transcript append cost over a long session")
+    transcript_parser.add_argument("--lines", type=int, default=50000, help="Pairs appended with the cap in place")
+    transcript_parser.add_argument("--max-lines", type=int, default=500, help="Transcript cap")
+    transcript_parser.add_argument("--uncapped-lines", type=int, default=10000,
+                                   help="Pairs appended without a cap, for comparison")
+    transcript_parser.add_argument("--target", default="hi", help="Target language code")
+    add_common_arguments(transcript_parser)
+
+    server_parser = subparsers.add_parser("server", help="Streaming server load test with simulated clients")
+    server_parser.add_argument("--clients", type=int, default=16, help="Simulated clients streaming at once")
+    server_parser.add_argument("--utterances", type=int, default=3, help="Utterances streamed per client")
+    server_parser.add_argument("--speed", type=float, default=4.0, help="Upload pace as a multiple of real time")
+    server_parser.add_argument("--chunk-seconds", type=float, default=0.1, help="Audio per upload chunk")
+    server_parser.add_argument("--gap", type=float, default=0.8, help="Seconds of silence between utterances")
+    server_parser.add_argument("--ramp", type=float, default=1.0, help="Seconds over which clients connect")
+    server_parser.add_argument("--max-connections", type=int, default=32, help="Server session limit")
+    server_parser.add_argument("--max-concurrent", type=int, default=8, help="Server pipeline concurrency")
+    server_parser.add_argument("--per-connection", type=int, default=2, help="Utterances in flight per session")
+    server_parser.add_argument("--stt-delay", type=float, default=0.05,
+                               help="Stub recognizer delay in seconds per second of audio")
+    server_parser.add_argument("--translate-latency", type=float, default=0.05,
+                               help="Fake translation server base latency in seconds")
+    server_parser.add_argument("--translate-jitter", type=float, default=0.02,
+                               help="Fake translation server uniform jitter in seconds")
+    server_parser.add_argument("--target", default="hi", help="Target language code")
+    add_common_arguments(server_parser)
+
+    sources_parser = subparsers.add_parser("sources", help="Fairness across concurrent capture sources")
+    sources_parser.add_argument("--sources", type=int, default=4, help="Capture sources including the busy one")
+    sources_parser.add_argument("--busy-rate", type=float, default=20.0, help="Phrases per second from the busy source")
+    sources_parser.add_argument("--rate", type=float, default=1.0, help="Phrases per second from each quiet source")
+    sources_parser.add_argument("--duration", type=float, default=10.0, help="Seconds each source keeps talking")
+    sources_parser.add_argument("--recognize-workers", type=int, default=2, help="Shared recognition workers")
+    sources_parser.add_argument("--translate-workers", type=int, default=4, help="Shared translation workers")
+    sources_parser.add_argument("--max-pending", type=int, default=1000,
+                                help="Queued phrases kept per source (per queue when FIFO)")
+    sources_parser.add_argument("--budget", type=float, default=8.0, help="Seconds to wait for stragglers")
+    sources_parser.add_argument("--stt-delay", type=float, default=0.05,
+                                help="Stub recognizer delay in seconds per second of audio")
+    sources_parser.add_argument("--translate-latency", type=float, default=0.05,
+                                help="Fake translation server base latency in seconds")
+    sources_parser.add_argument("--translate-jitter", type=float, default=0.02,
+                                help="Fake translation server uniform jitter in seconds")
+    sources_parser.add_argument("--target", default="hi", help="Target language code")
+    add_common_arguments(sources_parser)
+
+    segments_parser = subparsers.add_parser("segments", help="Whole-text vs sentence-level parallel translation")
+    segments_parser.add_argument("--requests", type=int, default=100, help="Long phrases to translate")
+    segments_parser.add_argument("--sentences", type=int, default=4, help="Sentences per phrase")
+    segments_parser.add_argument("--concurrency", type=int, default=2, help="Phrases in flight at once")
+    segments_parser.add_argument("--segment-chars", type=int, default=100,
+                                 help="Split text longer than this many characters")
+    segments_parser.add_argument("--retries", type=int, default=1, help="Retries per failed request")
+    segments_parser.add_argument("--translate-latency", type=float, default=0.05,
+                                 help="Fake translation server base latency in seconds")
+    segments_parser.add_argument("--per-char", type=float, default=0.002,
+                                 help="Extra fake server latency in seconds per source character")
+    segments_parser.add_argument("--translate-jitter", type=float, default=0.02,
+                                 help="Fake translation server uniform jitter in seconds")
+    segments_parser.add_argument("--error-per-char", type=float, default=0.001,
+                                 help="Fake server failure probability per source character")
+    segments_parser.add_argument("--budget", type=float, default=8.0, help="Per-phrase latency budget in seconds")
+    segments_parser.add_argument("--target", default="hi", help="Target language code")
+    add_common_arguments(segments_parser)
+
+    detect_parser = subparsers.add_parser("detect", help="Local, sticky and backend source language detection")
+    detect_parser.add_argument("--utterances", type=int, default=200, help="Utterances per mode")
+    detect_parser.add_argument("--switch-every", type=int, default=25,
+                               help="Utterances before the speaker (and language) changes")
+    detect_parser.add_argument("--translate-latency", type=float, default=0.01,
+                               help="Fake translation server base latency in seconds")
+    detect_parser.add_argument("--translate-jitter", type=float, default=0.0,
+                               help="Fake translation server uniform jitter in seconds")
+    detect_parser.add_argument("--target", default="hi", help="Target language code")
+    add_common_arguments(detect_parser)
+
+    phrases_parser = subparsers.add_parser("phrases", help="Offline phrase table memory and lookup cost")
+    phrases_parser.add_argument("--entries", type=int, default=100000, help="Phrases in the generated table")
+    phrases_parser.add_argument("--lookups", type=int, default=5000, help="Lookups per workload")
+    add_common_arguments(phrases_parser)
+
+    memory_parser = subparsers.add_parser("memory", help="Fuzzy translation memory build and lookup cost")
+    memory_parser.add_argument("--entries", type=int, default=1000000, help="History rows to index")
+    memory_parser.add_argument("--lookups", type=int, default=2000, help="Lookups per workload")
+    memory_parser.add_argument("--threshold", type=float, default=0.85, help="Minimum trigram similarity")
+    memory_parser.add_argument("--vocabulary", type=int, default=20000, help="Distinct words in the sentences")
+    add_common_arguments(memory_parser)
+
+    offload_parser = subparsers.add_parser("offload", help="CPU-bound stages in threads vs worker processes")
+    offload_parser.add_argument("--iterations", type=int, default=10, help="Passes over the fixture set")
+    offload_parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1,
+                                help="Largest worker count; powers of two up to it are measured too")
+    offload_parser.add_argument("--passes", type=int, default=4,
+                                help="Passes over the samples per utterance in the stand-in recognizer")
+    offload_parser.add_argument("--translate-latency", type=float, default=0.01,
+                                help="Fake translation server latency in seconds")
+    offload_parser.add_argument("--target", default="hi", help="Target language code")
+    add_common_arguments(offload_parser)
+
+    soak_parser = subparsers.add_parser("soak", help="Simulated workday looking for memory, thread and handle leaks")
+    soak_parser.add_argument("--hours", type=float, default=8, help="Simulated hours of speech")
+    soak_parser.add_argument("--gap", type=float, default=2.0, help="Simulated seconds of silence between phrases")
+    soak_parser.add_argument("--sources", type=int, default=1, help="Extra capture sources fed the same phrases")
+    soak_parser.add_argument("--concurrency", type=int, default=2, help="Phrase threads allowed in flight")
+    soak_parser.add_argument("--ui", action="store_true", help="Also drive the transcript through Tk (needs a display)")
+    soak_parser.add_argument("--sample-minutes", type=float, default=30, help="Simulated minutes between samples")
+    soak_parser.add_argument("--warmup-minutes", type=float, default=30,
+                             help="Simulated minutes before growth is measured (caches fill up)")
+    soak_parser.add_argument("--translate-latency", type=float, default=0.0, help="Fake translation server latency")
+    soak_parser.add_argument("--error-fraction", type=float, default=0.02,
+                             help="Share of translation requests that fail, to exercise retries and fallbacks")
+    soak_parser.add_argument("--target", default="hi", help="Target language code")
+    soak_parser.add_argument("--memory-budget", type=float, default=1.0,
+                             help="Allowed traced memory growth in MB per simulated hour")
+    soak_parser.add_argument("--thread-budget", type=int, default=0, help="Allowed growth in live threads")
+    soak_parser.add_argument("--handle-budget", type=int, default=2, help="Allowed growth in open file handles")
+    soak_parser.add_argument("--database-handle-budget", type=int, default=0,
+                             help="Allowed growth in handles open on the history database")
+    soak_parser.add_argument("--top", type=int, default=10, help="Allocation sites with the most growth to report")
+    add_common_arguments(soak_parser)
+
+    profiles_parser = subparsers.add_parser("profiles", help="Speech profiles and the latency auto-tuner")
+    profiles_parser.add_argument("--sentences", type=int, default=60, help="Sentences per simulated talk")
+    profiles_parser.add_argument("--target-latency", type=float, default=3.0,
+                                 help="End-to-end latency the auto-tuner aims for, in seconds")
+    profiles_parser.add_argument("--stt-rate", type=float, default=0.15,
+                                 help="Simulated recognition seconds per second of audio")
+    profiles_parser.add_argument("--translate-latency", type=float, default=0.05,
+                                 help="Fake translation server base latency in seconds")
+    profiles_parser.add_argument("--per-char", type=float, default=0.002,
+                                 help="Fake translation server latency per source character")
+    profiles_parser.add_argument("--target", default="hi", help="Target language code")
+    add_common_arguments(profiles_parser)
+
+    speech_parser = subparsers.add_parser("speech", help="Spoken output latency with the synthesized clip cache")
+    speech_parser.add_argument("--utterances", type=int, default=10, help="Multi-sentence translations to speak")
+    speech_parser.add_argument("--sentences", type=int, default=4, help="Sentences per translation")
+    speech_parser.add_argument("--synth-latency", type=float, default=0.15,
+                               help="Fake speech engine base latency in seconds")
+    speech_parser.add_argument("--per-char", type=float, default=0.004,
+                               help="Fake speech engine latency per character")
+    speech_parser.add_argument("--playback-speed", type=float, default=4.0,
+                               help="Play clips this many times faster than real time to shorten the run")
+    speech_parser.add_argument("--cache-mb", type=int, default=SPEECH_CACHE_MB, help="Clip cache size for the long translations")
+    speech_parser.add_argument("--phrases", type=int, default=300, help="Utterances in the frequent-phrase workload")
+    speech_parser.add_argument("--frequent", type=int, default=20, help="Distinct stock phrases")
+    speech_parser.add_argument("--frequent-share", type=float, default=0.8,
+                               help="Share of utterances that are stock phrases")
+    speech_parser.add_argument("--frequent-cache-kb", type=int, default=2048,
+                               help="Clip cache size for the frequent-phrase workload")
+    speech_parser.add_argument("--target", default="hi", help="Target language code")
+    add_common_arguments(speech_parser)
+
+    replay_parser = subparsers.add_parser("replay", help="Replay a recorded session through the pipeline")
+    replay_parser.add_argument("--recording", help="Session .pcm file to replay (a synthetic session is recorded "
+                                                   "first when omitted)")
+    replay_parser.add_argument("--segments", type=int, default=40, help="Segments in the synthetic session")
+    replay_parser.add_argument("--speed", type=float, default=0,
+                               help="1 replays at the recorded pace, 2 twice as fast; 0 sends segments at once")
+    replay_parser.add_argument("--concurrency", type=int, default=4, help="Segments processed in parallel")
+    replay_parser.add_argument("--stt", choices=["stub", "sphinx"], default="stub",
+                               help="stub answers with the text recognized when the session was recorded")
+    replay_parser.add_argument("--stt-delay", type=float, default=0.05,
+                               help="Stub recognizer delay in seconds per second of audio")
+    replay_parser.add_argument("--translate", choices=["fake", "live"], default="fake",
+                               help="Translate with the local stand-in or the real translation service")
+    replay_parser.add_argument("--translate-latency", type=float, default=0.05,
+                               help="Fake translation server base latency in seconds")
+    replay_parser.add_argument("--translate-jitter", type=float, default=0.02,
+                               help="Fake translation server uniform jitter in seconds")
+    replay_parser.add_argument("--target", default="hi",
+                               help="Target language for segments recorded without a result")
+    replay_parser.add_argument("--detect-mode", choices=DETECT_MODES, default="local",
+                               help="Source language detection mode")
+    replay_parser.add_argument("--memory-threshold", type=float, default=0,
+                               help="Translation memory similarity (0 disables)")
+    add_common_arguments(replay_parser)
+
+    coalesce_parser = subparsers.add_parser("coalesce", help="Single-flight coalescing of duplicate requests")
+    coalesce_parser.add_argument("--duplicates", type=int, default=3, help="Identical requests in flight at once")
+    coalesce_parser.add_argument("--iterations", type=int, default=3, help="Passes over the fixture set")
+    coalesce_parser.add_argument("--stt-delay", type=float, default=0.05,
+                                 help="Stub recognizer delay in seconds per second of audio")
+    coalesce_parser.add_argument("--translate-latency", type=float, default=0.05,
+                                 help="Fake translation server base latency in seconds")
+    coalesce_parser.add_argument("--translate-jitter", type=float, default=0.02,
+                                 help="Fake translation server uniform jitter in seconds")
+    coalesce_parser.add_argument("--duplicate-window", type=float, default=1.0,
+                                 help="Seconds within which an identical history row is skipped")
+    coalesce_parser.add_argument("--target", default="hi", help="Target language code")
+    add_common_arguments(coalesce_parser)
+
+    history_parser = subparsers.add_parser("history", help="Tk frame latency while the history table loads")
+    history_parser.add_argument("--rows", type=int, default=50000, help="Rows in the history table")
+    history_parser.add_argument("--chunk-size", type=int, default=200, help="Rows inserted into the view per frame")
+    history_parser.add_argument("--cancel-after", type=float, default=0.2,
+                                help="Seconds into the load when the cancellation scenario refreshes again")
+    history_parser.add_argument("--lock-seconds", type=float, default=2.0,
+                                help="How long another connection holds the database locked in the locked scenarios")
+    add_common_arguments(history_parser)
+
+    usage_parser = subparsers.add_parser("usage", help="Incrementally maintained usage statistics")
+    usage_parser.add_argument("--inserts", type=int, default=2000,
+                              help="Translations saved one transaction at a time, with and without the usage buckets")
+    usage_parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 400000],
+                              help="History table sizes to query")
+    usage_parser.add_argument("--history-days", type=int, default=365, help="Days the history rows are spread over")
+    usage_parser.add_argument("--days", type=int, default=30, help="Days covered by each statistics query")
+    usage_parser.add_argument("--queries", type=int, default=50, help="Statistics queries per table size")
+    add_common_arguments(usage_parser)
+
+    args = parser.parse_args(argv)
+    results = SUITES[args.suite](args)
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\nResults written to {args.output}")
+
+    if results.get("failures"):
+        print("\nFailed checks:")
+        for failure in results["failures"]:
+            print(f"  {failure}")
+        return 1
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,443 @@
+"""Streaming translation server for Voice Translator Pro
+
+Lets one translation host serve many thin clients. Clients stream raw PCM
+(16-bit little-endian mono) with an HTTP chunked upload; the server splits it
+into utterances with an energy-based voice activity detector, runs each one
+through the same recognize/detect/translate/persist pipeline as the desktop
+app, and streams the results back as newline-delimited JSON while the upload
+is still in progress.
+
+    POST /translate?target=hi&sample_rate=16000&session=booth-1
+        Transfer-Encoding: chunked
+        <raw PCM>
+
+    GET /health     JSON server statistics
+    GET /metrics    Prometheus text metrics
+
+Usage:
+    python translation_server.py --port 8765 --max-concurrent 8
+"""
+import argparse
+import array
+import asyncio
+import functools
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+
+import speech_recognition as sr
+
+from voice_translator import (CAPTURE_PROFILES, DETECT_MODES, LANGUAGES, ProcessOffload, SourceLanguageTracker,
+                              TranslationPipeline, migrate_history_schema, recognize_google_audio, trace)
+
+MAX_HEADER_BYTES = 16384
+
+
+class UtteranceSegmenter:
+    """Split a PCM stream into utterances using frame energy and trailing silence"""
+    def __init__(self, sample_rate=16000, sample_width=2, energy_threshold=300, pause_seconds=0.5,
+                 max_phrase_seconds=10.0, min_phrase_seconds=0.25, frame_seconds=0.03):
+        if sample_width != 2:
+            raise ValueError("Only 16-bit PCM is supported")
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.energy_threshold = energy_threshold
+        self.frame_bytes = int(sample_rate * frame_seconds) * sample_width
+        self.pause_frames = max(1, int(pause_seconds / frame_seconds))
+        self.max_frames = max(1, int(max_phrase_seconds / frame_seconds))
+        self.min_frames = max(1, int(min_phrase_seconds / frame_seconds))
+        self._buffer = bytearray()
+        self._frames = []
+        self._voiced = 0
+        self._silent_run = 0
+
+    def _energy(self, frame):
+        samples = array.array("h")
+        samples.frombytes(frame)
+        if sys.byteorder == "big":
+            samples.byteswap()
+        return (sum(sample * sample for sample in samples) / len(samples)) ** 0.5
+
+    def feed(self, data):
+        """Add PCM bytes and return any utterances (bytes) that are now complete"""
+        self._buffer += data
+        segments = []
+        while len(self._buffer) >= self.frame_bytes:
+            frame = bytes(self._buffer[:self.frame_bytes])
+            del self._buffer[:self.frame_bytes]
+            voiced = self._energy(frame) >= self.energy_threshold
+            if not self._frames and not voiced:
+                # Drop leading silence
+                continue
+            self._frames.append(frame)
+            if voiced:
+                self._voiced += 1
+                self._silent_run = 0
+            else:
+                self._silent_run += 1
+            if self._silent_run >= self.pause_frames or len(self._frames) >= self.max_frames:
+                segment = self._take()
+                if segment:
+                    segments.append(segment)
+        return segments
+
+    def flush(self):
+        """Return the utterance in progress at the end of the stream, if any"""
+        if self._buffer:
+            self._frames.append(bytes(self._buffer))
+            self._buffer.clear()
+        return self._take()
+
+    def _take(self):
+        frames = self._frames
+        voiced = self._voiced
+        # Trim trailing silence but keep a short tail so words are not clipped
+        if self._silent_run:
+            frames = frames[:len(frames) - max(0, self._silent_run - 3)]
+        self._frames = []
+        self._voiced = 0
+        self._silent_run = 0
+        if voiced < self.min_frames:
+            return None
+        return b"".join(frames)
+
+
+class TranslationServer:
+    """asyncio HTTP server streaming per-session translation results
+
+    `max_connections` caps concurrent client sessions (extra clients get 503),
+    `max_concurrent` caps utterances in the pipeline across all sessions, and
+    `per_connection` caps utterances in flight per session; a session at its
+    limit stops reading its upload, which pushes back on the client over TCP.
+    """
+    def __init__(self, pipeline, host="127.0.0.1", port=8765, max_connections=32, max_concurrent=8,
+                 per_connection=2, default_target="hi", segmenter_options=None):
+        self.pipeline = pipeline
+        self.host = host
+        self.port = port
+        self.max_connections = max_connections
+        self.max_concurrent = max_concurrent
+        self.per_connection = per_connection
+        self.default_target = default_target
+        self.segmenter_options = segmenter_options or {}
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="server-pipeline")
+        self.server = None
+        self.active_sessions = 0
+        self.stats = {"sessions": 0, "rejected": 0, "segments": 0, "errors": 0}
+        self._global_limit = None
+
+    async def start(self):
+        """Bind the listening socket"""
+        self._global_limit = asyncio.Semaphore(self.max_concurrent)
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                 limit=MAX_HEADER_BYTES * 4)
+        self.port = self.server.sockets[0].getsockname()[1]
+        trace.info("Translation server listening on http://%s:%s", self.host, self.port)
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=False)
+
+    # -- HTTP plumbing ---------------------------------------------------
+
+    async def _read_head(self, reader):
+        head = await reader.readuntil(b"\r\n\r\n")
+        if len(head) > MAX_HEADER_BYTES:
+            raise ValueError("Request headers too large")
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, _ = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        return method.upper(), target, headers
+
+    async def _body_chunks(self, reader, headers):
+        """Yield the request body as it arrives (chunked or Content-Length)"""
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            while True:
+                size_line = await reader.readline()
+                size = int(size_line.split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    # Skip optional trailers
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+                data = await reader.readexactly(size)
+                await reader.readexactly(2)
+                yield data
+        else:
+            remaining = int(headers.get("content-length", "0"))
+            while remaining > 0:
+                data = await reader.read(min(remaining, 65536))
+                if not data:
+                    return
+                remaining -= len(data)
+                yield data
+
+    @staticmethod
+    def _write_chunk(writer, data):
+        writer.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+
+    @staticmethod
+    async def _respond(writer, status, body, content_type="application/json"):
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                  503: "Service Unavailable"}.get(status, "OK")
+        payload = body.encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}; charset=utf-8\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode("ascii") + payload
+        )
+        await writer.drain()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            method, target, headers = await self._read_head(reader)
+            url = urlparse(target)
+            if url.path == "/health":
+                await self._respond(writer, 200, json.dumps(self.health()))
+            elif url.path == "/metrics":
+                await self._respond(writer, 200, self.pipeline.metrics.to_prometheus(), "text/plain")
+            elif url.path == "/translate":
+                if method != "POST":
+                    await self._respond(writer, 405, json.dumps({"error": "Use POST"}))
+                else:
+                    await self._handle_translate(reader, writer, parse_qs(url.query), headers)
+            else:
+                await self._respond(writer, 404, json.dumps({"error": "Not found"}))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            trace.error("Server request error: %s", e)
+            try:
+                await self._respond(writer, 400, json.dumps({"error": str(e)[:200]}))
+            except ConnectionError:
+                pass
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    # -- Translation sessions --------------------------------------------
+
+    def health(self):
+        return {
+            "active_sessions": self.active_sessions,
+            "max_connections": self.max_connections,
+            "max_concurrent": self.max_concurrent,
+            "per_connection": self.per_connection,
+            **self.stats,
+        }
+
+    async def _handle_translate(self, reader, writer, query, headers):
+        if self.active_sessions >= self.max_connections:
+            self.stats["rejected"] += 1
+            await self._respond(writer, 503, json.dumps({"error": "Too many sessions, try again later"}))
+            return
+
+        session = query.get("session", [uuid.uuid4().hex[:12]])[0]
+        target = query.get("target", [self.default_target])[0]
+        if target not in LANGUAGES:
+            await self._respond(writer, 400, json.dumps({"error": f"Unsupported target language: {target}"}))
+            return
+        sample_rate = int(query.get("sample_rate", ["16000"])[0])
+        sample_width = int(query.get("sample_width", ["2"])[0])
+        segmenter = UtteranceSegmenter(sample_rate, sample_width, **self.segmenter_options)
+        # Each client is one speaker, so the sticky source language is per session
+        tracker = SourceLanguageTracker()
+
+        self.active_sessions += 1
+        self.stats["sessions"] += 1
+        trace.debug("Session %s started (target %s)", session, target)
+        sender = None
+        # Segment tasks still running when the session ends must not keep holding the global limit
+        tasks = []
+        try:
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson; charset=utf-8\r\n"
+                b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n"
+            )
+            await writer.drain()
+
+            session_limit = asyncio.Semaphore(self.per_connection)
+            results = asyncio.Queue()
+            sender = asyncio.ensure_future(self._send_results(writer, results))
+            index = 0
+
+            async def submit(segment):
+                nonlocal index
+                # Stop reading the upload while this session is at its limit
+                await session_limit.acquire()
+                task = asyncio.ensure_future(
+                    self._process_segment(session, index, segment, sample_rate, sample_width, target, tracker,
+                                          session_limit)
+                )
+                tasks.append(task)
+                index += 1
+                await results.put(task)
+
+            async for data in self._body_chunks(reader, headers):
+                for segment in segmenter.feed(data):
+                    await submit(segment)
+            last = segmenter.flush()
+            if last:
+                await submit(last)
+            await results.put(None)
+            await sender
+
+            self._write_chunk(writer, (json.dumps({"session": session, "done": True, "segments": index}) + "\n")
+                              .encode("utf-8"))
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            raise
+        except Exception as e:
+            # The 200 header has gone out, so end the chunked body with an error line instead of
+            # writing a second response into it
+            trace.error("Session %s failed: %s", session, e)
+            # Nothing may be written after the error line and the terminating chunk
+            if sender is not None:
+                sender.cancel()
+            self._write_chunk(writer, (json.dumps({"session": session, "error": str(e)[:200]}) + "\n")
+                              .encode("utf-8"))
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            # Also reached when the client disconnects mid-upload (ConnectionError, IncompleteReadError)
+            if sender is not None:
+                sender.cancel()
+            for task in tasks:
+                task.cancel()
+            self.active_sessions -= 1
+            trace.debug("Session %s finished", session)
+
+    async def _process_segment(self, session, index, segment, sample_rate, sample_width, target, tracker,
+                               session_limit):
+        """Run one utterance through the pipeline under the global concurrency limit"""
+        received = time.perf_counter()
+        try:
+            async with self._global_limit:
+                audio = sr.AudioData(segment, sample_rate, sample_width)
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(
+                    self.executor, functools.partial(self.pipeline.process, audio, target, tracker=tracker)
+                )
+            self.stats["segments"] += 1
+            return {
+                "session": session,
+                "segment": index,
+                "source_text": result["source_text"],
+                "source_lang": result["source_lang"],
+                "translated_text": result["translated_text"],
+                "target_lang": result["target_lang"],
+                "used_fallback": result["used_fallback"],
+                "degraded": result["degraded"],
+                "latency_ms": (time.perf_counter() - received) * 1000,
+                "timings_ms": {stage: seconds * 1000 for stage, seconds in result["timings"].items()},
+            }
+        except sr.UnknownValueError:
+            return {"session": session, "segment": index, "error": "Could not understand audio"}
+        except Exception as e:
+            self.stats["errors"] += 1
+            trace.warning("Session %s segment %s failed: %s", session, index, e)
+            return {"session": session, "segment": index, "error": str(e)[:200]}
+        finally:
+            session_limit.release()
+
+    async def _send_results(self, writer, results):
+        """Stream results back in segment order as each one completes"""
+        while True:
+            task = await results.get()
+            if task is None:
+                return
+            message = await task
+            self._write_chunk(writer, (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+            await writer.drain()
+
+
+def default_db_path():
+    """History database next to this script, matching the desktop app"""
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+    os.makedirs(data_dir, exist_ok=True)
+    return os.path.join(data_dir, "translation_history.db")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Voice Translator Pro streaming translation server")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--max-connections", type=int, default=32, help="Concurrent client sessions")
+    parser.add_argument("--max-concurrent", type=int, default=8, help="Utterances processed at once overall")
+    parser.add_argument("--per-connection", type=int, default=2, help="Utterances in flight per session")
+    parser.add_argument("--target", default="hi", help="Default target language code")
+    parser.add_argument("--detect-mode", choices=DETECT_MODES, default="local",
+                        help="Source language detection: every utterance, sticky per session, or by the backend")
+    parser.add_argument("--db", default=None, help="History database path (default: data/translation_history.db)")
+    parser.add_argument("--phrases", default=None,
+                        help="Folder of <src>-<dest>.tsv phrase tables (default: data/phrases)")
+    parser.add_argument("--memory-threshold", type=float, default=0.85,
+                        help="Similarity needed to reuse a translation from history (0 disables)")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="Worker processes for recognition and detection (0 runs them in threads)")
+    parser.add_argument("--energy-threshold", type=float, default=300, help="Voice activity RMS threshold")
+    parser.add_argument("--pause", type=float, default=0.5, help="Seconds of silence that end an utterance")
+    parser.add_argument("--profile", choices=list(CAPTURE_PROFILES), default=None,
+                        help="Speech profile setting the pause and longest utterance (overrides --pause)")
+    args = parser.parse_args(argv)
+
+    segmenter_options = {"energy_threshold": args.energy_threshold, "pause_seconds": args.pause}
+    if args.profile:
+        profile = CAPTURE_PROFILES[args.profile]
+        segmenter_options.update(pause_seconds=profile["pause_threshold"],
+                                 max_phrase_seconds=profile["phrase_time_limit"])
+
+    db_path = args.db or default_db_path()
+    conn = sqlite3.connect(db_path)
+    migrate_history_schema(conn)
+    conn.close()
+
+    server = TranslationServer(
+        TranslationPipeline(
+            db_path=db_path,
+            detect_mode=args.detect_mode,
+            phrase_dir=args.phrases or os.path.join(os.path.dirname(db_path), "phrases"),
+            memory_threshold=args.memory_threshold or None,
+            offload=ProcessOffload(args.processes, recognize_function=recognize_google_audio) if args.processes else None
+        ),
+        host=args.host,
+        port=args.port,
+        max_connections=args.max_connections,
+        max_concurrent=args.max_concurrent,
+        per_connection=args.per_connection,
+        default_target=args.target,
+        segmenter_options=segmenter_options,
+    )
+    # Index existing history for the translation memory while the server starts accepting clients
+    threading.Thread(target=server.pipeline.translation_memory.sync, daemon=True, name="memory-sync").start()
+    if server.pipeline.offload is not None:
+        server.pipeline.offload.warm()
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,10 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, font
+from tkinter import ttk, messagebox, font, filedialog
 import speech_recognition as sr
 from googletrans import Translator, LANGUAGES
 from langdetect import detect
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
 import pyaudio  # Required by speech_recognition, suppress unused import warning # noqa
 import threading
 import time
@@ -12,6 +12,22 @@ import os
 import sys
 import asyncio  # For handling async operations correctly
 import httpx  # Underlying library for googletrans
+import bisect
+import collections
+import itertools
+import json
+import concurrent.futures
+import contextlib
+import hashlib
+import importlib.util
+import http.server
+import mmap
+import multiprocessing
+from multiprocessing import shared_memory
+import queue
+import re
+import unicodedata
+import wave
 
 # Selected 30 languages for better user experience
 LANGUAGES = {
@@ -47,6 +63,3156 @@ LANGUAGES = {
     'ur': 'Urdu'
 }
 
+# Endpoint used by the direct HTTP fallback translation
+TRANSLATE_API_URL = "https://translate.googleapis.com/translate_a/single"
+
+# Alternate endpoint with the same response format, used for hedged requests
+ALTERNATE_TRANSLATE_API_URL = "https://translate.google.com/translate_a/single"
+
+# Simple dictionary of common translations answered without any network call
+COMMON_PHRASES = {
+    "hello": {"hi": "नमस्ते", "es": "hola", "fr": "bonjour", "de": "hallo"},
+    "how are you": {"hi": "आप कैसे हैं", "es": "cómo estás", "fr": "comment allez-vous", "de": "wie geht es dir"},
+    "thank you": {"hi": "धन्यवाद", "es": "gracias", "fr": "merci", "de": "danke"},
+    "goodbye": {"hi": "अलविदा", "es": "adiós", "fr": "au revoir", "de": "auf wiedersehen"},
+    "yes": {"hi": "हां", "es": "sí", "fr": "oui", "de": "ja"},
+    "no": {"hi": "नहीं", "es": "no", "fr": "non", "de": "nein"}
+}
+
+HISTORY_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT,
+        source_text TEXT,
+        source_lang TEXT,
+        translated_text TEXT,
+        target_lang TEXT
+    )
+"""
+
+# Hourly totals per language pair ("hour" is the timestamp cut to "YYYY-MM-DD HH"), kept in step with history
+USAGE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS usage_hourly (
+        hour TEXT NOT NULL,
+        source_lang TEXT NOT NULL,
+        target_lang TEXT NOT NULL,
+        translations INTEGER NOT NULL DEFAULT 0,
+        source_chars INTEGER NOT NULL DEFAULT 0,
+        translated_chars INTEGER NOT NULL DEFAULT 0,
+        failures INTEGER NOT NULL DEFAULT 0,
+        fallbacks INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (hour, source_lang, target_lang)
+    )
+"""
+
+# Stored in PRAGMA user_version; migrate_history_schema upgrades older databases
+HISTORY_SCHEMA_VERSION = 2
+
+TRACE_LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40, "off": 100}
+
+def _trace_disabled(message, *args):
+    """Stand-in bound to disabled trace levels so they cost a single call"""
+
+class TracePoint:
+    """Records 1 out of every `every` events sent to it, for trace points on very hot paths"""
+    def __init__(self, tracer, every):
+        self.tracer = tracer
+        self.every = max(1, int(every))
+        self.seen = 0
+
+    def _sampled(self):
+        self.seen += 1
+        return (self.seen - 1) % self.every == 0
+
+    def debug(self, message, *args):
+        if self.tracer.threshold <= 10 and self._sampled():
+            self.tracer.record(10, message, args)
+
+    def info(self, message, *args):
+        if self.tracer.threshold <= 20 and self._sampled():
+            self.tracer.record(20, message, args)
+
+class Tracer:
+    """Leveled tracing with lazy %-formatting and an in-memory ring buffer
+
+    Events below the active level are bound to a no-op, so disabled trace points
+    never format their arguments. Recorded events keep the raw message and args
+    and are only formatted when echoed to a console or dumped.
+    """
+    def __init__(self, level="info", capacity=2000, echo=None, dump_dir=None):
+        self.buffer = collections.deque(maxlen=capacity)
+        # Windowed PyInstaller builds have no stdout, so there is nothing to echo to
+        self.echo = (sys.stdout is not None) if echo is None else echo
+        self.dump_dir = dump_dir
+        self.dump_interval = 60.0
+        self._last_dump = None
+        self._dump_lock = threading.Lock()
+        self.set_level(level)
+
+    def set_level(self, level):
+        """Enable events at `level` and above and rebind the per-level methods"""
+        self.level = level
+        self.threshold = TRACE_LEVELS[level]
+        for name, value in TRACE_LEVELS.items():
+            if name == "off":
+                continue
+            if value >= self.threshold:
+                setattr(self, name, self._make_emitter(value))
+            else:
+                setattr(self, name, _trace_disabled)
+
+    def _make_emitter(self, level_value):
+        record = self.record
+
+        def emit(message, *args):
+            record(level_value, message, args)
+        return emit
+
+    def enabled(self, level):
+        """True if events at `level` are recorded (use to guard expensive argument building)"""
+        return TRACE_LEVELS[level] >= self.threshold
+
+    def sampled(self, every):
+        """Trace point that records only one in `every` events"""
+        return TracePoint(self, every)
+
+    def record(self, level_value, message, args):
+        """Append an event to the ring buffer, echo it, and dump the buffer on errors"""
+        event = (time.time(), level_value, threading.current_thread().name, message, args)
+        self.buffer.append(event)
+        if self.echo:
+            try:
+                print(self.format_event(event))
+            except Exception:
+                # A closed or missing console must never break the caller
+                self.echo = False
+        if level_value >= TRACE_LEVELS["error"] and self.dump_dir:
+            self.dump_on_error()
+
+    @staticmethod
+    def format_event(event):
+        """Render a recorded event as a single log line"""
+        timestamp, level_value, thread_name, message, args = event
+        level_name = next(name for name, value in TRACE_LEVELS.items() if value == level_value)
+        if args:
+            try:
+                message = message % args
+            except (TypeError, ValueError):
+                message = f"{message} {args!r}"
+        stamp = datetime.fromtimestamp(timestamp).strftime("%H:%M:%S.%f")[:-3]
+        return f"{stamp} {level_name.upper():<7} [{thread_name}] {message}"
+
+    def dump(self, path=None):
+        """Write the ring buffer to path (or a timestamped file in dump_dir, or stderr)"""
+        events = list(self.buffer)
+        if path is None and self.dump_dir:
+            name = datetime.now().strftime("trace-%Y%m%d-%H%M%S.log")
+            path = os.path.join(self.dump_dir, name)
+        lines = [self.format_event(event) for event in events]
+        if path is None:
+            if sys.stderr is not None:
+                sys.stderr.write("\n".join(lines) + "\n")
+            return None
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+    def dump_on_error(self):
+        """Dump the buffer after an error, at most once per dump_interval seconds"""
+        with self._dump_lock:
+            now = time.monotonic()
+            if self._last_dump is not None and now - self._last_dump < self.dump_interval:
+                return
+            self._last_dump = now
+        try:
+            self.dump()
+        except OSError:
+            pass
+
+# Shared tracer; set VOICE_TRANSLATOR_TRACE to debug/info/warning/error/off
+_trace_level = os.environ.get("VOICE_TRANSLATOR_TRACE", "info").lower()
+trace = Tracer(level=_trace_level if _trace_level in TRACE_LEVELS else "info")
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram in seconds, cheap enough to update on every stage"""
+    # Log-spaced upper bounds from 0.5 ms to ~55 s (25% apart); the implicit last bucket is +Inf
+    BUCKETS = tuple(float(f"{0.0005 * 1.25 ** i:.3g}") for i in range(53))
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        """Record one duration (caller holds the owning lock)"""
+        self.counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Estimate the q-quantile (0-1) by interpolating inside the matching bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for index, bucket_count in enumerate(self.counts):
+            upper = self.BUCKETS[index] if index < len(self.BUCKETS) else self.max
+            if bucket_count and seen + bucket_count >= rank:
+                fraction = (rank - seen) / bucket_count
+                return min(lower + (upper - lower) * fraction, self.max)
+            seen += bucket_count
+            lower = upper
+        return self.max
+
+class PipelineMetrics:
+    """Thread-safe per-stage latency histograms and event counters"""
+    STAGES = ("listen", "recognize", "detect", "translate", "fallback", "db_write", "total")
+    COUNTERS = ("utterances", "fallbacks", "errors", "cache_hits", "hedged_requests", "deadline_exceeded",
+                "breaker_skips", "dropped_phrases", "segmented_utterances", "segment_retries",
+                "detections_skipped", "memory_hits", "speech_cache_hits", "coalesced_recognitions",
+                "coalesced_detections", "coalesced_translations", "duplicate_saves")
+    BUCKET_LABELS = tuple(f"{bound:g}" for bound in LatencyHistogram.BUCKETS) + ("+Inf",)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {stage: LatencyHistogram() for stage in self.STAGES}
+        self.counters = {name: 0 for name in self.COUNTERS}
+
+    def observe(self, stage, seconds):
+        """Record a stage duration measured with a monotonic clock"""
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def increment(self, name, amount=1):
+        """Increase a named counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextlib.contextmanager
+    def time_stage(self, stage):
+        """Context manager that observes the duration of the enclosed block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def quantile(self, stage, q, min_samples=1):
+        """Estimated q-quantile of a stage in seconds, or None with fewer than min_samples"""
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None or histogram.count < min_samples:
+                return None
+            return histogram.quantile(q)
+
+    def reset(self):
+        """Discard all recorded samples and counts"""
+        with self._lock:
+            self.histograms = {stage: LatencyHistogram() for stage in self.STAGES}
+            self.counters = {name: 0 for name in self.COUNTERS}
+
+    def snapshot(self):
+        """Return a plain dict of stage statistics (milliseconds) and counters"""
+        with self._lock:
+            stages = {}
+            for stage, histogram in self.histograms.items():
+                stages[stage] = {
+                    "count": histogram.count,
+                    "mean_ms": (histogram.sum / histogram.count * 1000) if histogram.count else 0.0,
+                    "p50_ms": histogram.quantile(0.50) * 1000,
+                    "p95_ms": histogram.quantile(0.95) * 1000,
+                    "p99_ms": histogram.quantile(0.99) * 1000,
+                    "max_ms": histogram.max * 1000,
+                }
+            return {"stages": stages, "counters": dict(self.counters)}
+
+    def to_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP voice_translator_stage_seconds Time spent in each pipeline stage",
+            "# TYPE voice_translator_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, histogram in self.histograms.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.BUCKET_LABELS, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'voice_translator_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'voice_translator_stage_seconds_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'voice_translator_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+            for name, value in self.counters.items():
+                lines.append(f"# TYPE voice_translator_{name}_total counter")
+                lines.append(f"voice_translator_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+class MetricsExporter:
+    """Serve PipelineMetrics in Prometheus text format on a local HTTP endpoint"""
+    def __init__(self, metrics, host="127.0.0.1", port=9464):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def start(self):
+        """Bind the endpoint and serve it from a daemon thread"""
+        metrics = self.metrics
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = http.server.ThreadingHTTPServer((self.host, self.port), Handler)
+        self.httpd.daemon_threads = True
+        # Pick up the real port when 0 was requested
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        trace.info("Metrics endpoint listening on %s", self.url)
+
+    def stop(self):
+        """Shut the endpoint down if it is running"""
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+class TranslationTimeout(Exception):
+    """Raised when no translation backend answers before the utterance deadline"""
+
+class Deadline:
+    """Absolute point in monotonic time by which an utterance should be finished"""
+    def __init__(self, budget, clock=time.monotonic):
+        self.clock = clock
+        self.budget = budget
+        self.expires_at = clock() + budget
+
+    def remaining(self):
+        """Seconds left before the deadline, never negative"""
+        return max(0.0, self.expires_at - self.clock())
+
+    def expired(self):
+        return self.clock() >= self.expires_at
+
+class CircuitBreaker:
+    """Skip a failing backend for a cool-down period after repeated failures
+
+    After `cooldown` seconds a single trial call is allowed through (half-open);
+    its success closes the breaker and its failure re-opens it.
+    """
+    def __init__(self, failure_threshold=3, cooldown=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if self.clock() - self.opened_at >= self.cooldown:
+                return "half_open"
+            return "open"
+
+    def allow(self):
+        """True if a call may be made now"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.clock() - self.opened_at >= self.cooldown and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            # A failed half-open trial re-opens immediately
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = self.clock()
+            self._trial_in_flight = False
+
+class HedgedTranslator:
+    """Race translation backends against a deadline
+
+    The first available backend is called immediately. If it has not answered
+    after its observed `hedge_quantile` latency, the next backend is called as
+    well and whichever succeeds first wins. Failures move straight on to the
+    next backend, and each backend sits behind its own circuit breaker.
+    """
+    def __init__(self, backends, metrics, hedge_quantile=0.95, min_hedge_delay=0.05, max_hedge_delay=2.0,
+                 default_hedge_delay=1.0, min_samples=20, failure_threshold=3, cooldown=30.0,
+                 clock=time.monotonic, max_workers=16):
+        self.backends = list(backends)
+        self.primary = self.backends[0][0] if self.backends else None
+        self.metrics = metrics
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.default_hedge_delay = default_hedge_delay
+        self.min_samples = min_samples
+        self.clock = clock
+        self.breakers = {
+            name: CircuitBreaker(failure_threshold=failure_threshold, cooldown=cooldown, clock=clock)
+            for name, _ in self.backends
+        }
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                                              thread_name_prefix="translate")
+
+    def hedge_delay(self, name):
+        """Delay before hedging a request to `name`, from its observed latency percentile"""
+        delay = self.metrics.quantile(f"backend_{name}", self.hedge_quantile, self.min_samples)
+        if delay is None:
+            delay = self.default_hedge_delay
+        return min(max(delay, self.min_hedge_delay), self.max_hedge_delay)
+
+    def _call(self, name, backend, text, src, dest, deadline):
+        """Run one backend call, feeding its latency and outcome to metrics and its breaker"""
+        started = time.perf_counter()
+        try:
+            result = backend(text, src, dest, max(deadline.remaining(), 0.01))
+        except Exception:
+            self.breakers[name].record_failure()
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.metrics.observe(f"backend_{name}", elapsed)
+            if name != self.primary:
+                self.metrics.observe("fallback", elapsed)
+        # An answer that arrives after the deadline still counts against the backend
+        if deadline.expired():
+            self.breakers[name].record_failure()
+        else:
+            self.breakers[name].record_success()
+        return result
+
+    def translate(self, text, src, dest, deadline):
+        """Return (translated_text, used_fallback, detected_lang) from the first backend to succeed"""
+        pending_backends = list(self.backends)
+        pending = {}
+        last_error = None
+
+        def launch():
+            """Call the next backend whose breaker lets it through; returns its name and hedge time, or None"""
+            # Breakers are asked only when a backend is about to be called: allow() claims the
+            # half-open trial, and only a call that actually runs can release it again
+            while pending_backends:
+                name, backend = pending_backends.pop(0)
+                if not self.breakers[name].allow():
+                    self.metrics.increment("breaker_skips")
+                    trace.debug("Circuit open, skipping translation backend %s", name)
+                    continue
+                future = self.executor.submit(self._call, name, backend, text, src, dest, deadline)
+                pending[future] = name
+                # Hedge no later than halfway to the deadline so the next backend has time to answer
+                return name, self.clock() + min(self.hedge_delay(name), deadline.remaining() / 2)
+            return None
+
+        launched = launch()
+        if launched is None:
+            raise RuntimeError("All translation backends are cooling down after failures")
+        hedge_at = launched[1]
+        while pending:
+            remaining = deadline.remaining()
+            if remaining <= 0:
+                # Calls still running record their own failure with the breaker when they finish late
+                raise TranslationTimeout(f"no backend answered within {deadline.budget:.1f}s "
+                                         f"(waiting on {', '.join(pending.values())})")
+            wait_for = min(remaining, max(0.0, hedge_at - self.clock())) if pending_backends else remaining
+            done, _ = concurrent.futures.wait(pending, timeout=wait_for,
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            failed = False
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    translated_text, detected_lang = future.result()
+                except Exception as e:
+                    trace.warning("Translation backend %s failed: %s", name, e)
+                    last_error = e
+                    failed = True
+                    continue
+                used_fallback = name != self.primary
+                if used_fallback:
+                    self.metrics.increment("fallbacks")
+                return translated_text, used_fallback, detected_lang
+            if pending_backends and (failed or not pending or self.clock() >= hedge_at):
+                hedging = pending and not failed
+                launched = launch()
+                if launched is not None:
+                    if hedging:
+                        self.metrics.increment("hedged_requests")
+                        trace.debug("Hedging translation to %s", launched[0])
+                    hedge_at = launched[1]
+        raise last_error or RuntimeError("No translation backend available")
+
+    def shutdown(self):
+        """Stop accepting work; calls already running finish in the background"""
+        self.executor.shutdown(wait=False)
+
+# Sentence and clause boundaries used to split long recognized text before translation
+SENTENCE_TERMINATORS = {
+    "default": ".!?",
+    "hi": "।.!?", "bn": "।.!?", "ne": "।.!?", "pa": "।.!?",
+    "zh-cn": "。！？.!?", "ja": "。！？.!?",
+    "ar": "؟.!?", "fa": "؟.!?", "ur": "۔؟.!?",
+    "el": ".!;",
+}
+CLAUSE_SEPARATORS = {
+    "default": ",;:",
+    "zh-cn": "，、；：,;:", "ja": "、，；：,;:",
+    "ar": "،؛,;:", "fa": "،؛,;:", "ur": "،؛,;:",
+    "el": ",·:",
+}
+# Languages written without spaces between words
+UNSPACED_LANGUAGES = ("zh-cn", "ja", "th")
+# Splitting rules to use for text whose language is not known ("auto"), by its dominant script
+SCRIPT_SEGMENTATION_LANGUAGES = {
+    "DEVANAGARI": "hi", "BENGALI": "bn", "GURMUKHI": "pa",
+    "CJK": "zh-cn", "HIRAGANA": "ja", "KATAKANA": "ja", "THAI": "th",
+    "ARABIC": "ar", "GREEK": "el",
+}
+# Abbreviations whose trailing period does not end a sentence
+ABBREVIATIONS = {
+    "en": {"mr", "mrs", "ms", "dr", "st", "vs", "etc", "e.g", "i.e", "no", "jr", "sr"},
+    "de": {"z.b", "usw", "bzw", "dr", "nr", "ca"},
+    "fr": {"m", "mme", "dr", "etc", "p.ex"},
+    "es": {"sr", "sra", "srta", "dr", "etc", "ud", "uds"},
+}
+
+def _split_on(text, separators, lang):
+    """Split text after any of the separator characters, keeping them attached"""
+    pieces = []
+    start = 0
+    abbreviations = ABBREVIATIONS.get(lang, ())
+    for index, char in enumerate(text):
+        if char not in separators:
+            continue
+        following = text[index + 1:index + 2]
+        # Decimal numbers and abbreviations do not end a sentence
+        if char in ".," and following and not following.isspace():
+            continue
+        if char == "." and text[start:index].split()[-1:] and \
+                text[start:index].split()[-1].lower() in abbreviations:
+            continue
+        piece = text[start:index + 1].strip()
+        if piece:
+            pieces.append(piece)
+        start = index + 1
+    tail = text[start:].strip()
+    if tail:
+        pieces.append(tail)
+    return pieces
+
+def _split_by_length(text, max_chars, lang):
+    """Cut unpunctuated text into chunks of at most max_chars at word boundaries where possible"""
+    if lang in UNSPACED_LANGUAGES and " " not in text.strip():
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+    chunks = []
+    current = []
+    length = 0
+    for word in text.split():
+        if current and length + 1 + len(word) > max_chars:
+            chunks.append(" ".join(current))
+            current = []
+            length = 0
+        current.append(word)
+        length += len(word) + (1 if length else 0)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+def split_sentences(text, lang=None, max_chars=200):
+    """Split text into sentences, then clauses, then length-limited chunks of at most max_chars
+
+    Speech recognition output often has no punctuation at all, so the length
+    fallback is what usually applies to long phrases. Without a language (or
+    with "auto") the rules are chosen from the script the text is written in.
+    """
+    text = text.strip()
+    if not text:
+        return []
+    if not max_chars or len(text) <= max_chars:
+        return [text]
+    if lang in (None, "auto"):
+        lang = SCRIPT_SEGMENTATION_LANGUAGES.get(dominant_script(text), lang)
+    segments = []
+    terminators = SENTENCE_TERMINATORS.get(lang, SENTENCE_TERMINATORS["default"])
+    separators = CLAUSE_SEPARATORS.get(lang, CLAUSE_SEPARATORS["default"])
+    for sentence in _split_on(text, terminators, lang):
+        if len(sentence) <= max_chars:
+            segments.append(sentence)
+            continue
+        for clause in _split_on(sentence, separators, lang):
+            if len(clause) <= max_chars:
+                segments.append(clause)
+            else:
+                segments.extend(_split_by_length(clause, max_chars, lang))
+    return segments
+
+# Words (with inner apostrophes) used to match phrase table entries in spaced languages
+PHRASE_WORD_PATTERN = re.compile(r"\w+(?:['’]\w+)*")
+
+class PhraseTrie:
+    """Phrase translations for one language pair compiled into a token trie
+
+    Edges live in one flat dict keyed by an integer packing the parent node
+    and the token id, which is several times smaller than a dict per node and
+    keeps a 100k-entry table in tens of megabytes.
+    """
+    TOKEN_BITS = 24
+
+    def __init__(self, unspaced=False):
+        self.unspaced = unspaced
+        self._vocab = {}
+        self._edges = {}
+        self._values = {}
+        self.nodes = 1
+        self.entries = 0
+
+    def tokenize(self, text):
+        """(normalized, original) tokens; single characters for unspaced scripts"""
+        if self.unspaced:
+            return [(char.casefold(), char) for char in text if char.isalnum()]
+        return [(match.group().casefold(), match.group()) for match in PHRASE_WORD_PATTERN.finditer(text)]
+
+    def add(self, phrase, translation):
+        tokens = self.tokenize(phrase)
+        if not tokens:
+            return
+        node = 0
+        for token, _ in tokens:
+            token_id = self._vocab.get(token)
+            if token_id is None:
+                token_id = self._vocab[sys.intern(token)] = len(self._vocab) + 1
+            key = node << self.TOKEN_BITS | token_id
+            child = self._edges.get(key)
+            if child is None:
+                child = self._edges[key] = self.nodes
+                self.nodes += 1
+            node = child
+        if node not in self._values:
+            self.entries += 1
+        self._values[node] = translation
+
+    def longest_match(self, tokens, start):
+        """(end, translation) of the longest entry starting at tokens[start], or None"""
+        node = 0
+        best = None
+        for index in range(start, len(tokens)):
+            token_id = self._vocab.get(tokens[index][0])
+            if token_id is None:
+                break
+            node = self._edges.get(node << self.TOKEN_BITS | token_id)
+            if node is None:
+                break
+            translation = self._values.get(node)
+            if translation is not None:
+                best = (index + 1, translation)
+        return best
+
+    def translate(self, text):
+        """Greedy longest-match translation: (pieces, matched_tokens, total_tokens)"""
+        tokens = self.tokenize(text)
+        pieces = []
+        matched = 0
+        index = 0
+        while index < len(tokens):
+            match = self.longest_match(tokens, index)
+            if match:
+                end, translation = match
+                pieces.append(translation)
+                matched += end - index
+                index = end
+            else:
+                pieces.append(tokens[index][1])
+                index += 1
+        return pieces, matched, len(tokens)
+
+    def memory_bytes(self):
+        """Approximate memory held by the trie's containers, keys and values"""
+        seen = set()
+        total = 0
+        for obj in itertools.chain((self._vocab, self._edges, self._values), self._vocab, self._vocab.values(),
+                                   self._edges, self._edges.values(), self._values, self._values.values()):
+            if id(obj) not in seen:
+                seen.add(id(obj))
+                total += sys.getsizeof(obj)
+        return total
+
+class PhraseTable:
+    """Offline phrase translations loaded from <src>-<dest>.tsv files, reloaded when they change
+
+    Each line of a file is `source phrase<TAB>translation`; blank lines and
+    lines starting with # are ignored. COMMON_PHRASES are built in as English
+    entries that the files can override. Changed files are recompiled on a
+    background thread and swapped in, so lookups never wait for a reload.
+    """
+    FILE_PATTERN = re.compile(r"^([a-z]{2}(?:-[a-z]{2})?)-([a-z]{2}(?:-[a-z]{2})?)\.tsv$")
+
+    def __init__(self, directory=None, defaults=COMMON_PHRASES, reload_interval=2.0, clock=time.monotonic):
+        self.directory = directory
+        self.defaults = defaults
+        self.reload_interval = reload_interval
+        self.clock = clock
+        self.tries = {}
+        self.memory = {}
+        self._mtimes = None
+        self._last_check = None
+        self._reloading = False
+        self._lock = threading.Lock()
+        self.reload()
+
+    def _scan(self):
+        """Map (src, dest) to (path, mtime) for every table file in the directory"""
+        files = {}
+        if self.directory and os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                match = self.FILE_PATTERN.match(name)
+                if match:
+                    path = os.path.join(self.directory, name)
+                    try:
+                        files[match.groups()] = (path, os.stat(path).st_mtime_ns)
+                    except OSError:
+                        continue
+        return files
+
+    def _build(self, src, dest, path=None):
+        trie = PhraseTrie(unspaced=src in UNSPACED_LANGUAGES)
+        if src == "en":
+            for phrase, translations in self.defaults.items():
+                if dest in translations:
+                    trie.add(phrase, translations[dest])
+        if path:
+            with open(path, encoding="utf-8") as f:
+                for line_number, line in enumerate(f, 1):
+                    line = line.rstrip("\n")
+                    if not line.strip() or line.startswith("#"):
+                        continue
+                    phrase, separator, translation = line.partition("\t")
+                    if not separator or not translation.strip():
+                        trace.warning("Skipping malformed phrase table line %s:%d", path, line_number)
+                        continue
+                    trie.add(phrase, translation.strip())
+        return trie
+
+    def reload(self):
+        """Recompile tables whose files were added, changed or removed"""
+        files = self._scan()
+        with self._lock:
+            previous = self._mtimes or {}
+        tries = dict(self.tries)
+        memory = dict(self.memory)
+        pairs = set(files) | set(previous) | {("en", dest) for translations in self.defaults.values()
+                                              for dest in translations}
+        for pair in pairs:
+            current = files.get(pair)
+            if self._mtimes is not None and pair in tries and current == previous.get(pair):
+                continue
+            try:
+                started = time.perf_counter()
+                trie = self._build(pair[0], pair[1], current[0] if current else None)
+            except (OSError, UnicodeDecodeError) as e:
+                trace.warning("Could not load phrase table %s-%s: %s", pair[0], pair[1], e)
+                continue
+            if trie.entries:
+                tries[pair] = trie
+                memory[pair] = trie.memory_bytes()
+                if current:
+                    trace.info("Loaded %d phrases for %s-%s in %.0f ms", trie.entries, pair[0], pair[1],
+                               (time.perf_counter() - started) * 1000)
+            else:
+                tries.pop(pair, None)
+                memory.pop(pair, None)
+        with self._lock:
+            self.tries = tries
+            self.memory = memory
+            self._mtimes = files
+            self._reloading = False
+
+    def _maybe_reload(self):
+        now = self.clock()
+        with self._lock:
+            if self._reloading or (self._last_check is not None and now - self._last_check < self.reload_interval):
+                return
+            self._last_check = now
+        if self._scan() != self._mtimes:
+            with self._lock:
+                self._reloading = True
+            threading.Thread(target=self.reload, daemon=True, name="phrase-reload").start()
+
+    def lookup(self, text, src, dest):
+        """Return (translation, src, fully_matched) for the best table match, or (None, None, False)
+
+        A partial match translates the phrases it found and keeps the remaining
+        words as they were. The table for src is tried first, then every other
+        table into dest, since detection is unreliable on very short phrases.
+        """
+        self._maybe_reload()
+        tries = self.tries
+        candidates = [(pair[0], trie) for pair, trie in tries.items() if pair[1] == dest]
+        candidates.sort(key=lambda candidate: candidate[0] != src)
+        joiner = "" if dest in UNSPACED_LANGUAGES else " "
+        best = (None, None, False)
+        best_matched = 0
+        for table_src, trie in candidates:
+            pieces, matched, total = trie.translate(text)
+            if total and matched == total:
+                return joiner.join(pieces), table_src, True
+            if matched > best_matched:
+                best = (joiner.join(pieces), table_src, False)
+                best_matched = matched
+        return best
+
+    def memory_report(self):
+        """Entries, trie nodes and approximate bytes per language pair"""
+        tries = self.tries
+        pairs = {
+            f"{src}-{dest}": {"entries": trie.entries, "nodes": trie.nodes, "bytes": self.memory.get((src, dest), 0)}
+            for (src, dest), trie in sorted(tries.items())
+        }
+        return {
+            "pairs": pairs,
+            "entries": sum(pair["entries"] for pair in pairs.values()),
+            "bytes": sum(pair["bytes"] for pair in pairs.values()),
+        }
+
+# Messages stored in place of a translation when every backend failed; never reused from history
+FAILED_TRANSLATION_PREFIXES = ("Translation unavailable for", "Translation timed out for", "Translation failed:")
+
+class TranslationMemory:
+    """Fuzzy index of earlier translations in the history table
+
+    Source texts are reduced to one-permutation MinHash signatures over
+    character trigrams and split into LSH bands, so a lookup only compares
+    against rows sharing a band and then checks their actual trigram
+    similarity. The index holds band keys and row ids; texts stay in SQLite.
+    Rows are keyed by language pair, so a near-identical text in another
+    source language is never reused.
+    """
+    NGRAM = 3
+
+    def __init__(self, db_path=None, threshold=0.85, bins=16, bands=4, max_candidates=16, max_bucket=64):
+        if bins % bands:
+            raise ValueError("bins must be a multiple of bands")
+        self.db_path = db_path
+        # Minimum trigram Jaccard similarity for a reused translation (None disables lookups)
+        self.threshold = threshold
+        self.bins = bins
+        self.bands = bands
+        self.rows_per_band = bins // bands
+        self.max_candidates = max_candidates
+        self.max_bucket = max_bucket
+        self.entries = 0
+        self.last_row_id = 0
+        self._buckets = [{} for _ in range(bands)]
+        # Source languages with indexed rows, probed when the source language is not known
+        self._source_langs = set()
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._sync_pending = False
+
+    @classmethod
+    def shingles(cls, text):
+        """Set of character trigrams of text with case and punctuation removed"""
+        words = PHRASE_WORD_PATTERN.findall(text.casefold())
+        if not words:
+            return set()
+        normalized = " " + " ".join(words) + " "
+        return {normalized[i:i + cls.NGRAM] for i in range(len(normalized) - cls.NGRAM + 1)}
+
+    @staticmethod
+    def similarity(first, second):
+        """Jaccard similarity of two shingle sets"""
+        if not first or not second:
+            return 0.0
+        return len(first & second) / len(first | second)
+
+    def signature(self, shingles):
+        """One-permutation MinHash: the smallest shingle hash falling in each of `bins` hash classes"""
+        bins = self.bins
+        # str hashes are salted per process, which is fine for an index rebuilt at startup;
+        # with the hashes sorted in descending order the last one stored per class is its minimum
+        smallest = {value % bins: value for value in sorted(map(hash, shingles), reverse=True)}
+        if len(smallest) == bins:
+            return [smallest[index] for index in range(bins)]
+        # Short texts leave classes empty; each borrows the next filled one so similar texts still agree
+        mins = []
+        for index in range(bins):
+            step = 0
+            while (index + step) % bins not in smallest:
+                step += 1
+            mins.append(smallest[(index + step) % bins] + (step << 64))
+        return mins
+
+    def _band_keys(self, signature, source_lang, target_lang):
+        rows = self.rows_per_band
+        return [hash((source_lang, target_lang, *signature[start:start + rows]))
+                for start in range(0, self.bins, rows)]
+
+    def add(self, row_id, source_text, source_lang, target_lang, translated_text, degraded=False):
+        """Index one history row; returns False for rows that must not be reused
+
+        Failed translations and degraded ones (offline phrase table, segments
+        left untranslated) are skipped so a later request tries the backends again.
+        """
+        if not source_text or not translated_text or translated_text.startswith(FAILED_TRANSLATION_PREFIXES):
+            return False
+        if degraded:
+            return False
+        shingles = self.shingles(source_text)
+        if not shingles:
+            return False
+        keys = self._band_keys(self.signature(shingles), source_lang, target_lang)
+        with self._lock:
+            self._source_langs.add(source_lang)
+            for buckets, key in zip(self._buckets, keys):
+                current = buckets.get(key)
+                if current is None:
+                    buckets[key] = row_id
+                elif isinstance(current, list):
+                    if len(current) >= self.max_bucket:
+                        # A phrase said over and over keeps only its most recent rows
+                        del current[0]
+                    current.append(row_id)
+                else:
+                    buckets[key] = [current, row_id]
+            self.entries += 1
+        return True
+
+    def sync(self, conn=None, batch_size=5000):
+        """Index history rows added since the last sync and return how many were indexed
+
+        When another thread is already syncing this returns at once and that
+        sync picks the new rows up.
+        """
+        if not self.db_path:
+            return 0
+        self._sync_pending = True
+        if not self._sync_lock.acquire(blocking=False):
+            return 0
+        indexed = 0
+        try:
+            own_conn = conn is None
+            if own_conn:
+                conn = sqlite3.connect(self.db_path)
+            try:
+                while self._sync_pending:
+                    self._sync_pending = False
+                    while True:
+                        rows = conn.execute("""
+                            SELECT id, source_text, source_lang, target_lang, translated_text, degraded FROM history
+                            WHERE id > ? ORDER BY id LIMIT ?
+                        """, (self.last_row_id, batch_size)).fetchall()
+                        if not rows:
+                            break
+                        for row in rows:
+                            if self.add(*row):
+                                indexed += 1
+                        self.last_row_id = rows[-1][0]
+            except sqlite3.OperationalError as e:
+                # The history table does not exist until the first save
+                trace.debug("Translation memory sync skipped: %s", e)
+            finally:
+                if own_conn:
+                    conn.close()
+        finally:
+            self._sync_lock.release()
+        if indexed:
+            trace.debug("Translation memory indexed %d rows (%d total)", indexed, self.entries)
+        return indexed
+
+    def lookup(self, text, source_lang, target_lang):
+        """Return (translated_text, source_lang, similarity) of the closest earlier translation, or None
+
+        With source_lang "auto" (or None) rows from every source language are candidates.
+        """
+        if self.threshold is None or not self.entries or not self.db_path:
+            return None
+        shingles = self.shingles(text)
+        if not shingles:
+            return None
+        known = source_lang not in (None, "auto")
+        if known:
+            source_langs = [source_lang]
+        else:
+            with self._lock:
+                source_langs = list(self._source_langs)
+        signature = self.signature(shingles)
+        hits = collections.Counter()
+        for lang in source_langs:
+            for buckets, key in zip(self._buckets, self._band_keys(signature, lang, target_lang)):
+                current = buckets.get(key)
+                if current is None:
+                    continue
+                if isinstance(current, list):
+                    hits.update(current[:])
+                else:
+                    hits[current] += 1
+        if not hits:
+            return None
+        # Rows sharing the most bands first, newest first among equals
+        candidates = sorted(hits, key=lambda row_id: (hits[row_id], row_id), reverse=True)[:self.max_candidates]
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                rows = conn.execute(f"""
+                    SELECT id, source_text, source_lang, translated_text FROM history
+                    WHERE id IN ({",".join("?" * len(candidates))}) AND target_lang = ?
+                """, (*candidates, target_lang)).fetchall()
+                if known:
+                    # Band keys can collide; only the requested pair may answer
+                    rows = [row for row in rows if row[2] == source_lang]
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            trace.debug("Translation memory lookup failed: %s", e)
+            return None
+        best = None
+        for row_id, source_text, source_lang, translated_text in rows:
+            score = self.similarity(shingles, self.shingles(source_text or ""))
+            if score >= self.threshold and (best is None or (score, row_id) > best[0]):
+                best = ((score, row_id), (translated_text, source_lang, score))
+        return best[1] if best else None
+
+    def reset(self):
+        """Forget every indexed row, e.g. after the history was cleared or moved"""
+        with self._lock:
+            self._buckets = [{} for _ in range(self.bands)]
+            self._source_langs = set()
+            self.entries = 0
+            self.last_row_id = 0
+
+    def memory_bytes(self):
+        """Approximate size of the band buckets"""
+        total = 0
+        for buckets in self._buckets:
+            total += sys.getsizeof(buckets)
+            for key, value in buckets.items():
+                total += sys.getsizeof(key)
+                if isinstance(value, list):
+                    total += sys.getsizeof(value)
+        return total
+
+class UsageStatistics:
+    """Hourly translation totals per language pair, updated in the same transaction as each history row
+
+    Statistics read these buckets instead of scanning the history table, so
+    a query costs the same however many translations are stored. Failures
+    are results that start with one of FAILED_TRANSLATION_PREFIXES and
+    fallbacks are degraded results (offline phrases, sentences left
+    untranslated); rebuild() recomputes every bucket from the history rows.
+    """
+    COLUMNS = ("translations", "source_chars", "translated_chars", "failures", "fallbacks")
+    UPSERT_SQL = """
+        INSERT INTO usage_hourly (hour, source_lang, target_lang, translations, source_chars, translated_chars,
+                                  failures, fallbacks)
+        VALUES (?, ?, ?, 1, ?, ?, ?, ?)
+        ON CONFLICT (hour, source_lang, target_lang) DO UPDATE SET
+            translations = translations + 1,
+            source_chars = source_chars + excluded.source_chars,
+            translated_chars = translated_chars + excluded.translated_chars,
+            failures = failures + excluded.failures,
+            fallbacks = fallbacks + excluded.fallbacks
+    """
+
+    @staticmethod
+    def record(cursor, timestamp, source_text, source_lang, translated_text, target_lang, degraded=False):
+        """Add one history row to its hourly bucket (call inside the transaction that inserts the row)"""
+        translated_text = translated_text or ""
+        cursor.execute(UsageStatistics.UPSERT_SQL, (
+            timestamp[:13], source_lang or "", target_lang or "", len(source_text or ""), len(translated_text),
+            int(translated_text.startswith(FAILED_TRANSLATION_PREFIXES)), int(bool(degraded))
+        ))
+
+    @staticmethod
+    def rebuild(conn):
+        """Recompute every bucket from the history table (the caller commits)"""
+        failure = " OR ".join("substr(translated_text, 1, ?) = ?" for _ in FAILED_TRANSLATION_PREFIXES)
+        params = [value for prefix in FAILED_TRANSLATION_PREFIXES for value in (len(prefix), prefix)]
+        conn.execute("DELETE FROM usage_hourly")
+        conn.execute(f"""
+            INSERT INTO usage_hourly (hour, source_lang, target_lang, translations, source_chars, translated_chars,
+                                      failures, fallbacks)
+            SELECT substr(timestamp, 1, 13), COALESCE(source_lang, ''), COALESCE(target_lang, ''), COUNT(*),
+                   SUM(COALESCE(length(source_text), 0)), SUM(COALESCE(length(translated_text), 0)),
+                   SUM(CASE WHEN {failure} THEN 1 ELSE 0 END), SUM(degraded)
+            FROM history
+            WHERE timestamp IS NOT NULL
+            GROUP BY 1, 2, 3
+        """, params)
+
+    @staticmethod
+    def _since(days):
+        if not days:
+            return "", ()
+        return "WHERE hour >= ?", ((datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d"),)
+
+    @classmethod
+    def daily(cls, conn, days=None):
+        """Per-day totals by language pair, newest day first; days limits them to the last N days"""
+        where, params = cls._since(days)
+        rows = conn.execute(f"""
+            SELECT substr(hour, 1, 10), source_lang, target_lang, SUM(translations), SUM(source_chars),
+                   SUM(translated_chars), SUM(failures), SUM(fallbacks)
+            FROM usage_hourly {where}
+            GROUP BY 1, 2, 3
+            ORDER BY 1 DESC, 4 DESC
+        """, params)
+        return [dict(zip(("day", "source_lang", "target_lang") + cls.COLUMNS, row)) for row in rows]
+
+    @classmethod
+    def hourly(cls, conn, days=None):
+        """Every hourly bucket, oldest first"""
+        where, params = cls._since(days)
+        rows = conn.execute(f"""
+            SELECT hour, source_lang, target_lang, {', '.join(cls.COLUMNS)}
+            FROM usage_hourly {where}
+            ORDER BY hour, source_lang, target_lang
+        """, params)
+        return [dict(zip(("hour", "source_lang", "target_lang") + cls.COLUMNS, row)) for row in rows]
+
+    @classmethod
+    def totals(cls, conn, days=None):
+        """Overall totals with failure and fallback rates"""
+        where, params = cls._since(days)
+        row = conn.execute(f"SELECT {', '.join(f'COALESCE(SUM({c}), 0)' for c in cls.COLUMNS)} "
+                           f"FROM usage_hourly {where}", params).fetchone()
+        totals = dict(zip(cls.COLUMNS, row))
+        totals["failure_rate"] = totals["failures"] / totals["translations"] if totals["translations"] else 0.0
+        totals["fallback_rate"] = totals["fallbacks"] / totals["translations"] if totals["translations"] else 0.0
+        return totals
+
+    @classmethod
+    def export(cls, conn, path, days=None):
+        """Write totals, daily and hourly figures to a JSON file"""
+        report = {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "days": days,
+            "totals": cls.totals(conn, days),
+            "daily": cls.daily(conn, days),
+            "hourly": cls.hourly(conn, days),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return report
+
+def migrate_history_schema(conn):
+    """Bring a history database up to HISTORY_SCHEMA_VERSION, returning True if anything changed"""
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= HISTORY_SCHEMA_VERSION:
+        return False
+    conn.commit()
+    # Take the write lock first so two processes cannot migrate at once
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= HISTORY_SCHEMA_VERSION:
+            conn.rollback()
+            return False
+        conn.execute(HISTORY_TABLE_SQL)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(history)")}
+        # Version 1: fallback flag on each row, and hourly usage buckets
+        if "used_fallback" not in columns:
+            conn.execute("ALTER TABLE history ADD COLUMN used_fallback INTEGER NOT NULL DEFAULT 0")
+        conn.execute(USAGE_TABLE_SQL)
+        # Version 2: degraded results (offline phrases, untranslated sentences), kept apart from answers
+        # that merely came from another backend; version 1 rows only had the broader flag
+        if "degraded" not in columns:
+            conn.execute("ALTER TABLE history ADD COLUMN degraded INTEGER NOT NULL DEFAULT 0")
+            conn.execute("UPDATE history SET degraded = used_fallback")
+        # Buckets built from the rows already there
+        UsageStatistics.rebuild(conn)
+        conn.execute(f"PRAGMA user_version = {HISTORY_SCHEMA_VERSION}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    trace.info("History database migrated from schema version %d to %d", version, HISTORY_SCHEMA_VERSION)
+    return True
+
+def dominant_script(text):
+    """Unicode script name (LATIN, DEVANAGARI, CJK, ...) used by most letters in text, or None"""
+    counts = collections.Counter()
+    for char in text:
+        if char.isalpha():
+            try:
+                counts[unicodedata.name(char).split(" ", 1)[0]] += 1
+            except ValueError:
+                continue
+    return counts.most_common(1)[0][0] if counts else None
+
+class SourceLanguageTracker:
+    """Sticky guess of one speaker's language so most utterances skip detection
+
+    The guess is trusted after `confirmations` consecutive detections agree.
+    It is re-checked every `recheck_every` utterances, and at once when an
+    utterance is written in a different script.
+    """
+    def __init__(self, confirmations=2, recheck_every=10):
+        self.confirmations = confirmations
+        self.recheck_every = recheck_every
+        self.language = None
+        self.script = None
+        self.streak = 0
+        self.since_check = 0
+        self._lock = threading.Lock()
+
+    def guess(self, text):
+        """Return the sticky language for text, or None when it must be detected"""
+        with self._lock:
+            if self.language is None or self.streak < self.confirmations:
+                return None
+            if self.since_check >= self.recheck_every:
+                return None
+            if dominant_script(text) != self.script:
+                return None
+            self.since_check += 1
+            return self.language
+
+    def observe(self, text, language):
+        """Record a language detected (locally or by the backend) for text"""
+        with self._lock:
+            if language == self.language:
+                self.streak += 1
+            else:
+                self.language = language
+                self.streak = 1
+            self.script = dominant_script(text)
+            self.since_check = 0
+
+DETECT_MODES = ("local", "sticky", "auto")
+
+# Language codes the translation backends report that langdetect spells differently (after lowercasing)
+BACKEND_LANGUAGE_CODES = {"iw": "he", "in": "id", "fil": "tl", "nb": "no", "zh": "zh-cn", "zh-hans": "zh-cn",
+                          "zh-hant": "zh-tw"}
+
+def normalize_language_code(code):
+    """Spell a backend language code the way langdetect and LANGUAGES do, e.g. zh-CN as zh-cn and iw as he"""
+    code = code.strip().lower().replace("_", "-")
+    return BACKEND_LANGUAGE_CODES.get(code, code)
+
+def recognize_google_audio(audio):
+    """Google Web Speech recognition with default settings, usable inside a worker process"""
+    return sr.Recognizer().recognize_google(audio)
+
+def _offload_worker_init():
+    # Load the langdetect profiles before the first utterance arrives
+    try:
+        detect("warm up the language profiles")
+    except Exception:
+        pass
+
+def _offload_ping(hold=0.0):
+    # Holding the worker briefly makes the other pings go to workers that are still starting
+    time.sleep(hold)
+    return os.getpid()
+
+def _offload_detect(text):
+    return detect(text)
+
+def _offload_recognize(recognize_function, block_name, size, sample_rate, sample_width):
+    block = shared_memory.SharedMemory(name=block_name)
+    try:
+        frame_data = bytes(block.buf[:size])
+    finally:
+        block.close()
+    return recognize_function(sr.AudioData(frame_data, sample_rate, sample_width))
+
+class ProcessOffload:
+    """Process pool for CPU-bound stages, so they do not hold the GIL the Tk loop and capture need
+
+    Detection always runs in the pool; recognition does too when a
+    module-level recognize_function(audio) is given, which covers audio
+    encoding and any local recognizer. Audio is handed to workers in a
+    shared memory block rather than pickled.
+    """
+    def __init__(self, workers=None, recognize_function=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.recognize_function = recognize_function
+        # spawn rather than fork: forking a process that runs Tk and several threads is unsafe
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_offload_worker_init
+        )
+
+    def warm(self, timeout=60.0, hold=0.05):
+        """Start every worker process now, returning once each has answered, and return how long that took"""
+        started = time.perf_counter()
+        pids = set()
+        # Workers are spawned on demand, so submit one task per worker at once; the first worker
+        # up would answer them all, so repeat until every worker has answered one
+        while len(pids) < self.workers and time.perf_counter() - started < timeout:
+            futures = [self.executor.submit(_offload_ping, hold) for _ in range(self.workers)]
+            pids.update(future.result() for future in futures)
+        elapsed = time.perf_counter() - started
+        if len(pids) < self.workers:
+            trace.warning("Only %d of %d worker processes started within %.0f s", len(pids), self.workers, timeout)
+        else:
+            trace.info("Started %d worker processes in %.0f ms", len(pids), elapsed * 1000)
+        return elapsed
+
+    def detect(self, text):
+        """Detect the language of text in a worker process"""
+        return self.executor.submit(_offload_detect, text).result()
+
+    def recognize(self, audio):
+        """Run recognize_function on audio in a worker process"""
+        frame_data = audio.frame_data
+        block = shared_memory.SharedMemory(create=True, size=max(1, len(frame_data)))
+        try:
+            block.buf[:len(frame_data)] = frame_data
+            return self.executor.submit(
+                _offload_recognize, self.recognize_function, block.name, len(frame_data),
+                audio.sample_rate, audio.sample_width
+            ).result()
+        finally:
+            block.close()
+            block.unlink()
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one whose outcome every caller receives
+
+    Only overlapping calls are merged: once the running call returns, the
+    next call with that key runs again. Exceptions are shared the same way.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, function, *args):
+        """Return (function(*args), shared), where shared is True when an identical call in flight answered"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = concurrent.futures.Future()
+        if not leader:
+            return future.result(), True
+        try:
+            result = function(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def __len__(self):
+        return len(self._calls)
+
+class TranslationPipeline:
+    """Recognize, detect, translate and persist a single utterance without any UI dependency"""
+    _detector_lock = threading.Lock()
+    _detector_ready = False
+
+    def __init__(self, recognizer=None, translator_factory=Translator, api_url=TRANSLATE_API_URL, db_path=None,
+                 metrics=None, alt_api_url=ALTERNATE_TRANSLATE_API_URL, latency_budget=8.0,
+                 min_translate_budget=1.0, hedging=True, segment_chars=100, segment_retries=1,
+                 segment_workers=8, detect_mode="local", phrase_dir=None, memory_threshold=0.85, offload=None,
+                 coalesce=True, duplicate_window=5.0):
+        self.recognizer = recognizer if recognizer is not None else sr.Recognizer()
+        # Set translator_factory to None to always use the direct HTTP translation
+        self.translator_factory = translator_factory
+        self.api_url = api_url
+        self.alt_api_url = alt_api_url
+        # Earlier translations from the history table reused for near-identical text (None disables)
+        self.translation_memory = TranslationMemory(db_path, memory_threshold)
+        self.metrics = metrics if metrics is not None else PipelineMetrics()
+        # Seconds allowed per utterance; translation always gets at least min_translate_budget
+        self.latency_budget = latency_budget
+        self.min_translate_budget = min_translate_budget
+        # One pooled client for all direct requests; building a client per request costs tens of milliseconds
+        self.http_client = httpx.Client()
+        backends = self._build_backends()
+        self.hedger = HedgedTranslator(backends if hedging else backends[:1], self.metrics)
+        # Text longer than segment_chars is translated sentence by sentence in parallel (None disables)
+        self.segment_chars = segment_chars
+        self.segment_retries = segment_retries
+        self.segment_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=segment_workers, thread_name_prefix="segment"
+        )
+        # "local" detects every utterance, "sticky" only when the per-speaker guess is uncertain,
+        # "auto" sends src="auto" and takes the backend's answer, detecting locally only without one
+        if detect_mode not in DETECT_MODES:
+            raise ValueError(f"detect_mode must be one of {', '.join(DETECT_MODES)}")
+        self.detect_mode = detect_mode
+        self.language_tracker = SourceLanguageTracker()
+        # Offline phrase translations, from <src>-<dest>.tsv files in phrase_dir plus COMMON_PHRASES
+        self.phrase_table = PhraseTable(phrase_dir)
+        # Optional ProcessOffload that runs detection (and recognition, if configured) in other processes
+        self.offload = offload
+        # Identical audio or text arriving while the same request is in flight waits for that request
+        self.in_flight = SingleFlight() if coalesce else None
+        # An identical history row saved again within duplicate_window seconds is skipped (None disables)
+        self.duplicate_window = duplicate_window
+        self._recent_saves = collections.OrderedDict()
+        self._recent_saves_lock = threading.Lock()
+        # Database whose schema has been brought up to date
+        self._schema_path = None
+
+    @property
+    def db_path(self):
+        """History database path shared with the translation memory"""
+        return self.translation_memory.db_path
+
+    @db_path.setter
+    def db_path(self, value):
+        if value != self.translation_memory.db_path:
+            self.translation_memory.db_path = value
+            self.translation_memory.reset()
+
+    def recognize(self, audio):
+        """Transcribe captured audio to text"""
+        if self.in_flight is None:
+            return self._recognize(audio)
+        key = ("recognize", hashlib.sha1(audio.frame_data).digest(), audio.sample_rate, audio.sample_width)
+        text, shared = self.in_flight.do(key, self._recognize, audio)
+        if shared:
+            self.metrics.increment("coalesced_recognitions")
+        return text
+
+    def _recognize(self, audio):
+        offload = self.offload
+        if offload is not None and offload.recognize_function is not None:
+            try:
+                return offload.recognize(audio)
+            except concurrent.futures.BrokenExecutor as e:
+                self._offload_failed(e)
+        return self.recognizer.recognize_google(audio)
+
+    def detect_language(self, text):
+        """Detect the language code of recognized text"""
+        if self.in_flight is None:
+            return self._detect_language(text)
+        # langdetect is randomised, so duplicates detected separately could disagree and translate twice
+        language, shared = self.in_flight.do(("detect", text), self._detect_language, text)
+        if shared:
+            self.metrics.increment("coalesced_detections")
+        return language
+
+    def _detect_language(self, text):
+        offload = self.offload
+        if offload is not None:
+            try:
+                return offload.detect(text)
+            except concurrent.futures.BrokenExecutor as e:
+                self._offload_failed(e)
+        if not TranslationPipeline._detector_ready:
+            # langdetect loads its profiles on first use and that load is not thread-safe
+            with TranslationPipeline._detector_lock:
+                result = detect(text)
+                TranslationPipeline._detector_ready = True
+                return result
+        return detect(text)
+
+    def _offload_failed(self, error):
+        # A worker died (e.g. killed or out of memory); keep translating in this process
+        trace.warning("Worker processes failed, running CPU-bound stages in this process: %s", error)
+        self.offload = None
+
+    def resolve_source_language(self, text, tracker=None):
+        """Source language to translate from: a sticky guess, "auto" for the backend, or a local detection"""
+        tracker = tracker or self.language_tracker
+        if self.detect_mode == "auto":
+            # Backend detection costs nothing locally, so always ask for it
+            return "auto"
+        if self.detect_mode == "sticky":
+            guess = tracker.guess(text)
+            if guess is not None:
+                self.metrics.increment("detections_skipped")
+                return guess
+        return self._detect_and_track(text, tracker)
+
+    def confirm_source_language(self, text, detected_lang, tracker=None):
+        """Settle an "auto" source language from the backend's answer, detecting locally only if it gave none"""
+        tracker = tracker or self.language_tracker
+        if detected_lang and detected_lang != "auto":
+            self.metrics.increment("detections_skipped")
+            # The tracker, history and phrase tables all use langdetect's codes
+            detected_lang = normalize_language_code(detected_lang)
+            tracker.observe(text, detected_lang)
+            return detected_lang
+        return self._detect_and_track(text, tracker)
+
+    def _detect_and_track(self, text, tracker):
+        cpu_start = time.thread_time()
+        language = self.detect_language(text)
+        self.metrics.observe("detect_cpu", time.thread_time() - cpu_start)
+        tracker.observe(text, language)
+        return language
+
+    def translate(self, source_text, source_lang, target_lang, deadline=None, on_partial=None):
+        """Translate text within the utterance deadline, returning (translated_text, used_fallback)
+
+        Long text is split into sentences that are translated concurrently;
+        on_partial(translated_prefix) is called as each leading run of
+        sentences completes, before the full translation is ready.
+        """
+        return self.translate_detected(source_text, source_lang, target_lang, deadline, on_partial)[:2]
+
+    def translate_detected(self, source_text, source_lang, target_lang, deadline=None, on_partial=None):
+        """Like translate, returning (translated_text, used_fallback, detected_lang, degraded)
+
+        detected_lang is the source language reported by the backend, which
+        matters when source_lang is "auto"; it is None when none was reported.
+        used_fallback is set whenever the primary backend did not answer;
+        degraded only when the result is not a real translation (offline
+        phrases, sentences left as spoken, failure messages).
+        """
+        if self.in_flight is None:
+            return self._translate_detected(source_text, source_lang, target_lang, deadline, on_partial)
+        # Only the call that actually translates reports partial results
+        result, shared = self.in_flight.do(("translate", source_text, source_lang, target_lang),
+                                           self._translate_detected, source_text, source_lang, target_lang,
+                                           deadline, on_partial)
+        if shared:
+            self.metrics.increment("coalesced_translations")
+        return result
+
+    def _translate_detected(self, source_text, source_lang, target_lang, deadline, on_partial):
+        # Utterances the phrase table covers or that were translated before never leave the machine
+        local, local_lang, phrase = self._translate_locally(source_text, source_lang, target_lang)
+        if local is not None:
+            return local, False, local_lang, False
+
+        if deadline is None:
+            deadline = Deadline(self.latency_budget)
+
+        segments = split_sentences(source_text, source_lang, self.segment_chars)
+        if len(segments) > 1:
+            return self._translate_segments(segments, source_lang, target_lang, deadline, on_partial)
+
+        try:
+            return self._translate_segment(source_text, source_lang, target_lang, deadline) + (False,)
+        except TranslationTimeout as e:
+            trace.warning("Translation deadline exceeded: %s", e)
+            self.metrics.increment("deadline_exceeded")
+            if phrase is not None:
+                return phrase, True, None, True
+            return (f"Translation timed out for '{source_text}'. Try again or use another language.",
+                    True, None, True)
+        except Exception as e:
+            trace.warning("All translation backends failed: %s", e)
+            # Known phrases are still better than nothing
+            if phrase is not None:
+                return phrase, True, None, True
+            return (f"Translation unavailable for '{source_text}'. Try again or use another language.",
+                    True, None, True)
+
+    def _translate_locally(self, text, source_lang, target_lang):
+        """Return (translation, source_lang, partial_phrase) from the phrase table or translation memory
+
+        translation is None when neither covers text; partial_phrase is the
+        phrase table's translation of whatever parts of text it knows.
+        """
+        phrase, phrase_lang, fully_matched = self.phrase_table.lookup(text, source_lang, target_lang)
+        if fully_matched:
+            self.metrics.increment("cache_hits")
+            return phrase, phrase_lang, phrase
+        started = time.perf_counter()
+        match = self.translation_memory.lookup(text, source_lang, target_lang)
+        self.metrics.observe("memory_lookup", time.perf_counter() - started)
+        if match is not None:
+            translation, memory_lang, similarity = match
+            self.metrics.increment("memory_hits")
+            trace.debug("Translation memory match (%.2f) for %r", similarity, text)
+            return translation, memory_lang, phrase
+        return None, None, phrase
+
+    def _translate_segment(self, text, source_lang, target_lang, deadline):
+        """Translate one piece of text, retrying failures while the deadline allows"""
+        for attempt in range(self.segment_retries + 1):
+            try:
+                return self.hedger.translate(text, source_lang, target_lang, deadline)
+            except TranslationTimeout:
+                raise
+            except Exception as e:
+                if attempt == self.segment_retries or deadline.expired():
+                    raise
+                self.metrics.increment("segment_retries")
+                trace.debug("Retrying translation of %r: %s", text, e)
+
+    def _translate_segments(self, segments, source_lang, target_lang, deadline, on_partial=None):
+        """Translate sentences concurrently and reassemble them in order"""
+        self.metrics.increment("segmented_utterances")
+        joiner = "" if target_lang in UNSPACED_LANGUAGES else " "
+        futures = []
+        phrases = []
+        for segment in segments:
+            local, local_lang, phrase = self._translate_locally(segment, source_lang, target_lang)
+            phrases.append(phrase)
+            if local is not None:
+                # Sentences the phrase table or translation memory covers are answered locally
+                future = concurrent.futures.Future()
+                future.set_result((local, False, local_lang))
+            else:
+                future = self.segment_executor.submit(
+                    self._translate_segment, segment, source_lang, target_lang, deadline
+                )
+            futures.append(future)
+        translated = []
+        used_fallback = False
+        degraded = False
+        detected_lang = None
+        for index, (segment, future) in enumerate(zip(segments, futures)):
+            try:
+                text, segment_fallback, segment_lang = future.result()
+                used_fallback = used_fallback or segment_fallback
+                detected_lang = detected_lang or segment_lang
+            except Exception as e:
+                # Keep the rest of the translation; this sentence keeps its known phrases or stays as spoken
+                if isinstance(e, TranslationTimeout):
+                    self.metrics.increment("deadline_exceeded")
+                trace.warning("Sentence %d of %d not translated: %s", index + 1, len(segments), e)
+                text = phrases[index] if phrases[index] is not None else segment
+                used_fallback = True
+                degraded = True
+            translated.append(text)
+            if on_partial and index < len(segments) - 1:
+                on_partial(joiner.join(translated))
+        return joiner.join(translated), used_fallback, detected_lang, degraded
+
+    def _build_backends(self):
+        """Ordered (name, callable) translation backends; the first is the primary
+
+        Each callable takes (text, src, dest, timeout) and returns
+        (translated_text, detected_source_lang or None).
+        """
+        backends = []
+        if self.translator_factory is not None:
+            backends.append(("googletrans", self._translate_library))
+        backends.append(("direct", lambda text, src, dest, timeout:
+                         self._direct_translate(text, src, dest, self.api_url, timeout)))
+        if self.alt_api_url and self.alt_api_url != self.api_url:
+            backends.append(("direct_alt", lambda text, src, dest, timeout:
+                             self._direct_translate(text, src, dest, self.alt_api_url, timeout)))
+        return backends
+
+    def _translate_library(self, source_text, source_lang, target_lang, timeout):
+        """Translate with googletrans, returning (text, detected_lang) and raising on unusable results"""
+        # Create a new translator object for each translation
+        # This helps avoid sharing a single instance across threads
+        try:
+            translator = self.translator_factory(timeout=timeout)
+        except TypeError:
+            # Factories without a timeout option are bounded by the deadline instead
+            translator = self.translator_factory()
+
+        # Check if translate returns a coroutine (newer versions of googletrans)
+        translation = translator.translate(
+            source_text,
+            src=source_lang,
+            dest=target_lang
+        )
+
+        trace.debug("Translation object type: %s", type(translation))
+
+        # Check for coroutine or object representation
+        translation_str = str(translation)
+        coroutine_detected = (
+            asyncio.iscoroutine(translation) or
+            translation_str.startswith('<coroutine') or
+            'object at 0x' in translation_str or
+            translation_str.startswith('<googletrans.models.Translated') or
+            hasattr(translation, '__dict__') and not hasattr(translation, 'text')
+        )
+
+        if coroutine_detected:
+            if asyncio.iscoroutine(translation):
+                # Close it so Python does not warn about a never-awaited coroutine
+                translation.close()
+            # Don't try to await the coroutine, let the next backend answer instead
+            raise ValueError("googletrans returned a coroutine or raw object")
+
+        # Set by googletrans to the detected language when translating from "auto"
+        detected_lang = getattr(translation, "src", None)
+
+        if hasattr(translation, 'text'):
+            trace.debug("Extracted translation text attribute: %s", translation.text)
+            return translation.text, detected_lang
+        if isinstance(translation, str):
+            trace.debug("Translation is already a string: %s", translation)
+            return translation, detected_lang
+        if isinstance(translation, dict) and 'text' in translation:
+            trace.debug("Extracted text from dictionary: %s", translation['text'])
+            return translation['text'], detected_lang
+
+        # Last resort: extract from string representation of googletrans Translated objects
+        trace.debug("Extracting from string representation: %s", translation)
+        if 'Translated' in translation_str and 'coroutine' not in translation_str:
+            text_start = translation_str.find("text=") + 5
+            if text_start > 5:  # Found "text="
+                text_end = translation_str.find(",", text_start)
+                if text_end > text_start:
+                    extracted_text = translation_str[text_start:text_end].strip()
+                    if extracted_text.startswith("'") and extracted_text.endswith("'"):
+                        extracted_text = extracted_text[1:-1]
+                    return extracted_text, detected_lang
+        raise ValueError(f"Unrecognized googletrans result: {translation_str[:50]}")
+
+    def _direct_translate(self, text, src_lang, dest_lang, url, timeout):
+        """Single request to a translate_a/single endpoint returning (text, detected_lang), raising on failure"""
+        # Note: This is a simplified version and may not work as reliably as the full library
+        params = {
+            "client": "gtx",
+            "sl": src_lang,
+            "tl": dest_lang,
+            "dt": "t",
+            "q": text
+        }
+
+        response = self.http_client.get(url, params=params, timeout=timeout)
+        if response.status_code != 200:
+            raise ValueError(f"Translation endpoint returned HTTP {response.status_code}")
+
+        # Parse the response - typically nested arrays
+        result = response.json()
+        if not result or not result[0]:
+            raise ValueError("Translation endpoint returned an empty result")
+        # Combine all translation segments; the third element is the detected source language
+        detected_lang = result[2] if len(result) > 2 and isinstance(result[2], str) else None
+        return "".join(segment[0] for segment in result[0] if segment and segment[0]), detected_lang
+
+    def lookup_phrase(self, text, dest_lang, src_lang=None):
+        """Translate text locally when the phrase table covers all of it, or return None"""
+        translation, _, fully_matched = self.phrase_table.lookup(text, src_lang, dest_lang)
+        if fully_matched:
+            self.metrics.increment("cache_hits")
+            return translation
+        return None
+
+    def partial_phrase_translation(self, text, src_lang, dest_lang):
+        """Phrase table translation of whatever parts of text it knows, or None"""
+        translation, _, _ = self.phrase_table.lookup(text, src_lang, dest_lang)
+        return translation
+
+    def fallback_translate(self, text, src_lang, dest_lang, timeout=None):
+        """Fallback translation method that uses direct HTTP requests when googletrans has issues"""
+        self.metrics.increment("fallbacks")
+        with self.metrics.time_stage("fallback"):
+            return self._fallback_translate(text, src_lang, dest_lang, timeout)
+
+    def _fallback_translate(self, text, src_lang, dest_lang, timeout=None):
+        """Translate with the phrase table or a direct HTTP request"""
+        trace.debug("Using fallback translation for: %s from %s to %s", text, src_lang, dest_lang)
+
+        try:
+            # Try the phrase table first
+            phrase = self.lookup_phrase(text, dest_lang, src_lang)
+            if phrase is not None:
+                return phrase
+
+            # Use httpx for direct translation API call
+            try:
+                trace.debug("Attempting direct API call with httpx")
+                return self._direct_translate(text, src_lang, dest_lang, self.api_url,
+                                              timeout if timeout is not None else self.latency_budget)[0]
+            except Exception as api_error:
+                trace.warning("Direct API translation error: %s", api_error)
+
+            # Known phrases are still better than nothing
+            partial = self.partial_phrase_translation(text, src_lang, dest_lang)
+            if partial is not None:
+                return partial
+
+            # If all else fails, return an informative message
+            return f"Translation unavailable for '{text}'. Try again or use another language."
+
+        except Exception as e:
+            trace.warning("Fallback translation error: %s", e)
+            return f"Translation failed: {str(e)[:50]}"
+
+    def shutdown(self):
+        """Stop the translation worker pools and worker processes"""
+        self.hedger.shutdown()
+        self.segment_executor.shutdown(wait=False)
+        self.http_client.close()
+        if self.offload is not None:
+            self.offload.shutdown()
+
+    def save_to_history(self, source_text, source_lang, translated_text, target_lang, used_fallback=False,
+                        degraded=False):
+        """Insert a translation into the history table and its usage bucket, raising on database errors"""
+        if not self.db_path:
+            return False
+
+        key = (source_text, source_lang, translated_text, target_lang)
+        if self.duplicate_window:
+            now = time.monotonic()
+            with self._recent_saves_lock:
+                while self._recent_saves and next(iter(self._recent_saves.values())) < now - self.duplicate_window:
+                    self._recent_saves.popitem(last=False)
+                if key in self._recent_saves:
+                    # The same result again, e.g. from repeated "Process Last Audio" clicks
+                    self.metrics.increment("duplicate_saves")
+                    trace.debug("Skipped duplicate history row for %s -> %s", source_lang, target_lang)
+                    return False
+                self._recent_saves[key] = now
+
+        try:
+            self._insert_history(source_text, source_lang, translated_text, target_lang, used_fallback, degraded)
+        except Exception:
+            # A failed insert must not block the next attempt
+            with self._recent_saves_lock:
+                self._recent_saves.pop(key, None)
+            raise
+        return True
+
+    def _insert_history(self, source_text, source_lang, translated_text, target_lang, used_fallback, degraded):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        # Create a new connection for this operation to avoid threading issues
+        # This is critical for thread safety in SQLite
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+
+            # First make sure the tables exist and are current (important for first run)
+            if self._schema_path != self.db_path:
+                migrate_history_schema(conn)
+                self._schema_path = self.db_path
+
+            cursor.execute("""
+                INSERT INTO history (timestamp, source_text, source_lang, translated_text, target_lang,
+                                     used_fallback, degraded)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (timestamp, source_text, source_lang, translated_text, target_lang, int(bool(used_fallback)),
+                  int(bool(degraded))))
+            UsageStatistics.record(cursor, timestamp, source_text, source_lang, translated_text, target_lang,
+                                   degraded)
+            conn.commit()
+            cursor.close()
+            # Make the new row available to the translation memory
+            self.translation_memory.sync(conn)
+        finally:
+            conn.close()
+
+    def process(self, audio, target_lang, save=None, on_translated=None, on_partial=None, tracker=None):
+        """Run one utterance through every stage and return the result with per-stage timings
+
+        `tracker` is the SourceLanguageTracker of the speaker (defaults to the pipeline's own).
+        """
+        # Timings use perf_counter so they are monotonic and unaffected by clock changes
+        timings = {}
+        started = time.perf_counter()
+        deadline = Deadline(self.latency_budget)
+        self.metrics.increment("utterances")
+
+        try:
+            stage_start = time.perf_counter()
+            source_text = self.recognize(audio)
+            timings["recognize"] = time.perf_counter() - stage_start
+            trace.debug("Recognized text: %s", source_text)
+
+            stage_start = time.perf_counter()
+            source_lang = self.resolve_source_language(source_text, tracker)
+            timings["detect"] = time.perf_counter() - stage_start
+            trace.debug("Detected language: %s (%s)", source_lang, LANGUAGES.get(source_lang, 'Unknown'))
+            trace.debug("Target language: %s (%s)", target_lang, LANGUAGES.get(target_lang, 'Unknown'))
+
+            stage_start = time.perf_counter()
+            # Slow recognition must not leave translation with no time at all
+            if deadline.remaining() < self.min_translate_budget:
+                deadline = Deadline(self.min_translate_budget)
+            translated_text, used_fallback, detected_lang, degraded = self.translate_detected(
+                source_text, source_lang, target_lang, deadline,
+                on_partial=(lambda partial: on_partial(source_text, source_lang, partial, target_lang))
+                if on_partial else None
+            )
+            timings["translate"] = time.perf_counter() - stage_start
+            if source_lang == "auto":
+                source_lang = self.confirm_source_language(source_text, detected_lang, tracker)
+                trace.debug("Backend detected language: %s", source_lang)
+            trace.debug("Final translated text: %s", translated_text)
+
+            # Let the caller show the result before the history write completes
+            if on_translated:
+                on_translated(source_text, source_lang, translated_text, target_lang)
+
+            stage_start = time.perf_counter()
+            (save or self.save_to_history)(source_text, source_lang, translated_text, target_lang, used_fallback,
+                                           degraded)
+            timings["db_write"] = time.perf_counter() - stage_start
+        except Exception:
+            self.metrics.increment("errors")
+            raise
+        finally:
+            timings["total"] = time.perf_counter() - started
+            for stage, seconds in timings.items():
+                self.metrics.observe(stage, seconds)
+
+        return {
+            "source_text": source_text,
+            "source_lang": source_lang,
+            "translated_text": translated_text,
+            "target_lang": target_lang,
+            "used_fallback": used_fallback,
+            "degraded": degraded,
+            "timings": timings
+        }
+
+class UIUpdateQueue:
+    """Thread-safe queue of UI updates applied in batches by one periodic Tk callback
+
+    Worker threads post callables instead of calling root.after themselves.
+    Updates posted with a key replace any pending update with the same key
+    (e.g. consecutive status texts), so only the latest one is drawn. At most
+    `max_batch` updates are applied per frame, at no more than `fps` frames a
+    second, leaving the event loop free for input in between.
+    """
+    def __init__(self, root, fps=30, max_batch=50):
+        self.root = root
+        self.interval_ms = max(1, int(1000 / fps))
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        # Insertion order is application order; re-posting a key moves it to the end
+        self._pending = collections.OrderedDict()
+        self._sequence = itertools.count()
+        self._after_id = None
+        self.posted = 0
+        self.applied = 0
+        self.coalesced = 0
+
+    def post(self, callback, key=None):
+        """Queue callback to run on the Tk thread, replacing any pending update with the same key"""
+        with self._lock:
+            self.posted += 1
+            if key is None:
+                key = next(self._sequence)
+            elif key in self._pending:
+                del self._pending[key]
+                self.coalesced += 1
+            self._pending[key] = callback
+
+    def start(self):
+        """Begin draining on the Tk event loop"""
+        if self._after_id is None:
+            self._after_id = self.root.after(self.interval_ms, self._drain)
+
+    def stop(self):
+        """Stop draining; pending updates are discarded"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        with self._lock:
+            self._pending.clear()
+
+    def depth(self):
+        """Number of updates waiting to be applied"""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Apply everything pending now (must be called on the Tk thread)"""
+        while self.depth():
+            self._apply_batch(self.depth())
+
+    def _apply_batch(self, limit):
+        with self._lock:
+            batch = []
+            while self._pending and len(batch) < limit:
+                batch.append(self._pending.popitem(last=False)[1])
+        for callback in batch:
+            try:
+                callback()
+            except Exception as e:
+                trace.error("UI update failed: %s", e)
+        self.applied += len(batch)
+
+    def _drain(self):
+        self._after_id = None
+        self._apply_batch(self.max_batch)
+        self._after_id = self.root.after(self.interval_ms, self._drain)
+
+class TranscriptLog:
+    """Append-only on-disk record of every source/translation pair in a session"""
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def write(self, source_text, source_lang, translated_text, target_lang):
+        """Append one pair as a tab-separated line (safe to call from any thread)"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        fields = [timestamp, source_lang, source_text, target_lang, translated_text]
+        line = "\t".join(str(field).replace("\t", " ").replace("\n", " ") for field in fields) + "\n"
+        with self._lock:
+            if self._file is None:
+                os.makedirs(self.directory, exist_ok=True)
+                name = datetime.now().strftime("session-%Y%m%d-%H%M%S.tsv")
+                self.path = os.path.join(self.directory, name)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+class SessionRecorder:
+    """Append-only recording of a session's audio segments and their results, for replay
+
+    Raw PCM goes to session-<time>.pcm; session-<time>.idx holds one JSON
+    line per segment (offset, length, format, seconds since the session
+    started) and one per result. Audio is flushed before its index line,
+    so an index never points past the data even after a crash. close()
+    ends the session; the next segment starts a new pair of files.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = None
+        self.segments = 0
+        self._audio_file = None
+        self._index_file = None
+        self._offset = 0
+        self._started = None
+        self._lock = threading.Lock()
+
+    def append(self, audio, source=None, at=None):
+        """Record one captured segment and return a token for record_result (safe from any thread)"""
+        frame_data = audio.frame_data
+        with self._lock:
+            if self._audio_file is None:
+                os.makedirs(self.directory, exist_ok=True)
+                name = datetime.now().strftime("session-%Y%m%d-%H%M%S")
+                self.path = os.path.join(self.directory, f"{name}.pcm")
+                self._audio_file = open(self.path, "ab")
+                self._index_file = open(os.path.join(self.directory, f"{name}.idx"), "a", encoding="utf-8")
+                self._offset = self._audio_file.tell()
+                self._started = time.monotonic()
+                self.segments = 0
+            number = self.segments
+            self.segments += 1
+            self._audio_file.write(frame_data)
+            self._audio_file.flush()
+            self._write({
+                "segment": number,
+                "offset": self._offset,
+                "length": len(frame_data),
+                "sample_rate": audio.sample_rate,
+                "sample_width": audio.sample_width,
+                "at": round(time.monotonic() - self._started if at is None else at, 3),
+                "source": source,
+            })
+            self._offset += len(frame_data)
+            return self._index_file, number
+
+    def record_result(self, token, result=None, error=None):
+        """Record the pipeline result (or the error) for the segment that append() returned token for"""
+        index_file, number = token
+        record = {"result": number}
+        if result is not None:
+            record.update({key: result[key] for key in
+                           ("source_text", "source_lang", "translated_text", "target_lang", "used_fallback",
+                            "degraded")})
+            record["timings"] = {stage: round(seconds, 4) for stage, seconds in result["timings"].items()}
+        if error is not None:
+            record["error"] = str(error)
+        with self._lock:
+            # Results can arrive after the session was closed
+            if not index_file.closed:
+                self._write(record, index_file)
+
+    def _write(self, record, index_file=None):
+        index_file = index_file or self._index_file
+        index_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        index_file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._audio_file is not None:
+                self._audio_file.close()
+                self._index_file.close()
+                self._audio_file = None
+                self._index_file = None
+
+class SessionRecording:
+    """Read-only view of a SessionRecorder session, with the audio memory-mapped rather than loaded"""
+    def __init__(self, path):
+        base = os.path.splitext(path)[0]
+        self.path = f"{base}.pcm"
+        segments = {}
+        with open(f"{base}.idx", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash
+                    continue
+                if "segment" in record:
+                    segments[record["segment"]] = dict(record, result=None)
+                elif record.get("result") in segments:
+                    segments[record["result"]]["result"] = record
+        self.segments = [segments[number] for number in sorted(segments)]
+        self._file = open(self.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap cannot map an empty file
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.segments = [segment for segment in self.segments if segment["offset"] + segment["length"] <= size]
+
+    @property
+    def duration(self):
+        """Seconds from the start of the session to the last segment"""
+        return self.segments[-1]["at"] if self.segments else 0.0
+
+    def audio(self, segment):
+        """AudioData for one entry of self.segments"""
+        frame_data = self._map[segment["offset"]:segment["offset"] + segment["length"]]
+        return sr.AudioData(frame_data, segment["sample_rate"], segment["sample_width"])
+
+    def replay(self, process, speed=1.0, workers=4):
+        """Call process(segment, audio) for every segment and return their results (or exceptions) in order
+
+        With speed 1.0 segments arrive as they were captured (2.0 twice as
+        fast); 0 or None sends them all at once, limited only by `workers`.
+        """
+        started = time.monotonic()
+        futures = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers,
+                                                   thread_name_prefix="replay") as executor:
+            for segment in self.segments:
+                if speed:
+                    delay = started + segment["at"] / speed - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                futures.append(executor.submit(process, segment, self.audio(segment)))
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def close(self):
+        if self._map:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class TranscriptView:
+    """Rolling source/translation transcript over two Text widgets
+
+    Each pair is appended as one line in each widget and the oldest lines are
+    trimmed once `max_lines` is exceeded, so the cost of a new line stays
+    constant however long the session runs. The full transcript lives in
+    TranscriptLog on disk.
+    """
+    def __init__(self, source_widget, translated_widget, max_lines=500):
+        self.widgets = (source_widget, translated_widget)
+        self.max_lines = max_lines
+        self.lines = 0
+        self.has_placeholder = True
+        self.has_partial = False
+
+    def show_placeholder(self, source_hint, translated_hint):
+        """Replace the view with hint texts when there is nothing to show yet"""
+        if not self.has_placeholder and self.lines:
+            return
+        for widget, hint in zip(self.widgets, (source_hint, translated_hint)):
+            widget.config(state="normal")
+            widget.delete("1.0", tk.END)
+            widget.insert("1.0", hint)
+            widget.config(state="disabled")
+        self.has_placeholder = True
+        self.has_partial = False
+
+    @staticmethod
+    def _entries(source_text, source_lang, translated_text, target_lang):
+        stamp = datetime.now().strftime("%H:%M:%S")
+        return (
+            f"[{stamp}] ({source_lang}) {' '.join(source_text.split())}",
+            f"[{stamp}] ({target_lang}) {' '.join(translated_text.split())}"
+        )
+
+    def _clear_placeholder(self):
+        if self.has_placeholder:
+            for widget in self.widgets:
+                widget.config(state="normal")
+                widget.delete("1.0", tk.END)
+                widget.config(state="disabled")
+            self.has_placeholder = False
+            self.lines = 0
+
+    def _remove_partial(self):
+        if not self.has_partial:
+            return
+        for widget in self.widgets:
+            widget.config(state="normal")
+            # The provisional line always follows the last finished one
+            widget.delete(f"{self.lines}.end" if self.lines else "1.0", tk.END)
+            widget.config(state="disabled")
+        self.has_partial = False
+
+    def show_partial(self, source_text, source_lang, partial_text, target_lang):
+        """Show a provisional last line for a translation that is still arriving"""
+        self._clear_placeholder()
+        self._remove_partial()
+        entries = self._entries(source_text, source_lang, partial_text + " …", target_lang)
+        for widget, entry in zip(self.widgets, entries):
+            widget.config(state="normal")
+            widget.insert(tk.END, "\n" + entry if self.lines else entry)
+            widget.see(tk.END)
+            widget.config(state="disabled")
+        self.has_partial = True
+
+    def append(self, source_text, source_lang, translated_text, target_lang):
+        """Add one pair to the bottom of both widgets and trim the oldest past the cap"""
+        entries = self._entries(source_text, source_lang, translated_text, target_lang)
+        self._clear_placeholder()
+        self._remove_partial()
+
+        excess = max(0, self.lines + 1 - self.max_lines) if self.max_lines else 0
+        kept = self.lines - excess
+        for widget, entry in zip(self.widgets, entries):
+            widget.config(state="normal")
+            if excess:
+                # Deleting from the top of a Text widget is cheap and keeps it at a fixed size
+                widget.delete("1.0", f"{excess + 1}.0")
+            widget.insert(tk.END, "\n" + entry if kept else entry)
+            widget.see(tk.END)
+            widget.config(state="disabled")
+        self.lines = kept + 1
+
+class HistoryLoader:
+    """Fills the history Treeview from the database without running queries on the Tk thread
+
+    Queries run on `executor` (one thread, so reads and deletes never
+    overlap) and rows reach the tree through the UI update queue in chunks
+    of `chunk_size`. The worker waits for each chunk to be drawn before
+    fetching the next, so one frame never inserts more than a chunk. Every
+    load() or cancel() starts a new generation: chunks of an older load are
+    dropped and its running query is interrupted.
+    """
+    QUERY = ("SELECT id, timestamp, source_text, source_lang, translated_text, target_lang "
+             "FROM history ORDER BY timestamp DESC")
+
+    def __init__(self, tree, ui_updates, executor, chunk_size=200, on_status=None):
+        self.tree = tree
+        self.ui_updates = ui_updates
+        self.executor = executor
+        self.chunk_size = chunk_size
+        self.on_status = on_status or (lambda text: None)
+        self.generation = 0
+        self.loading = False
+        self.loaded = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def format_row(row):
+        """Treeview values for a history row (texts truncated, language names spelled out)"""
+        row_id, timestamp, source_text, source_lang, translated_text, target_lang = row
+        return (
+            row_id,
+            timestamp,
+            (source_text[:30] + '...') if len(source_text) > 30 else source_text,
+            LANGUAGES.get(source_lang, "Unknown"),
+            (translated_text[:30] + '...') if len(translated_text) > 30 else translated_text,
+            LANGUAGES.get(target_lang, "Unknown")
+        )
+
+    def load(self, resolve_db_path):
+        """Clear the tree and load the history again (Tk thread); resolve_db_path runs on the worker"""
+        generation = self.cancel()
+        self.tree.delete(*self.tree.get_children())
+        self.loading = True
+        self.loaded = 0
+        self.on_status("⏳ Loading history...")
+        self.executor.submit(self._load, generation, resolve_db_path)
+
+    def cancel(self):
+        """Abandon the current load and return the new generation"""
+        with self._lock:
+            self.generation += 1
+            if self._conn is not None:
+                # Stops a query that is still running; safe from another thread
+                self._conn.interrupt()
+            return self.generation
+
+    def _current(self, generation):
+        return generation == self.generation
+
+    def _load(self, generation, resolve_db_path):
+        if not self._current(generation):
+            return
+        try:
+            db_path = resolve_db_path()
+            if not db_path:
+                trace.warning("No database path available for history")
+                self._post_message(generation, "History unavailable - Database not accessible")
+                return
+            trace.debug("Loading history from %s", db_path)
+            conn = sqlite3.connect(db_path)
+            with self._lock:
+                if not self._current(generation):
+                    conn.close()
+                    return
+                self._conn = conn
+            try:
+                cursor = conn.execute(self.QUERY)
+                total = 0
+                while self._current(generation):
+                    rows = cursor.fetchmany(self.chunk_size)
+                    if not rows:
+                        break
+                    total += len(rows)
+                    values = [self.format_row(row) for row in rows]
+                    drawn = threading.Event()
+                    self.ui_updates.post(lambda values=values: self._insert(generation, values, drawn))
+                    # Back-pressure: the next chunk is fetched once this one is on screen
+                    while not drawn.wait(0.1):
+                        if not self._current(generation):
+                            return
+            finally:
+                with self._lock:
+                    if self._conn is conn:
+                        self._conn = None
+                conn.close()
+            if self._current(generation):
+                trace.debug("Found %s history entries", total)
+                self.ui_updates.post(lambda: self._finish(generation, total))
+        except sqlite3.OperationalError as sql_e:
+            if not self._current(generation):
+                # Interrupted by a newer load
+                return
+            trace.warning("SQL error loading history: %s", sql_e)
+            error_msg = str(sql_e).lower()
+            if "no such table" in error_msg:
+                # Table doesn't exist yet - this is normal for first run
+                self._post_message(generation, "No history yet - Start translating to create entries")
+            elif "unable to open database" in error_msg or "readonly database" in error_msg:
+                trace.warning("Database permission issues - may need to run as administrator")
+                self._post_message(generation, "Cannot access history database - Permission error")
+            else:
+                self._post_message(generation, f"Database error: {str(sql_e)[:100]}")
+        except Exception as e:
+            trace.warning("Error loading history: %s", e)
+            self._post_message(generation, f"Error loading history: {str(e)[:100]}")
+
+    def _insert(self, generation, values, drawn):
+        try:
+            if self._current(generation):
+                for row in values:
+                    self.tree.insert("", "end", values=row)
+                self.loaded += len(values)
+                self.on_status(f"⏳ Loading history... {self.loaded:,} entries")
+        finally:
+            drawn.set()
+
+    def _finish(self, generation, total):
+        if not self._current(generation):
+            return
+        self.loading = False
+        if total == 0:
+            self.tree.insert("", "end", values=("", "", "No translation history available", "", "", ""))
+        self.on_status(f"{total:,} entries")
+
+    def _post_message(self, generation, message):
+        def show():
+            if self._current(generation):
+                self.loading = False
+                self.tree.insert("", "end", values=("", "", message, "", "", ""))
+                self.on_status("")
+        self.ui_updates.post(show)
+
+class FairScheduler:
+    """Per-session queues served round-robin so one busy source cannot starve the others
+
+    Each session keeps at most `max_pending` items; when a source outruns the
+    workers its oldest item is dropped rather than delaying every other source.
+    """
+    def __init__(self, max_pending=32):
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._queues = collections.OrderedDict()
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def put(self, key, item):
+        """Queue an item for a session, returning False if an older item was dropped"""
+        with self._condition:
+            pending = self._queues.setdefault(key, collections.deque())
+            dropped = len(pending) >= self.max_pending
+            if dropped:
+                pending.popleft()
+                self.dropped += 1
+            pending.append(item)
+            self._condition.notify()
+        return not dropped
+
+    def get(self):
+        """Block for the next item in round-robin session order, or None once closed"""
+        with self._condition:
+            while True:
+                for key, pending in self._queues.items():
+                    if pending:
+                        # Served sessions go to the back of the line
+                        self._queues.move_to_end(key)
+                        return pending.popleft()
+                if self._closed:
+                    return None
+                self._condition.wait()
+
+    def discard(self, key):
+        """Forget a session and its pending items"""
+        with self._condition:
+            self._queues.pop(key, None)
+
+    def depth(self):
+        with self._condition:
+            return sum(len(pending) for pending in self._queues.values())
+
+    def close(self):
+        """Wake every waiting worker; get() returns None once the queues are empty"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+# Speech segmentation settings: seconds of silence that end a phrase, silence kept around it, longest phrase,
+# and how long to wait for speech to start. "balanced" matches the recognizer's usual behaviour.
+CAPTURE_PROFILES = {
+    "low-latency": {"pause_threshold": 0.5, "non_speaking_duration": 0.3, "phrase_time_limit": 5, "timeout": 3},
+    "balanced": {"pause_threshold": 0.8, "non_speaking_duration": 0.5, "phrase_time_limit": 10, "timeout": 5},
+    "accuracy": {"pause_threshold": 1.2, "non_speaking_duration": 0.8, "phrase_time_limit": 20, "timeout": 8},
+}
+
+class LatencyController:
+    """Shortens phrase segmentation when results fall behind a target end-to-end latency
+
+    End-to-end latency is estimated as the pause that ends a phrase plus the
+    recent 90th percentile processing latency. Over target, or with phrases
+    queueing up, the pause and phrase limit are cut by a fifth. When most
+    phrases run into the phrase limit, or phrases ending on a pause are so
+    long that their first sentence waits past the target for the rest, the
+    speaker never pauses long enough between sentences, so only the pause is
+    cut, for good. Well under target they relax back a step at a time
+    towards the chosen profile, which is the ceiling. Changes are made at
+    most every `interval` phrases, or at once after a phrase twice as long
+    as the target.
+    """
+    def __init__(self, profile="balanced", target_latency=3.0, auto_tune=False, window=20, interval=3,
+                 max_queue=1, min_pause=0.3, min_phrase_limit=3, pause_step=0.1, phrase_step=1):
+        self.target_latency = target_latency
+        self.auto_tune = auto_tune
+        self.interval = interval
+        self.max_queue = max_queue
+        self.min_pause = min_pause
+        self.min_phrase_limit = min_phrase_limit
+        self.pause_step = pause_step
+        self.phrase_step = phrase_step
+        self.latencies = collections.deque(maxlen=window)
+        self.limit_hits = collections.deque(maxlen=interval * 2)
+        # Latency plus the speech a phrase held its first sentence back for
+        self.held = collections.deque(maxlen=window)
+        self.adjustments = 0
+        self._since_change = 0
+        self._lock = threading.Lock()
+        self.set_profile(profile)
+
+    def set_profile(self, profile):
+        """Switch to a named profile from CAPTURE_PROFILES, discarding earlier tuning"""
+        if profile not in CAPTURE_PROFILES:
+            raise ValueError(f"profile must be one of {', '.join(CAPTURE_PROFILES)}")
+        with self._lock:
+            self.profile = profile
+            self.settings = dict(CAPTURE_PROFILES[profile])
+            self.latencies.clear()
+            self.limit_hits.clear()
+            self.held.clear()
+            self._since_change = 0
+            # Longest pause this speaker has been seen to leave between phrases
+            self._pause_ceiling = self.settings["pause_threshold"]
+
+    def estimate(self):
+        """Estimated end-of-speech to result latency in seconds, or None before any observation"""
+        with self._lock:
+            return self._estimate()
+
+    def _estimate(self):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return self.settings["pause_threshold"] + ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+
+    def _held_estimate(self):
+        if not self.held:
+            return 0.0
+        ordered = sorted(self.held)
+        return self.settings["pause_threshold"] + ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+
+    def observe(self, latency, queue_depth=0, phrase_seconds=None):
+        """Record one phrase: processing latency, phrases still waiting and the phrase's audio length (seconds)"""
+        with self._lock:
+            self.latencies.append(latency)
+            if phrase_seconds is not None:
+                limit_hit = phrase_seconds >= self.settings["phrase_time_limit"] * 0.95
+                self.limit_hits.append(limit_hit)
+                # A phrase that ended on a pause may hold several sentences, and the first of them
+                # waited for the rest to be spoken; a phrase cut by the limit ends mid-sentence instead
+                self.held.append(latency + (0.0 if limit_hit else phrase_seconds))
+            self._since_change += 1
+            if not self.auto_tune:
+                return
+            # A phrase far longer than the target held sentences back however it ended; react at once
+            if self._since_change < self.interval and latency + (phrase_seconds or 0.0) <= self.target_latency * 2:
+                return
+            estimate = self._estimate()
+            base = CAPTURE_PROFILES[self.profile]
+            settings = dict(self.settings)
+            if estimate > self.target_latency or queue_depth > self.max_queue:
+                settings["pause_threshold"] = max(self.min_pause, settings["pause_threshold"] * 0.8)
+                settings["phrase_time_limit"] = max(self.min_phrase_limit, round(settings["phrase_time_limit"] * 0.8))
+            elif sum(self.limit_hits) * 2 > len(self.limit_hits) or self._held_estimate() > self.target_latency:
+                # Phrases run into the limit or run sentences together: the pause is longer than the
+                # speaker leaves between sentences
+                settings["pause_threshold"] = max(self.min_pause, settings["pause_threshold"] * 0.8)
+                # Relaxing back to a pause the speaker does not leave would run phrases together again
+                self._pause_ceiling = settings["pause_threshold"]
+            elif estimate < self.target_latency * 0.75 and queue_depth == 0:
+                settings["pause_threshold"] = min(base["pause_threshold"], self._pause_ceiling,
+                                                  settings["pause_threshold"] + self.pause_step)
+                settings["phrase_time_limit"] = min(base["phrase_time_limit"],
+                                                    settings["phrase_time_limit"] + self.phrase_step)
+            settings["pause_threshold"] = round(settings["pause_threshold"], 2)
+            # The recognizer needs pause_threshold >= non_speaking_duration
+            settings["non_speaking_duration"] = min(base["non_speaking_duration"], settings["pause_threshold"])
+            if settings != self.settings:
+                trace.debug("Segmentation tuned to pause %.2f s, phrase limit %d s (estimate %.2f s)",
+                            settings["pause_threshold"], settings["phrase_time_limit"], estimate)
+                self.settings = settings
+                self.adjustments += 1
+                self._since_change = 0
+                # Judge the new settings on phrases cut with them
+                self.latencies.clear()
+                self.limit_hits.clear()
+                self.held.clear()
+
+    def apply(self, recognizer):
+        """Copy the current pause settings onto recognizer and return listen() keyword arguments"""
+        with self._lock:
+            settings = self.settings
+        recognizer.pause_threshold = settings["pause_threshold"]
+        recognizer.non_speaking_duration = settings["non_speaking_duration"]
+        return {"timeout": settings["timeout"], "phrase_time_limit": settings["phrase_time_limit"]}
+
+# Default size of the synthesized speech clip cache, overridden by VOICE_TRANSLATOR_SPEECH_CACHE_MB
+SPEECH_CACHE_MB = 200
+
+class SpeechClipCache:
+    """Synthesized speech clips on disk, evicting the least recently played once over max_bytes
+
+    Clips are WAV files named by a hash of (voice, language, text); the
+    recency order lives in memory and is rebuilt from file modification
+    times, which are bumped on every hit, when the directory is opened.
+    Clips fetched or stored with pin=True are queued for playback and are
+    not evicted until release() is called for them.
+    """
+    def __init__(self, directory=None, max_bytes=SPEECH_CACHE_MB * 1048576):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._pinned = collections.Counter()
+        self.bytes = 0
+        self.directory = None
+        if directory:
+            self.set_directory(directory)
+
+    @staticmethod
+    def key(text, lang, voice):
+        """File name stem of the clip for text spoken in lang with voice"""
+        return hashlib.sha1(f"{voice}\x00{lang}\x00{text}".encode("utf-8")).hexdigest()
+
+    def set_directory(self, directory):
+        """Open (creating if needed) the cache folder and index the clips already in it"""
+        os.makedirs(directory, exist_ok=True)
+        clips = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".wav") and entry.is_file():
+                    stat = entry.stat()
+                    clips.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+                elif entry.name.endswith(".tmp"):
+                    # Left behind by a synthesis interrupted at exit
+                    with contextlib.suppress(OSError):
+                        os.remove(entry.path)
+        with self._lock:
+            self.directory = directory
+            self._entries.clear()
+            for _, key, size in sorted(clips):
+                self._entries[key] = size
+            self.bytes = sum(self._entries.values())
+            self._evict()
+        trace.info("Speech cache at %s holds %d clips (%.1f MB)", directory, len(self._entries),
+                   self.bytes / 1048576)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.wav")
+
+    def get(self, text, lang, voice, pin=False):
+        """Path of the cached clip, marking it most recently used, or None"""
+        key = self.key(text, lang, voice)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if pin:
+                self._pinned[key] += 1
+            path = self.path(key)
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return path
+
+    def temp_path(self, text, lang, voice):
+        """Where to synthesize a clip before handing it to put()"""
+        if self.directory is None:
+            raise RuntimeError("Speech cache has no directory")
+        return os.path.join(self.directory, f"{self.key(text, lang, voice)}.{threading.get_ident()}.tmp")
+
+    def put(self, text, lang, voice, temp_path, pin=False):
+        """Move a synthesized clip into the cache and return its final path"""
+        key = self.key(text, lang, voice)
+        path = self.path(key)
+        os.replace(temp_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self.bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            if pin:
+                self._pinned[key] += 1
+            self._evict()
+        return path
+
+    def release(self, path):
+        """Let the clip at path be evicted again once it has played"""
+        key = os.path.splitext(os.path.basename(path))[0]
+        with self._lock:
+            self._pinned[key] -= 1
+            if self._pinned[key] <= 0:
+                del self._pinned[key]
+            self._evict()
+
+    def _evict(self):
+        if self.bytes <= self.max_bytes:
+            return
+        # Oldest first, skipping clips waiting to be played; the newest clip stays even
+        # when it alone exceeds the budget, it is about to be played
+        for key in list(self._entries):
+            if self.bytes <= self.max_bytes or len(self._entries) <= 1:
+                break
+            if key in self._pinned:
+                continue
+            self.bytes -= self._entries.pop(key)
+            self.evictions += 1
+            with contextlib.suppress(OSError):
+                os.remove(self.path(key))
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+class Pyttsx3Synthesizer:
+    """Offline text-to-speech through pyttsx3 (SAPI5, NSSpeechSynthesizer or eSpeak)
+
+    The engine is not thread-safe, so every call must come from the same
+    thread; SpeechOutput runs them all on its synthesis worker.
+    """
+    def __init__(self, rate=None):
+        self.rate = rate
+        self._engine = None
+
+    @property
+    def available(self):
+        """Whether pyttsx3 is installed"""
+        return importlib.util.find_spec("pyttsx3") is not None
+
+    def _get_engine(self):
+        if self._engine is None:
+            if sys.platform == "win32":
+                # SAPI5 is a COM server, and COM has to be initialised on each thread that uses it
+                import comtypes
+                comtypes.CoInitialize()
+            import pyttsx3
+            self._engine = pyttsx3.init()
+            if self.rate:
+                self._engine.setProperty("rate", self.rate)
+        return self._engine
+
+    def voice_for(self, lang):
+        """Id of an installed voice that speaks lang, or "default" """
+        base = lang.split("-")[0].lower()
+        for voice in self._get_engine().getProperty("voices"):
+            tags = [tag.decode("utf-8", "ignore") if isinstance(tag, bytes) else str(tag)
+                    for tag in (voice.languages or [])]
+            # eSpeak reports b"\x05en-us", SAPI5 only has the language in the id (..._EN-US_ZIRA_11.0)
+            if any(re.split(r"[-_]", tag.strip("\x05").lower())[0] == base for tag in tags) \
+                    or f"_{base}-" in voice.id.lower():
+                return voice.id
+        return "default"
+
+    def synthesize(self, text, lang, voice, path):
+        """Write text spoken with voice to the WAV file at path"""
+        engine = self._get_engine()
+        if voice != "default":
+            engine.setProperty("voice", voice)
+        engine.save_to_file(text, path)
+        engine.runAndWait()
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            raise RuntimeError(f"Speech engine produced no audio for {lang}")
+
+class WavPlayer:
+    """Plays WAV files on the default output device, one at a time"""
+    def __init__(self, chunk_frames=1024):
+        self.chunk_frames = chunk_frames
+        self._audio = None
+
+    def __call__(self, path):
+        """Play the file at path, returning when it has finished"""
+        if self._audio is None:
+            self._audio = pyaudio.PyAudio()
+        with wave.open(path, "rb") as wav:
+            stream = self._audio.open(
+                format=self._audio.get_format_from_width(wav.getsampwidth()),
+                channels=wav.getnchannels(),
+                rate=wav.getframerate(),
+                output=True
+            )
+            try:
+                data = wav.readframes(self.chunk_frames)
+                while data:
+                    stream.write(data)
+                    data = wav.readframes(self.chunk_frames)
+            finally:
+                stream.stop_stream()
+                stream.close()
+
+    def close(self):
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
+
+class SpeechOutput:
+    """Speaks translations sentence by sentence, with synthesis and playback on separate threads
+
+    Each sentence is looked up in the clip cache first, so frequent phrases
+    play at once; the others are synthesized in order on one worker while
+    the sentences before them are already playing. Text longer than
+    max_chars is split (None speaks it in one piece). stop() drops
+    everything queued but not yet playing.
+    """
+    def __init__(self, cache, synthesizer=None, player=None, metrics=None, max_chars=80):
+        self.cache = cache
+        self.synthesizer = synthesizer if synthesizer is not None else Pyttsx3Synthesizer()
+        self.player = player if player is not None else WavPlayer()
+        self.metrics = metrics or PipelineMetrics()
+        self.max_chars = max_chars
+        self.synthesized = 0
+        self._voices = {}
+        self._generation = 0
+        self._synthesis = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="speech-synthesis")
+        self._playback = queue.Queue()
+        self._playback_thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        """Whether a speech engine is installed"""
+        return self.synthesizer.available
+
+    def speak(self, text, lang):
+        """Queue text for playback after anything already queued; never waits for synthesis"""
+        started = time.perf_counter()
+        # Until the voice for lang is known (the synthesis thread looks it up, as the engine belongs
+        # to it) the cache is checked there too
+        voice = self._voices.get(lang)
+        with self._lock:
+            generation = self._generation
+            if self._playback_thread is None:
+                self._playback_thread = threading.Thread(target=self._playback_worker, daemon=True,
+                                                         name="speech-playback")
+                self._playback_thread.start()
+        sentences = split_sentences(text, lang, self.max_chars)
+        for index, sentence in enumerate(sentences):
+            path = self.cache.get(sentence, lang, voice, pin=True) if voice is not None else None
+            if path is not None:
+                self.metrics.increment("speech_cache_hits")
+                clip = concurrent.futures.Future()
+                clip.set_result(path)
+            else:
+                clip = self._synthesis.submit(self._synthesize, sentence, lang, voice, generation)
+            self._playback.put((generation, clip, started if index == 0 else None))
+
+    def _synthesize(self, sentence, lang, voice, generation):
+        if generation != self._generation:
+            return None
+        if voice is None:
+            voice = self._voices.get(lang)
+            if voice is None:
+                voice = self._voices[lang] = self.synthesizer.voice_for(lang)
+            path = self.cache.get(sentence, lang, voice, pin=True)
+            if path is not None:
+                self.metrics.increment("speech_cache_hits")
+                return path
+        elif self.cache.key(sentence, lang, voice) in self.cache:
+            # The same sentence was queued twice before its first synthesis finished
+            return self.cache.get(sentence, lang, voice, pin=True)
+        temp_path = self.cache.temp_path(sentence, lang, voice)
+        try:
+            with self.metrics.time_stage("speech_synthesis"):
+                self.synthesizer.synthesize(sentence, lang, voice, temp_path)
+        except Exception:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+            raise
+        self.synthesized += 1
+        return self.cache.put(sentence, lang, voice, temp_path, pin=True)
+
+    def _playback_worker(self):
+        while True:
+            item = self._playback.get()
+            try:
+                if item is None:
+                    return
+                generation, clip, started = item
+                if generation != self._generation:
+                    continue
+                try:
+                    path = clip.result()
+                except Exception as e:
+                    trace.warning("Speech synthesis failed: %s", e)
+                    continue
+                if path is None or generation != self._generation:
+                    continue
+                if started is not None:
+                    self.metrics.observe("speech_first_audio", time.perf_counter() - started)
+                try:
+                    self.player(path)
+                except Exception as e:
+                    trace.warning("Speech playback failed: %s", e)
+            finally:
+                if item is not None:
+                    # The clip may be evicted again once it has played or been dropped
+                    item[1].add_done_callback(self._release_clip)
+                self._playback.task_done()
+
+    def _release_clip(self, clip):
+        if not clip.cancelled() and clip.exception() is None and clip.result() is not None:
+            self.cache.release(clip.result())
+
+    def wait(self):
+        """Block until everything queued so far has played (or been dropped)"""
+        self._playback.join()
+
+    def stop(self):
+        """Drop queued sentences; the one playing now finishes"""
+        with self._lock:
+            self._generation += 1
+
+    def shutdown(self):
+        """Stop playback and the synthesis worker"""
+        self.stop()
+        self._playback.put(None)
+        self._synthesis.shutdown(wait=False, cancel_futures=True)
+        close = getattr(self.player, "close", None)
+        if close is not None:
+            close()
+
+class CaptureSession:
+    """One input device with its own target language and voice activity settings
+
+    `energy_threshold=None` calibrates against ambient noise when capture
+    starts; otherwise the given threshold is used as is.
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self, name, device_index=None, target_lang="hi", energy_threshold=None, pause_threshold=0.8,
+                 phrase_time_limit=10, microphone_factory=sr.Microphone):
+        self.session_id = next(self._ids)
+        self.name = name
+        self.device_index = device_index
+        self.target_lang = target_lang
+        self.phrase_time_limit = phrase_time_limit
+        self.microphone_factory = microphone_factory
+        # A recognizer per session keeps VAD thresholds independent between devices
+        self.recognizer = sr.Recognizer()
+        self.recognizer.pause_threshold = pause_threshold
+        if energy_threshold is not None:
+            self.recognizer.energy_threshold = energy_threshold
+            self.recognizer.dynamic_energy_threshold = False
+        self.calibrate = energy_threshold is None
+        self.language_tracker = SourceLanguageTracker()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    @property
+    def latency_stage(self):
+        """Metrics stage holding this session's end-of-speech to result latency"""
+        return f"session:{self.name}"
+
+    def start(self, coordinator):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._capture, args=(coordinator,), daemon=True,
+                                       name=f"capture-{self.session_id}")
+        self.thread.start()
+
+    def stop(self, timeout=1.0):
+        self.stop_event.set()
+        if self.thread and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    def _capture(self, coordinator):
+        """Listen on this session's device and hand each phrase to the shared workers"""
+        try:
+            with self.microphone_factory(device_index=self.device_index) as source:
+                if self.calibrate:
+                    self.recognizer.adjust_for_ambient_noise(source)
+                while not self.stop_event.is_set():
+                    try:
+                        listen_start = time.perf_counter()
+                        audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=self.phrase_time_limit)
+                        coordinator.metrics.observe("listen", time.perf_counter() - listen_start)
+                        coordinator.submit(self, audio)
+                    except sr.WaitTimeoutError:
+                        continue
+        except Exception as e:
+            trace.error("Capture error on %s: %s", self.name, e)
+            coordinator.report_error(self, e)
+
+class MultiSourceCoordinator:
+    """Recognition, translation and history workers shared by several capture sessions
+
+    Captured phrases flow through a recognition pool and a translation pool,
+    each fed by a FairScheduler, and finally a single history writer thread so
+    SQLite sees one writer however many sources are live. With `fair=False`
+    all sessions share one FIFO queue (used for benchmarking).
+    """
+    def __init__(self, pipeline, on_result=None, on_error=None, save=None, recognize_workers=2,
+                 translate_workers=4, max_pending=32, fair=True, on_partial=None):
+        self.pipeline = pipeline
+        self.metrics = pipeline.metrics
+        self.on_result = on_result
+        self.on_partial = on_partial
+        self.on_error = on_error
+        self.save = save or pipeline.save_to_history
+        self.fair = fair
+        self.sessions = {}
+        self.recognize_queue = FairScheduler(max_pending)
+        self.translate_queue = FairScheduler(max_pending)
+        self.history_queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.recognize_threads = [
+            threading.Thread(target=self._recognize_worker, daemon=True, name=f"recognize-{n}")
+            for n in range(recognize_workers)
+        ]
+        self.translate_threads = [
+            threading.Thread(target=self._translate_worker, daemon=True, name=f"translate-{n}")
+            for n in range(translate_workers)
+        ]
+        self.history_thread = threading.Thread(target=self._history_worker, daemon=True, name="history-writer")
+        for thread in self.recognize_threads + self.translate_threads + [self.history_thread]:
+            thread.start()
+
+    def _key(self, session):
+        return session.session_id if self.fair else None
+
+    def add_session(self, session, start=True):
+        """Register a session and start capturing from its device"""
+        with self._lock:
+            self.sessions[session.session_id] = session
+        if start:
+            session.start(self)
+        trace.info("Added capture source %s (device %s, target %s)", session.name, session.device_index,
+                   session.target_lang)
+        return session
+
+    def remove_session(self, session_id):
+        """Stop a session's capture and drop its queued work"""
+        with self._lock:
+            session = self.sessions.pop(session_id, None)
+        if session is None:
+            return
+        session.stop()
+        self.recognize_queue.discard(self._key(session))
+        self.translate_queue.discard(self._key(session))
+        trace.info("Removed capture source %s", session.name)
+
+    def submit(self, session, audio):
+        """Queue one captured phrase from a session"""
+        self.metrics.increment("utterances")
+        job = {"session": session, "audio": audio, "captured": time.perf_counter(),
+               "deadline": Deadline(self.pipeline.latency_budget)}
+        if not self.recognize_queue.put(self._key(session), job):
+            self.metrics.increment("dropped_phrases")
+            trace.warning("Source %s is outrunning the workers; dropped its oldest phrase", session.name)
+
+    def report_error(self, session, error):
+        if self.on_error:
+            self.on_error(session, error)
+
+    def depth(self):
+        """Phrases waiting for recognition, translation and the history writer"""
+        return self.recognize_queue.depth() + self.translate_queue.depth() + self.history_queue.qsize()
+
+    def _recognize_worker(self):
+        while True:
+            job = self.recognize_queue.get()
+            if job is None:
+                return
+            session = job["session"]
+            try:
+                with self.metrics.time_stage("recognize"):
+                    job["source_text"] = self.pipeline.recognize(job["audio"])
+                with self.metrics.time_stage("detect"):
+                    job["source_lang"] = self.pipeline.resolve_source_language(
+                        job["source_text"], session.language_tracker
+                    )
+            except sr.UnknownValueError:
+                continue
+            except Exception as e:
+                self.metrics.increment("errors")
+                trace.warning("Recognition failed for %s: %s", session.name, e)
+                self.report_error(session, e)
+                continue
+            job["audio"] = None
+            self.translate_queue.put(self._key(session), job)
+
+    def _translate_worker(self):
+        while True:
+            job = self.translate_queue.get()
+            if job is None:
+                return
+            session = job["session"]
+            deadline = job["deadline"]
+            # Time spent queued must not leave translation with no time at all
+            if deadline.remaining() < self.pipeline.min_translate_budget:
+                deadline = Deadline(self.pipeline.min_translate_budget)
+            try:
+                with self.metrics.time_stage("translate"):
+                    translated_text, used_fallback, detected_lang, degraded = self.pipeline.translate_detected(
+                        job["source_text"], job["source_lang"], session.target_lang, deadline,
+                        on_partial=(lambda partial: self.on_partial(
+                            session, job["source_text"], job["source_lang"], partial, session.target_lang
+                        )) if self.on_partial else None
+                    )
+                if job["source_lang"] == "auto":
+                    job["source_lang"] = self.pipeline.confirm_source_language(
+                        job["source_text"], detected_lang, session.language_tracker
+                    )
+            except Exception as e:
+                self.metrics.increment("errors")
+                trace.warning("Translation failed for %s: %s", session.name, e)
+                self.report_error(session, e)
+                continue
+            latency = time.perf_counter() - job["captured"]
+            self.metrics.observe("total", latency)
+            self.metrics.observe(session.latency_stage, latency)
+            result = (job["source_text"], job["source_lang"], translated_text, session.target_lang)
+            if self.on_result:
+                self.on_result(session, *result)
+            self.history_queue.put(result + (used_fallback, degraded))
+
+    def _history_worker(self):
+        while True:
+            result = self.history_queue.get()
+            if result is None:
+                return
+            try:
+                with self.metrics.time_stage("db_write"):
+                    self.save(*result)
+            except Exception as e:
+                self.metrics.increment("errors")
+                trace.error("History write failed: %s", e)
+
+    def shutdown(self, timeout=1.0):
+        """Stop every session and let the workers exit once queued phrases are done"""
+        with self._lock:
+            session_ids = list(self.sessions)
+        for session_id in session_ids:
+            self.remove_session(session_id)
+        # Stop each pool only after the one feeding it has drained
+        self.recognize_queue.close()
+        for thread in self.recognize_threads:
+            thread.join(timeout)
+        self.translate_queue.close()
+        for thread in self.translate_threads:
+            thread.join(timeout)
+        self.history_queue.put(None)
+        self.history_thread.join(timeout)
+
+# Choices on the Statistics tab and the number of days each covers (None for all time)
+STATISTICS_PERIODS = {"Last 7 days": 7, "Last 30 days": 30, "Last 365 days": 365, "All time": None}
+
+# Choices for replaying a recording and the speed passed to SessionRecording.replay (None for no pauses)
+REPLAY_SPEEDS = {"Real time": 1.0, "Max speed": None}
+
+def _env_number(name, default, convert, valid, expected):
+    """Numeric setting from the environment, or default (with a warning) when unset, malformed or not valid"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        number = convert(value)
+    except ValueError:
+        number = None
+    if number is None or not valid(number):
+        trace.warning("%s must be %s, got %r; using %s", name, expected, value, default)
+        return default
+    return number
+
 class VoiceTranslatorApp:
     def __init__(self, root):
         self.root = root
@@ -57,10 +3223,66 @@ class VoiceTranslatorApp:
         # Initialize components
         self.recognizer = sr.Recognizer()
         self.translator = Translator()
+        self.metrics = PipelineMetrics()
+        # Similarity an earlier translation needs to be reused instead of asking the service ("off" disables)
+        if os.environ.get("VOICE_TRANSLATOR_MEMORY_THRESHOLD") == "off":
+            memory_threshold = None
+        else:
+            memory_threshold = _env_number("VOICE_TRANSLATOR_MEMORY_THRESHOLD", 0.85, float, lambda v: 0 <= v <= 1,
+                                           "off or a number between 0 and 1")
+        # Worker processes for recognition and detection, so they do not compete with the UI for the GIL
+        processes = _env_number("VOICE_TRANSLATOR_PROCESSES", 0, int, lambda n: n >= 0, "a whole number of at least 0")
+        offload = ProcessOffload(processes, recognize_function=recognize_google_audio) if processes > 0 else None
+        self.pipeline = TranslationPipeline(
+            recognizer=self.recognizer,
+            metrics=self.metrics,
+            detect_mode=os.environ.get("VOICE_TRANSLATOR_DETECT", "local"),
+            memory_threshold=memory_threshold,
+            offload=offload
+        )
+        if offload is not None:
+            # Start the workers while the window is being built rather than on the first utterance
+            threading.Thread(target=offload.warm, daemon=True, name="offload-warm").start()
+        self.metrics_exporter = None
+        self.transcript_log = None
         self.is_listening = False
         self.preferred_lang = tk.StringVar(value="hi")  # Default to Hindi
         self.last_audio = None  # Store last audio for processing when stopped
         
+        # Speech segmentation profile, optionally tuned to keep results within the target latency
+        profile = os.environ.get("VOICE_TRANSLATOR_PROFILE", "balanced")
+        if profile not in CAPTURE_PROFILES:
+            trace.warning("Unknown speech profile %r in VOICE_TRANSLATOR_PROFILE, using balanced", profile)
+            profile = "balanced"
+        self.capture_profile = tk.StringVar(value=profile)
+        self.auto_tune = tk.BooleanVar(value=False)
+        self.latency_controller = LatencyController(
+            self.capture_profile.get(),
+            target_latency=_env_number("VOICE_TRANSLATOR_TARGET_LATENCY", 3.0, float, lambda v: 0 < v < float("inf"),
+                                       "a positive number of seconds")
+        )
+        self._phrases_in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        
+        # Optional spoken output; clips are cached in the data folder once setup_db has found it
+        self.speak_results = tk.BooleanVar(value=False)
+        self._speaking = False
+        
+        # Opt-in recording of captured audio and results; the folder is set up by setup_db
+        self.record_session = tk.BooleanVar(value=False)
+        self._recording = False
+        self.recorder = None
+        # Replays are measured apart from live traffic; this holds the metrics of the latest one
+        self.replay_speed = tk.StringVar(value="Real time")
+        self.replay_metrics = None
+        self._replay_label = None
+        self.speech = SpeechOutput(
+            SpeechClipCache(max_bytes=_env_number("VOICE_TRANSLATOR_SPEECH_CACHE_MB", SPEECH_CACHE_MB, int,
+                                                  lambda n: n >= 1, "a whole number of megabytes, at least 1")
+                            * 1048576),
+            metrics=self.metrics
+        )
+        
         # Setup thread control
         self.listening_thread = None
         self.listening_stop_event = threading.Event()
@@ -71,12 +3293,47 @@ class VoiceTranslatorApp:
         self.button_font = font.Font(family="Segoe UI", size=10, weight="bold")
         self.footer_font = font.Font(family="Segoe UI", size=8, slant="italic")
         
+        # All UI changes from worker threads go through one coalescing queue
+        self.ui_updates = UIUpdateQueue(self.root)
+        
+        # Period shown on the Statistics tab
+        self.statistics_period = tk.StringVar(value="Last 30 days")
+        
+        # History reads and deletes run here, one at a time, never on the Tk thread
+        self.db_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-db")
+        
+        # Phrases from the main microphone are processed by a fixed pool; more wait their turn
+        self.phrase_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=_env_number("VOICE_TRANSLATOR_PHRASE_WORKERS", 4, int, lambda n: n >= 1,
+                                    "a whole number of at least 1"),
+            thread_name_prefix="phrase"
+        )
+        
+        # Extra capture sources share one set of recognition, translation and history workers
+        self.sources = MultiSourceCoordinator(
+            self.pipeline,
+            on_result=self.on_source_result,
+            on_error=self.on_source_error,
+            save=self.save_to_history,
+            on_partial=self.on_source_partial
+        )
+        
         # Setup UI
         self.setup_ui()
+        self.ui_updates.start()
         
         # Setup window close event
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
+    @property
+    def db_path(self):
+        """Database path shared with the translation pipeline"""
+        return self.pipeline.db_path
+
+    @db_path.setter
+    def db_path(self, value):
+        self.pipeline.db_path = value
+
     def setup_ui(self):
         """Setup the premium UI with dark midnight theme"""
         # Create a gradient background using Canvas
@@ -108,6 +3365,14 @@ class VoiceTranslatorApp:
         self.history_frame = tk.Frame(self.notebook, bg="#1A1A2A")
         self.notebook.add(self.history_frame, text="History")
         
+        # Diagnostics Tab
+        self.diagnostics_frame = tk.Frame(self.notebook, bg="#1A1A2A")
+        self.notebook.add(self.diagnostics_frame, text="Diagnostics")
+        
+        # Statistics Tab
+        self.statistics_frame = tk.Frame(self.notebook, bg="#1A1A2A")
+        self.notebook.add(self.statistics_frame, text="Statistics")
+        
         # Configure notebook style
         style = ttk.Style()
         style.configure("TNotebook", background="#1A1A2A")
@@ -122,7 +3387,11 @@ class VoiceTranslatorApp:
         
         self.setup_translator_tab()
         self.setup_history_tab()
+        self.setup_diagnostics_tab()
+        self.setup_statistics_tab()
         self.setup_db()
+        # Only now that the database is set up, so the background load never has to set it up itself
+        self.load_history()
         
         # Add credits at the bottom
         credits_frame = tk.Frame(self.root, bg="#121212")
@@ -192,6 +3461,25 @@ class VoiceTranslatorApp:
         self.process_last_button.bind("<Enter>", self.on_process_button_enter)
         self.process_last_button.bind("<Leave>", self.on_process_button_leave)
         
+        # Additional capture sources (booth microphones, line inputs)
+        sources_button = tk.Button(
+            input_frame,
+            text="🎧 Sources",
+            command=self.open_sources_dialog,
+            font=self.button_font,
+            bg="#9370DB",
+            fg="white",
+            activebackground="#7B68EE",
+            activeforeground="white",
+            bd=0,
+            relief="flat",
+            padx=20,
+            pady=10
+        )
+        sources_button.pack(side=tk.LEFT, padx=10)
+        sources_button.bind("<Enter>", self.on_refresh_button_enter)
+        sources_button.bind("<Leave>", self.on_refresh_button_leave)
+        
         # Language selection
         lang_label = tk.Label(
             input_frame,
@@ -213,6 +3501,78 @@ class VoiceTranslatorApp:
         lang_combo.pack(side=tk.LEFT, padx=10)
         lang_combo.set("hi: Hindi")
         
+        # Speech profile selection
+        profile_frame = tk.Frame(self.translator_frame, bg="#1A1A2A")
+        profile_frame.pack(fill=tk.X, padx=20)
+        
+        profile_label = tk.Label(
+            profile_frame,
+            text="Speech Profile:",
+            font=self.normal_font,
+            bg="#1A1A2A",
+            fg="#E0E0E0"
+        )
+        profile_label.pack(side=tk.LEFT, padx=10)
+        
+        profile_combo = ttk.Combobox(
+            profile_frame,
+            textvariable=self.capture_profile,
+            values=list(CAPTURE_PROFILES),
+            state="readonly",
+            width=14,
+            font=self.normal_font
+        )
+        profile_combo.pack(side=tk.LEFT, padx=10)
+        profile_combo.bind("<<ComboboxSelected>>", self.on_profile_selected)
+        
+        auto_tune_check = tk.Checkbutton(
+            profile_frame,
+            text="Auto-tune to keep up",
+            variable=self.auto_tune,
+            command=self.on_auto_tune_toggled,
+            font=self.normal_font,
+            bg="#1A1A2A",
+            fg="#E0E0E0",
+            selectcolor="#2A2A3A",
+            activebackground="#1A1A2A",
+            activeforeground="#FFFFFF",
+            bd=0,
+            highlightthickness=0
+        )
+        auto_tune_check.pack(side=tk.LEFT, padx=10)
+        
+        speak_check = tk.Checkbutton(
+            profile_frame,
+            text="🔊 Speak translations",
+            variable=self.speak_results,
+            command=self.on_speak_toggled,
+            font=self.normal_font,
+            bg="#1A1A2A",
+            fg="#E0E0E0",
+            selectcolor="#2A2A3A",
+            activebackground="#1A1A2A",
+            activeforeground="#FFFFFF",
+            bd=0,
+            highlightthickness=0
+        )
+        speak_check.pack(side=tk.LEFT, padx=10)
+        
+        record_check = tk.Checkbutton(
+            profile_frame,
+            text="⏺ Record session",
+            variable=self.record_session,
+            command=self.on_record_toggled,
+            font=self.normal_font,
+            bg="#1A1A2A",
+            fg="#E0E0E0",
+            selectcolor="#2A2A3A",
+            activebackground="#1A1A2A",
+            activeforeground="#FFFFFF",
+            bd=0,
+            highlightthickness=0
+        )
+        record_check.pack(side=tk.LEFT, padx=10)
+        
         # Style the combobox for midnight theme
         style = ttk.Style()
         style.configure("TCombobox", 
@@ -267,6 +3627,13 @@ class VoiceTranslatorApp:
         self.translated_text.insert("1.0", "Translated Text")
         self.translated_text.config(state="disabled")
         
+        # Rolling transcript over both text displays
+        self.transcript = TranscriptView(
+            self.source_text,
+            self.translated_text,
+            max_lines=int(os.environ.get("VOICE_TRANSLATOR_TRANSCRIPT_LINES", "500"))
+        )
+        
     def setup_history_tab(self):
         """Setup the history tab UI with midnight dark theme"""
         # Treeview for history
@@ -348,7 +3715,322 @@ class VoiceTranslatorApp:
         clear_button.bind("<Enter>", self.on_clear_button_enter)
         clear_button.bind("<Leave>", self.on_clear_button_leave)
         
-        self.load_history()
+        # Loading indicator and entry count
+        self.history_status_label = tk.Label(
+            button_frame,
+            text="",
+            font=self.normal_font,
+            bg="#1A1A2A",
+            fg="#E0E0E0"
+        )
+        self.history_status_label.pack(side=tk.LEFT, padx=10)
+        
+        self.history_loader = HistoryLoader(
+            self.history_tree,
+            self.ui_updates,
+            self.db_executor,
+            on_status=lambda text: self.history_status_label.config(text=text)
+        )
+        
+    def setup_diagnostics_tab(self):
+        """Setup the diagnostics tab showing per-stage latency and pipeline counters"""
+        columns = ("Stage", "Count", "Mean (ms)", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Max (ms)")
+        self.diagnostics_tree = ttk.Treeview(
+            self.diagnostics_frame,
+            columns=columns,
+            show="headings",
+            height=len(PipelineMetrics.STAGES)
+        )
+        
+        for col in columns:
+            self.diagnostics_tree.heading(col, text=col)
+            self.diagnostics_tree.column(col, width=120, anchor="center")
+        
+        self.diagnostics_tree.pack(fill=tk.X, padx=20, pady=20)
+        
+        # Counters summary
+        self.counters_label = tk.Label(
+            self.diagnostics_frame,
+            text="",
+            font=self.normal_font,
+            bg="#1A1A2A",
+            fg="#00CED1",  # Cyan to match status text
+            justify=tk.LEFT,
+            wraplength=900
+        )
+        self.counters_label.pack(fill=tk.X, padx=20)
+        
+        # Button frame
+        button_frame = tk.Frame(self.diagnostics_frame, bg="#1A1A2A")
+        button_frame.pack(fill=tk.X, pady=10)
+        
+        reset_button = tk.Button(
+            button_frame,
+            text="♻️ Reset Metrics",
+            command=self.reset_metrics,
+            font=self.button_font,
+            bg="#9370DB",
+            fg="white",
+            activebackground="#7B68EE",
+            activeforeground="white",
+            bd=0,
+            relief="flat",
+            padx=20,
+            pady=10
+        )
+        reset_button.pack(side=tk.LEFT, padx=20, pady=10)
+        reset_button.bind("<Enter>", self.on_refresh_button_enter)
+        reset_button.bind("<Leave>", self.on_refresh_button_leave)
+        
+        self.export_button = tk.Button(
+            button_frame,
+            text="🌐 Start Metrics Endpoint",
+            command=self.toggle_metrics_exporter,
+            font=self.button_font,
+            bg="#9370DB",
+            fg="white",
+            activebackground="#7B68EE",
+            activeforeground="white",
+            bd=0,
+            relief="flat",
+            padx=20,
+            pady=10
+        )
+        self.export_button.pack(side=tk.LEFT, padx=20, pady=10)
+        self.export_button.bind("<Enter>", self.on_refresh_button_enter)
+        self.export_button.bind("<Leave>", self.on_refresh_button_leave)
+        
+        self.export_label = tk.Label(
+            button_frame,
+            text="",
+            font=self.normal_font,
+            bg="#1A1A2A",
+            fg="#E0E0E0"
+        )
+        self.export_label.pack(side=tk.LEFT, padx=10)
+        
+        dump_button = tk.Button(
+            button_frame,
+            text="📝 Dump Trace",
+            command=self.dump_trace,
+            font=self.button_font,
+            bg="#9370DB",
+            fg="white",
+            activebackground="#7B68EE",
+            activeforeground="white",
+            bd=0,
+            relief="flat",
+            padx=20,
+            pady=10
+        )
+        dump_button.pack(side=tk.RIGHT, padx=20, pady=10)
+        dump_button.bind("<Enter>", self.on_refresh_button_enter)
+        dump_button.bind("<Leave>", self.on_refresh_button_leave)
+        
+        replay_button = tk.Button(
+            button_frame,
+            text="⏯ Replay Recording",
+            command=self.replay_recording,
+            font=self.button_font,
+            bg="#9370DB",
+            fg="white",
+            activebackground="#7B68EE",
+            activeforeground="white",
+            bd=0,
+            relief="flat",
+            padx=20,
+            pady=10
+        )
+        replay_button.pack(side=tk.RIGHT, padx=20, pady=10)
+        replay_button.bind("<Enter>", self.on_refresh_button_enter)
+        replay_button.bind("<Leave>", self.on_refresh_button_leave)
+        
+        replay_speed_combo = ttk.Combobox(
+            button_frame,
+            textvariable=self.replay_speed,
+            values=list(REPLAY_SPEEDS),
+            state="readonly",
+            width=10,
+            font=self.normal_font
+        )
+        replay_speed_combo.pack(side=tk.RIGHT, pady=10)
+        
+        # Start the endpoint automatically when a port is configured
+        if os.environ.get("VOICE_TRANSLATOR_METRICS_PORT"):
+            self.toggle_metrics_exporter()
+        
+        self.refresh_diagnostics()
+        
+    def setup_statistics_tab(self):
+        """Setup the statistics tab with daily usage per language pair"""
+        period_frame = tk.Frame(self.statistics_frame, bg="#1A1A2A")
+        period_frame.pack(fill=tk.X, padx=20, pady=(20, 0))
+        
+        period_label = tk.Label(
+            period_frame,
+            text="Period:",
+            font=self.normal_font,
+            bg="#1A1A2A",
+            fg="#E0E0E0"
+        )
+        period_label.pack(side=tk.LEFT, padx=10)
+        
+        period_combo = ttk.Combobox(
+            period_frame,
+            textvariable=self.statistics_period,
+            values=list(STATISTICS_PERIODS),
+            state="readonly",
+            width=14,
+            font=self.normal_font
+        )
+        period_combo.pack(side=tk.LEFT, padx=10)
+        period_combo.bind("<<ComboboxSelected>>", lambda event: self.refresh_statistics())
+        
+        # Totals for the period
+        self.statistics_label = tk.Label(
+            self.statistics_frame,
+            text="",
+            font=self.normal_font,
+            bg="#1A1A2A",
+            fg="#00CED1",  # Cyan to match status text
+            justify=tk.LEFT,
+            wraplength=900
+        )
+        self.statistics_label.pack(fill=tk.X, padx=20, pady=10)
+        
+        columns = ("Day", "Source Language", "Target Language", "Translations", "Characters", "Failures", "Fallbacks")
+        self.statistics_tree = ttk.Treeview(
+            self.statistics_frame,
+            columns=columns,
+            show="headings"
+        )
+        
+        for col in columns:
+            self.statistics_tree.heading(col, text=col)
+            self.statistics_tree.column(col, width=120, anchor="center")
+        
+        self.statistics_tree.pack(fill=tk.BOTH, expand=True, padx=20)
+        
+        # Button frame
+        button_frame = tk.Frame(self.statistics_frame, bg="#1A1A2A")
+        button_frame.pack(fill=tk.X, pady=10)
+        
+        for text, command in (("🔄 Refresh Statistics", self.refresh_statistics),
+                              ("💾 Export JSON", self.export_statistics),
+                              ("🛠️ Rebuild from History", self.rebuild_statistics)):
+            button = tk.Button(
+                button_frame,
+                text=text,
+                command=command,
+                font=self.button_font,
+                bg="#9370DB",
+                fg="white",
+                activebackground="#7B68EE",
+                activeforeground="white",
+                bd=0,
+                relief="flat",
+                padx=20,
+                pady=10
+            )
+            button.pack(side=tk.LEFT, padx=20, pady=10)
+            button.bind("<Enter>", self.on_refresh_button_enter)
+            button.bind("<Leave>", self.on_refresh_button_leave)
+        
+        # Statistics are read when the tab is opened
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        
+    def refresh_diagnostics(self):
+        """Redraw the diagnostics view and schedule the next refresh"""
+        # Only redraw while the Diagnostics tab is visible
+        if self.notebook.index("current") == 2:
+            snapshot = self.metrics.snapshot()
+            for item in self.diagnostics_tree.get_children():
+                self.diagnostics_tree.delete(item)
+            for stage, stats in snapshot["stages"].items():
+                self.diagnostics_tree.insert("", "end", values=(
+                    stage,
+                    stats["count"],
+                    f"{stats['mean_ms']:.1f}",
+                    f"{stats['p50_ms']:.1f}",
+                    f"{stats['p95_ms']:.1f}",
+                    f"{stats['p99_ms']:.1f}",
+                    f"{stats['max_ms']:.1f}"
+                ))
+            counters_text = "   ".join(
+                f"{name.replace('_', ' ').title()}: {value}" for name, value in snapshot["counters"].items()
+            )
+            ui_text = (f"UI updates posted: {self.ui_updates.posted}   applied: {self.ui_updates.applied}   "
+                       f"coalesced: {self.ui_updates.coalesced}   pending: {self.ui_updates.depth()}")
+            sources_text = (f"Extra sources: {len(self.sources.sessions)}   "
+                            f"queued phrases: {self.sources.depth()}")
+            phrase_report = self.pipeline.phrase_table.memory_report()
+            phrases_text = (f"Phrase table: {phrase_report['entries']} entries in {len(phrase_report['pairs'])} "
+                            f"language pairs, about {phrase_report['bytes'] / 1048576:.1f} MB   "
+                            f"Translation memory: {self.pipeline.translation_memory.entries} entries")
+            controller = self.latency_controller
+            estimate = controller.estimate()
+            profile_text = (f"Speech profile: {controller.profile}{' (auto-tuned)' if controller.auto_tune else ''}   "
+                            f"pause: {controller.settings['pause_threshold']:.2f} s   "
+                            f"phrase limit: {controller.settings['phrase_time_limit']} s   "
+                            f"estimated latency: {'-' if estimate is None else f'{estimate:.2f} s'} "
+                            f"(target {controller.target_latency:.1f} s)")
+            speech_cache = self.speech.cache
+            speech_text = (f"Speech cache: {len(speech_cache)} clips, {speech_cache.bytes / 1048576:.1f} MB   "
+                           f"hits: {speech_cache.hits}   misses: {speech_cache.misses}   "
+                           f"evicted: {speech_cache.evictions}")
+            text = f"{counters_text}\n{ui_text}\n{sources_text}\n{phrases_text}\n{profile_text}\n{speech_text}"
+            if self.replay_metrics is not None:
+                # Kept out of the live figures above and the metrics endpoint
+                replay = self.replay_metrics.snapshot()
+                stages_text = "   ".join(
+                    f"{stage}: p50 {stats['p50_ms']:.0f} ms, p95 {stats['p95_ms']:.0f} ms"
+                    for stage, stats in replay["stages"].items()
+                    if stage in ("recognize", "translate", "total") and stats["count"]
+                )
+                text += (f"\nLast replay ({self._replay_label}): "
+                         f"{replay['stages'].get('total', {}).get('count', 0)} segments   "
+                         f"errors: {replay['counters']['errors']}   fallbacks: {replay['counters']['fallbacks']}   "
+                         f"{stages_text}")
+            self.counters_label.config(text=text)
+        self.root.after(1000, self.refresh_diagnostics)
+        
+    def reset_metrics(self):
+        """Clear all recorded latencies and counters"""
+        self.metrics.reset()
+        
+    def dump_trace(self):
+        """Write the recent trace buffer to a file and tell the user where it is"""
+        try:
+            path = trace.dump()
+        except OSError as e:
+            messagebox.showerror("Trace Error", f"Could not write trace dump: {e}")
+            return
+        if path:
+            messagebox.showinfo("Trace Dump", f"Recent trace events written to:\n{path}")
+        else:
+            messagebox.showinfo("Trace Dump", "Recent trace events written to the console")
+        
+    def toggle_metrics_exporter(self):
+        """Start or stop the local Prometheus metrics endpoint"""
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+            self.metrics_exporter = None
+            self.export_button.config(text="🌐 Start Metrics Endpoint")
+            self.export_label.config(text="")
+            return
+        
+        try:
+            port = int(os.environ.get("VOICE_TRANSLATOR_METRICS_PORT", "9464"))
+            exporter = MetricsExporter(self.metrics, port=port)
+            exporter.start()
+        except (OSError, ValueError) as e:
+            trace.warning("Could not start metrics endpoint: %s", e)
+            messagebox.showerror("Metrics Error", f"Could not start metrics endpoint: {e}")
+            return
+        
+        self.metrics_exporter = exporter
+        self.export_button.config(text="🛑 Stop Metrics Endpoint")
+        self.export_label.config(text=exporter.url)
         
     def get_resource_path(self, relative_path):
         """Get absolute path to resource, works for dev and for PyInstaller"""
@@ -358,20 +4040,20 @@ class VoiceTranslatorApp:
             # Check if running as PyInstaller executable
             if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
                 base_path = str(sys._MEIPASS)
-                print(f"Running as PyInstaller executable, base path: {base_path}")
+                trace.debug("Running as PyInstaller executable, base path: %s", base_path)
             else:
                 # Running as script
                 base_path = str(os.path.dirname(os.path.abspath(__file__)))
-                print(f"Running as script, base path: {base_path}")
+                trace.debug("Running as script, base path: %s", base_path)
         except Exception as e:
             # Fallback if everything fails
             base_path = str(os.getcwd())
-            print(f"Error determining base path, using current directory: {base_path}, error: {e}")
+            trace.warning("Error determining base path, using current directory: %s, error: %s", base_path, e)
             
         # Convert to string to ensure type compatibility
         rel_path_str = str(relative_path)
         result_path = os.path.join(base_path, rel_path_str)
-        print(f"Resource path resolved: {result_path} for relative path: {relative_path}")
+        trace.debug("Resource path resolved: %s for relative path: %s", result_path, relative_path)
         return result_path
     
     def setup_db(self):
@@ -388,9 +4070,9 @@ class VoiceTranslatorApp:
             try:
                 # For PyInstaller - try to create data folder next to the executable first
                 exe_dir = os.path.dirname(sys.executable)
-                print(f"Executable directory: {exe_dir}")
+                trace.info("Executable directory: %s", exe_dir)
                 potential_data_dir = os.path.join(exe_dir, "data")
-                print(f"Trying to create data directory at: {potential_data_dir}")
+                trace.info("Trying to create data directory at: %s", potential_data_dir)
                 
                 try:
                     os.makedirs(potential_data_dir, exist_ok=True)
@@ -400,47 +4082,47 @@ class VoiceTranslatorApp:
                         f.write("test")
                     os.remove(test_file)
                     data_dir = potential_data_dir
-                    print(f"Successfully created data directory next to executable at {data_dir}")
+                    trace.info("Successfully created data directory next to executable at %s", data_dir)
                 except (PermissionError, OSError):
-                    print("Cannot write to executable directory, will try user directory")
+                    trace.warning("Cannot write to executable directory, will try user directory")
                     raise PermissionError("Cannot write to executable directory")
             except Exception as e:
-                print(f"Falling back to user directory due to: {e}")
+                trace.warning("Falling back to user directory due to: %s", e)
                 # Use user directory as fallback
                 home_path = str(os.path.expanduser("~"))
                 documents_dir = os.path.join(home_path, "Documents", "VoiceTranslatorPro")
                 try:
                     os.makedirs(documents_dir, exist_ok=True)
                     data_dir = str(documents_dir)
-                    print(f"Created data directory in user Documents folder: {data_dir}")
+                    trace.info("Created data directory in user Documents folder: %s", data_dir)
                 except Exception as doc_error:
                     # Final fallback - use temporary directory
-                    print(f"Could not use Documents folder: {doc_error}, trying temp directory")
+                    trace.warning("Could not use Documents folder: %s, trying temp directory", doc_error)
                     import tempfile
                     temp_dir = str(tempfile.gettempdir())
                     data_dir = os.path.join(temp_dir, "VoiceTranslatorPro")
                     os.makedirs(data_dir, exist_ok=True)
-                    print(f"Using temporary directory for data: {data_dir}")
+                    trace.info("Using temporary directory for data: %s", data_dir)
         else:
             # Normal mode - create in application directory
             try:
                 base_dir = os.path.dirname(os.path.abspath(__file__))
                 data_dir = os.path.join(base_dir, "data")
                 os.makedirs(data_dir, exist_ok=True)
-                print(f"Created data directory in application folder: {data_dir}")
+                trace.info("Created data directory in application folder: %s", data_dir)
             except Exception as app_error:
                 # Fallback - use user's home directory
-                print(f"Could not create data directory in app folder: {app_error}")
+                trace.warning("Could not create data directory in app folder: %s", app_error)
                 home_path = str(os.path.expanduser("~"))
                 data_dir = os.path.join(home_path, "VoiceTranslatorPro")
                 os.makedirs(data_dir, exist_ok=True)
-                print(f"Created data directory in user home folder: {data_dir}")
+                trace.info("Created data directory in user home folder: %s", data_dir)
         
         # If we still don't have a data_dir, something went really wrong
         if not data_dir:
             error_msg = "Could not create a data directory in any location"
-            print(error_msg)
-            messagebox.showerror("Critical Error", error_msg)
+            trace.error("%s", error_msg)
+            self.show_error("Critical Error", error_msg)
             self.db_path = None
             return
         
@@ -448,7 +4130,36 @@ class VoiceTranslatorApp:
         # Convert to string to ensure consistent type
         data_dir_str = str(data_dir)
         self.db_path = os.path.join(data_dir_str, "translation_history.db")
-        print(f"Database path set to: {self.db_path}")
+        trace.info("Database path set to: %s", self.db_path)
+        
+        # Trace dumps (on error or on demand) go next to the database
+        trace.dump_dir = data_dir_str
+        
+        # The full session transcript is kept on disk next to the database too
+        if self.transcript_log is None:
+            self.transcript_log = TranscriptLog(os.path.join(data_dir_str, "transcripts"))
+        
+        # Phrase tables (<src>-<dest>.tsv) are read from the data folder and reloaded when edited
+        phrase_dir = os.path.join(data_dir_str, "phrases")
+        try:
+            os.makedirs(phrase_dir, exist_ok=True)
+        except OSError as e:
+            trace.warning("Could not create phrase table folder: %s", e)
+        if self.pipeline.phrase_table.directory != phrase_dir:
+            self.pipeline.phrase_table.directory = phrase_dir
+            self.pipeline.phrase_table.reload()
+        
+        # Recorded sessions (raw audio plus an index of segments and results) for replay
+        if self.recorder is None:
+            self.recorder = SessionRecorder(os.path.join(data_dir_str, "recordings"))
+        
+        # Synthesized speech is kept so repeated phrases play without synthesizing again
+        speech_dir = os.path.join(data_dir_str, "speech_cache")
+        if self.speech.cache.directory != speech_dir:
+            try:
+                self.speech.cache.set_directory(speech_dir)
+            except OSError as e:
+                trace.warning("Could not open speech cache folder: %s", e)
         
         # Store the db_path for later use but don't open connection yet
         # We'll create a new connection in each thread when needed
@@ -458,18 +4169,11 @@ class VoiceTranslatorApp:
             
             # Create the table structure
             cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT,
-                    source_text TEXT,
-                    source_lang TEXT,
-                    translated_text TEXT,
-                    target_lang TEXT
-                )
-            """)
+            cursor.execute(HISTORY_TABLE_SQL)
             conn.commit()
             cursor.close()
+            # Databases from earlier versions get the usage statistics table and newer columns
+            migrate_history_schema(conn)
             conn.close()
             
             # Test that we can read/write to the database
@@ -485,19 +4189,23 @@ class VoiceTranslatorApp:
                 
                 test_cursor.execute("DELETE FROM history WHERE source_text = 'TEST'")
                 test_conn.commit()
-                print("Database successfully tested for read/write access")
+                trace.info("Database successfully tested for read/write access")
             except Exception as test_error:
-                print(f"Database test failed: {test_error}")
+                trace.warning("Database test failed: %s", test_error)
                 raise
             finally:
                 test_cursor.close()
                 test_conn.close()
             
             # Notification for database setup
-            print(f"Database initialized at {self.db_path}")
+            trace.info("Database initialized at %s", self.db_path)
+            
+            # Index existing history for the translation memory without delaying startup
+            threading.Thread(target=self.pipeline.translation_memory.sync, daemon=True,
+                             name="memory-sync").start()
         except Exception as e:
-            print(f"Error setting up database: {e}")
-            messagebox.showerror("Database Error", f"Failed to initialize database: {e}")
+            trace.error("Error setting up database: %s", e)
+            self.show_error("Database Error", f"Failed to initialize database: {e}")
             self.db_path = None
         
     def toggle_listening(self):
@@ -508,18 +4216,10 @@ class VoiceTranslatorApp:
             self.mic_button.config(text="🎤 Stop Listening", bg="#F44336")
             self.mic_button.bind("<Enter>", self.on_mic_button_enter)
             self.mic_button.bind("<Leave>", self.on_mic_button_leave)
-            self.status_label.config(text="Status: Listening...")
+            self.set_status("Status: Listening...")
             
-            # Reset text fields when starting to listen again
-            self.source_text.config(state="normal")
-            self.source_text.delete("1.0", tk.END)
-            self.source_text.insert("1.0", "Listening for new input...")
-            self.source_text.config(state="disabled")
-            
-            self.translated_text.config(state="normal")
-            self.translated_text.delete("1.0", tk.END)
-            self.translated_text.insert("1.0", "Translation will appear here")
-            self.translated_text.config(state="disabled")
+            # Show hints until the first result; an existing transcript is kept
+            self.transcript.show_placeholder("Listening for new input...", "Translation will appear here")
             
             # Start listening in a separate thread
             self.listening_thread = threading.Thread(target=self.listen_and_translate)
@@ -531,7 +4231,11 @@ class VoiceTranslatorApp:
             self.mic_button.config(text="🎤 Start Listening", bg="#4CAF50")
             self.mic_button.bind("<Enter>", self.on_mic_button_enter)
             self.mic_button.bind("<Leave>", self.on_mic_button_leave)
-            self.status_label.config(text="Status: Idle")
+            self.set_status("Status: Idle")
+            
+            # Each listening session is recorded to its own file
+            if self.recorder:
+                self.recorder.close()
             
             # Enable process last audio button
             if hasattr(self, 'last_audio') and self.last_audio:
@@ -541,44 +4245,47 @@ class VoiceTranslatorApp:
         """Listen for voice input and translate using threading"""
         with sr.Microphone() as source:
             self.recognizer.adjust_for_ambient_noise(source)
-            self.root.after(0, lambda: self.status_label.config(text="Status: Listening..."))
+            self.set_status("Status: Listening...")
             
             while self.is_listening and not self.listening_stop_event.is_set():
                 try:
                     # Listen for audio input
+                    listen_start = time.perf_counter()
+                    # Pause, phrase length and wait come from the speech profile (possibly auto-tuned)
                     audio = self.recognizer.listen(
                         source=source,
-                        timeout=5,
-                        phrase_time_limit=10
+                        **self.latency_controller.apply(self.recognizer)
                     )
+                    self.metrics.observe("listen", time.perf_counter() - listen_start)
                     
                     # Store the last captured audio for post-processing
                     self.last_audio = audio
                     
                     # Enable the process last audio button
-                    self.root.after(0, lambda: self.process_last_button.config(state=tk.NORMAL))
+                    self.ui_updates.post(lambda: self.process_last_button.config(state=tk.NORMAL), key="process_button")
                     
                     # Update UI thread safely
-                    self.root.after(0, lambda: self.status_label.config(text="Status: Processing..."))
+                    self.set_status("Status: Processing...")
                     
-                    # Process audio in a thread to avoid hanging the main listening loop
-                    process_thread = threading.Thread(target=self._process_audio, args=(audio,))
-                    process_thread.daemon = True
-                    process_thread.start()
+                    segment = self.recorder.append(audio, source="microphone") if self._recording else None
+                    
+                    # Process audio on the phrase pool to avoid hanging the main listening loop
+                    self._submit_audio(audio, segment)
                     
                 except sr.WaitTimeoutError:
                     if self.is_listening and not self.listening_stop_event.is_set():
-                        self.root.after(0, lambda: self.status_label.config(text="Status: Listening..."))
+                        self.set_status("Status: Listening...")
                 except sr.UnknownValueError:
                     if self.is_listening and not self.listening_stop_event.is_set():
-                        self.root.after(0, lambda: self.status_label.config(text="Status: Could not understand audio"))
+                        self.set_status("Status: Could not understand audio")
                 except Exception as e:
                     if self.is_listening and not self.listening_stop_event.is_set():
+                        self.metrics.increment("errors")
                         error_msg = str(e)
-                        print(f"Listening error: {error_msg}")
+                        trace.warning("Listening error: %s", error_msg)
                         if len(error_msg) > 100:
                             error_msg = error_msg[:97] + "..."
-                        self.root.after(0, lambda msg=error_msg: self.status_label.config(text=f"Status: Error - {msg}"))
+                        self.set_status(f"Status: Error - {error_msg}")
                 
                 # Add a small delay to prevent CPU overuse
                 time.sleep(0.1)
@@ -587,155 +4294,315 @@ class VoiceTranslatorApp:
         """Process the last captured audio even if listening has stopped"""
         if self.last_audio:
             # Update status
-            self.status_label.config(text="Status: Processing last audio...")
+            self.set_status("Status: Processing last audio...")
             
             try:
-                # Process in a separate thread to avoid freezing UI
-                process_thread = threading.Thread(target=self._process_audio, args=(self.last_audio,))
-                process_thread.daemon = True
-                process_thread.start()
+                # Process on the phrase pool to avoid freezing UI
+                self._submit_audio(self.last_audio)
             except Exception as e:
-                self.status_label.config(text=f"Status: Error - {str(e)}")
+                self.set_status(f"Status: Error - {str(e)}")
         else:
             messagebox.showinfo("Information", "No audio captured yet. Please start listening first.")
             
-    def _process_audio(self, audio):
-        """Process audio in a separate thread"""
-        # Initialize translated_text to prevent unbinding issues
-        translated_text = "Translation not available"
-        
+    def _submit_audio(self, audio, segment=None):
+        """Queue a captured phrase for the phrase pool"""
+        # Counted from submission so the latency controller also sees phrases still waiting for a worker
+        with self._in_flight_lock:
+            self._phrases_in_flight += 1
+        try:
+            self.phrase_executor.submit(self._process_audio, audio, segment)
+        except RuntimeError:
+            # The pool is shut down while the window closes
+            with self._in_flight_lock:
+                self._phrases_in_flight -= 1
+            raise
+    
+    def _process_audio(self, audio, segment=None):
+        """Process audio on a phrase pool worker; segment is its SessionRecorder token when recording"""
         try:
-            # Transcribe audio
-            source_text = self.recognizer.recognize_google(audio)
-            print(f"Recognized text: {source_text}")
-            
-            # Detect language
-            source_lang = detect(source_text)
-            source_lang_name = LANGUAGES.get(source_lang, "Unknown")
-            print(f"Detected language: {source_lang} ({source_lang_name})")
-            
             # Get target language code
             target_lang = self.preferred_lang.get().split(":")[0].strip()
-            target_lang_name = LANGUAGES.get(target_lang, "Unknown")
-            print(f"Target language: {target_lang} ({target_lang_name})")
-            
-            # Create a new translator object for each translation
-            # This helps avoid sharing a single instance across threads
-            translator = Translator()
-            
-            # Handle translation with async wrapper
-            try:
-                # Initialize return_early flag
-                return_early = False
-                
-                # Check if translate returns a coroutine (newer versions of googletrans)
-                translation = translator.translate(
-                    source_text,
-                    src=source_lang,
-                    dest=target_lang
-                )
-                
-                print(f"Translation object type: {type(translation)}")
-                
-                # Check for coroutine or object representation 
-                translation_str = str(translation)
-                coroutine_detected = (
-                    asyncio.iscoroutine(translation) or 
-                    translation_str.startswith('<coroutine') or 
-                    'object at 0x' in translation_str or
-                    translation_str.startswith('<googletrans.models.Translated') or
-                    hasattr(translation, '__dict__') and not hasattr(translation, 'text')
-                )
-                
-                if coroutine_detected:
-                    print("Detected coroutine or raw object - using direct translation")
-                    # Don't try to await the coroutine, use our fallback method instead
-                    translated_text = self.fallback_translate(source_text, source_lang, target_lang)
-                    print(f"Used fallback translation: {translated_text}")
-                    return_early = True
-                
-                # Process the translation result if we didn't use fallback already
-                if not return_early:
-                    if hasattr(translation, 'text'):
-                        translated_text = translation.text
-                        print(f"Extracted translation text attribute: {translated_text}")
-                    elif isinstance(translation, str):
-                        translated_text = translation
-                        print(f"Translation is already a string: {translated_text}")
-                    elif isinstance(translation, dict) and 'text' in translation:
-                        translated_text = translation['text']
-                        print(f"Extracted text from dictionary: {translated_text}")
-                    else:
-                        # Last resort: extract from string representation
-                        print(f"Extracting from string representation: {translation}")
-                        translation_str = str(translation)
-                        
-                        # For coroutine objects that haven't been awaited
-                        if 'coroutine' in translation_str or 'object' in translation_str:
-                            # Use fallback instead of placeholder
-                            try:
-                                translated_text = self.fallback_translate(source_text, source_lang, target_lang)
-                                print(f"Used fallback for coroutine/object: {translated_text}")
-                            except Exception as fb_err:
-                                print(f"Fallback failed: {fb_err}")
-                                translated_text = f"वह नहीं चला" # Hindi for "That didn't work"
-                            
-                        # For googletrans Translated objects
-                        elif 'Translated' in translation_str:
-                            text_start = translation_str.find("text=") + 5
-                            if text_start > 5:  # Found "text="
-                                text_end = translation_str.find(",", text_start)
-                                if text_end > text_start:
-                                    extracted_text = translation_str[text_start:text_end].strip()
-                                    if extracted_text.startswith("'") and extracted_text.endswith("'"):
-                                        extracted_text = extracted_text[1:-1]
-                                    translated_text = extracted_text
-                                else:
-                                    translated_text = self.fallback_translate(source_text, source_lang, target_lang)
-                            else:
-                                translated_text = self.fallback_translate(source_text, source_lang, target_lang)
-                        else:
-                            # If all else fails, use the fallback method
-                            translated_text = self.fallback_translate(source_text, source_lang, target_lang)
-                
-            except Exception as translation_error:
-                print(f"Translation error: {translation_error}")
-                translated_text = f"Translation error: {str(translation_error)[:50]}"
-                # Try to recover with direct HTTP request
-                try:
-                    print("Attempting direct translation with HTTP request...")
-                    # Manual fallback using httpx
-                    translated_text = self.fallback_translate(source_text, source_lang, target_lang)
-                except Exception as fallback_error:
-                    print(f"Fallback translation error: {fallback_error}")
-                    translated_text = f"Unable to translate text: {str(fallback_error)[:50]}"
-            
-            print(f"Final translated text: {translated_text}")
-            
-            # Update UI with results (safely from another thread)
-            self.root.after(0, lambda: self.update_ui_with_translation(
-                source_text, 
-                source_lang, 
-                translated_text, 
-                target_lang
-            ))
-            
-            # Save to history
-            self.save_to_history(
-                source_text, 
-                source_lang, 
-                translated_text, 
-                target_lang
+
+            result = self.pipeline.process(
+                audio,
+                target_lang,
+                save=self.save_to_history,
+                # Update UI with results (safely from another thread)
+                on_translated=self.on_translated,
+                on_partial=self.on_partial_translation
             )
-            
+            with self._in_flight_lock:
+                waiting = self._phrases_in_flight - 1
+            self.latency_controller.observe(result["timings"]["total"], waiting,
+                                            len(audio.frame_data) / (audio.sample_rate * audio.sample_width))
+            if segment is not None:
+                self.recorder.record_result(segment, result)
+
         except Exception as e:
-            print(f"General audio processing error: {e}")
+            trace.error("General audio processing error: %s", e)
+            if segment is not None:
+                self.recorder.record_result(segment, error=e)
             # Format the error message
             error_msg = str(e)
             if len(error_msg) > 100:
                 error_msg = error_msg[:97] + "..."
             # Update status directly
-            self.root.after(0, lambda msg=error_msg: self.status_label.config(text=f"Status: Error - {msg}"))
+            self.set_status(f"Status: Error - {error_msg}")
+        finally:
+            with self._in_flight_lock:
+                self._phrases_in_flight -= 1
+    
+    def on_profile_selected(self, event=None):
+        """Apply the chosen speech profile from the next phrase on"""
+        self.latency_controller.set_profile(self.capture_profile.get())
+        trace.info("Speech profile set to %s", self.capture_profile.get())
+    
+    def on_auto_tune_toggled(self):
+        """Let the latency controller adjust segmentation, or return to the profile's settings"""
+        self.latency_controller.auto_tune = self.auto_tune.get()
+        if not self.auto_tune.get():
+            self.latency_controller.set_profile(self.capture_profile.get())
+    
+    def on_record_toggled(self):
+        """Start recording captured audio, or end the current recording"""
+        if self.record_session.get() and self.recorder is None:
+            self.record_session.set(False)
+            messagebox.showerror("Recording", "No data folder is available for recordings.")
+            return
+        self._recording = self.record_session.get()
+        if self._recording:
+            trace.info("Recording session audio to %s", self.recorder.directory)
+        else:
+            self.recorder.close()
+    
+    def replay_recording(self):
+        """Feed a recorded session through the pipeline again at the chosen replay speed"""
+        initial_dir = self.recorder.directory if self.recorder and os.path.isdir(self.recorder.directory) else None
+        path = filedialog.askopenfilename(
+            title="Replay Recording",
+            initialdir=initial_dir,
+            filetypes=[("Session recordings", "*.pcm"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        speed_label = self.replay_speed.get()
+        threading.Thread(target=self._replay_recording, args=(path, speed_label), daemon=True,
+                         name="replay").start()
+    
+    def _replay_recording(self, path, speed_label="Real time"):
+        try:
+            recording = SessionRecording(path)
+        except (OSError, ValueError) as e:
+            self.set_status(f"Status: Could not open recording - {e}")
+            return
+        with recording:
+            trace.info("Replaying %d segments from %s", len(recording.segments), path)
+            self.set_status(f"Status: Replaying {len(recording.segments)} recorded segments "
+                            f"({speed_label.lower()})...")
+            current_lang = self.preferred_lang.get().split(":")[0].strip()
+            # Own metrics, so replayed latencies (at max speed especially) do not skew the live ones
+            metrics = PipelineMetrics()
+            self.replay_metrics = metrics
+            self._replay_label = speed_label.lower()
+            # A pipeline of its own without the translation memory or request coalescing, so recorded
+            # phrases (already in the history) go through recognition and translation again
+            pipeline = TranslationPipeline(
+                recognizer=self.recognizer,
+                metrics=metrics,
+                detect_mode=self.pipeline.detect_mode,
+                phrase_dir=self.pipeline.phrase_table.directory,
+                memory_threshold=None,
+                offload=self.pipeline.offload,
+                coalesce=False,
+                duplicate_window=None
+            )
+
+            def show_result(source_text, source_lang, translated_text, target_lang):
+                # Shown only: not written to the transcript file and not spoken
+                self.ui_updates.post(self.update_ui_callback(f"[replay] {source_text}", source_lang,
+                                                             translated_text, target_lang))
+
+            def process(segment, audio):
+                recorded = segment["result"] or {}
+                return pipeline.process(
+                    audio,
+                    recorded.get("target_lang", current_lang),
+                    # Replays are for investigation and must not add to the history
+                    save=lambda *args: None,
+                    on_translated=show_result
+                )
+
+            try:
+                results = recording.replay(process, speed=REPLAY_SPEEDS[speed_label])
+            finally:
+                # The worker processes belong to the live pipeline
+                pipeline.offload = None
+                pipeline.shutdown()
+        failed = sum(isinstance(result, Exception) for result in results)
+        changed = sum(
+            1 for segment, result in zip(recording.segments, results)
+            if segment["result"] and not isinstance(result, Exception)
+            and result["translated_text"] != segment["result"].get("translated_text")
+        )
+        self.set_status(f"Status: Replay finished - {len(results)} segments, {failed} failed, "
+                        f"{changed} translated differently than when recorded")
+    
+    def on_speak_toggled(self):
+        """Start or stop reading translations aloud"""
+        if self.speak_results.get():
+            if not self.speech.available:
+                self.speak_results.set(False)
+                messagebox.showinfo("Spoken Output", "Install pyttsx3 (pip install pyttsx3) to hear translations.")
+                return
+            if self.speech.cache.directory is None:
+                self.speak_results.set(False)
+                messagebox.showerror("Spoken Output", "No data folder is available for synthesized speech.")
+                return
+        else:
+            self.speech.stop()
+        self._speaking = self.speak_results.get()
+    
+    def on_translated(self, source_text, source_lang, translated_text, target_lang):
+        """Record a finished translation on disk, queue it for the transcript view and speak it if enabled"""
+        if self.transcript_log:
+            try:
+                self.transcript_log.write(source_text, source_lang, translated_text, target_lang)
+            except OSError as e:
+                trace.warning("Could not write transcript: %s", e)
+        if self._speaking and not translated_text.startswith(FAILED_TRANSLATION_PREFIXES):
+            try:
+                self.speech.speak(translated_text, target_lang)
+            except Exception as e:
+                trace.warning("Could not speak translation: %s", e)
+        # Every result is shown, so these are not coalesced
+        self.ui_updates.post(self.update_ui_callback(source_text, source_lang, translated_text, target_lang))
+    
+    def on_partial_translation(self, source_text, source_lang, partial_text, target_lang):
+        """Show the sentences translated so far while the rest of a long phrase is in flight"""
+        self.ui_updates.post(
+            lambda: self.transcript.show_partial(source_text, source_lang, partial_text, target_lang),
+            key="partial"
+        )
+    
+    def on_source_partial(self, session, source_text, source_lang, partial_text, target_lang):
+        """Partial translation from an additional capture source"""
+        self.on_partial_translation(f"[{session.name}] {source_text}", source_lang, partial_text, target_lang)
+    
+    def on_source_result(self, session, source_text, source_lang, translated_text, target_lang):
+        """Show a result from an additional capture source, labelled with its name"""
+        self.on_translated(f"[{session.name}] {source_text}", source_lang, translated_text, target_lang)
+    
+    def on_source_error(self, session, error):
+        """Report a capture or pipeline failure on an additional source"""
+        error_msg = str(error)
+        if len(error_msg) > 100:
+            error_msg = error_msg[:97] + "..."
+        self.set_status(f"Status: {session.name} error - {error_msg}")
+    
+    def open_sources_dialog(self):
+        """Manage additional capture sources, each with its own device, language and VAD settings"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Capture Sources")
+        dialog.configure(bg="#1A1A2A")
+        dialog.transient(self.root)
+        
+        sources_list = tk.Listbox(
+            dialog,
+            height=6,
+            width=60,
+            font=self.normal_font,
+            bg="#2A2A3A",
+            fg="#E0E0E0",
+            selectbackground="#9370DB",
+            relief="flat",
+            highlightthickness=1,
+            highlightbackground="#9370DB"
+        )
+        sources_list.grid(row=0, column=0, columnspan=2, padx=20, pady=(20, 10))
+        
+        def refresh_list():
+            sources_list.delete(0, tk.END)
+            for session in self.sources.sessions.values():
+                sources_list.insert(tk.END, f"{session.name}  (device {session.device_index}, "
+                                            f"-> {session.target_lang})")
+        
+        try:
+            device_names = sr.Microphone.list_microphone_names()
+        except Exception as e:
+            trace.warning("Could not list audio devices: %s", e)
+            device_names = []
+        devices = ["Default device"] + [f"{index}: {name}" for index, name in enumerate(device_names)]
+        
+        fields = {
+            "name": tk.StringVar(value=f"Source {len(self.sources.sessions) + 1}"),
+            "device": tk.StringVar(value=devices[0]),
+            "target": tk.StringVar(value=self.preferred_lang.get()),
+            "energy": tk.StringVar(value=""),
+            "pause": tk.StringVar(value="0.8"),
+        }
+        rows = (
+            ("Name:", tk.Entry(dialog, textvariable=fields["name"], width=32)),
+            ("Device:", ttk.Combobox(dialog, textvariable=fields["device"], values=devices,
+                                     state="readonly", width=30)),
+            ("Output Language:", ttk.Combobox(dialog, textvariable=fields["target"],
+                                              values=[f"{code}: {name}" for code, name in LANGUAGES.items()],
+                                              state="readonly", width=30)),
+            ("Energy Threshold (blank = auto):", tk.Entry(dialog, textvariable=fields["energy"], width=32)),
+            ("Pause (seconds):", tk.Entry(dialog, textvariable=fields["pause"], width=32)),
+        )
+        for row, (text, widget) in enumerate(rows, start=1):
+            tk.Label(dialog, text=text, font=self.normal_font, bg="#1A1A2A", fg="#E0E0E0").grid(
+                row=row, column=0, sticky="w", padx=20, pady=4)
+            widget.grid(row=row, column=1, sticky="w", padx=20, pady=4)
+        
+        def add_source():
+            try:
+                energy = float(fields["energy"].get()) if fields["energy"].get().strip() else None
+                pause = float(fields["pause"].get())
+            except ValueError:
+                messagebox.showerror("Invalid Setting", "Energy threshold and pause must be numbers.", parent=dialog)
+                return
+            device = fields["device"].get()
+            self.sources.add_session(CaptureSession(
+                fields["name"].get().strip() or "Source",
+                device_index=None if device == devices[0] else int(device.split(":")[0]),
+                target_lang=fields["target"].get().split(":")[0].strip(),
+                energy_threshold=energy,
+                pause_threshold=pause
+            ))
+            fields["name"].set(f"Source {len(self.sources.sessions) + 1}")
+            refresh_list()
+        
+        def remove_source():
+            selection = sources_list.curselection()
+            if not selection:
+                return
+            session_id = list(self.sources.sessions)[selection[0]]
+            self.sources.remove_session(session_id)
+            refresh_list()
+        
+        button_frame = tk.Frame(dialog, bg="#1A1A2A")
+        button_frame.grid(row=len(rows) + 1, column=0, columnspan=2, pady=15)
+        for text, command in (("➕ Add Source", add_source), ("➖ Remove Selected", remove_source)):
+            button = tk.Button(
+                button_frame,
+                text=text,
+                command=command,
+                font=self.button_font,
+                bg="#9370DB",
+                fg="white",
+                activebackground="#7B68EE",
+                activeforeground="white",
+                bd=0,
+                relief="flat",
+                padx=20,
+                pady=10
+            )
+            button.pack(side=tk.LEFT, padx=10)
+            button.bind("<Enter>", self.on_refresh_button_enter)
+            button.bind("<Leave>", self.on_refresh_button_leave)
+        
+        refresh_list()
     
     def on_mic_button_enter(self, event):
         """Handle mouse enter event for mic button"""
@@ -781,83 +4648,54 @@ class VoiceTranslatorApp:
             self.status_label.config(text=status_text)
         return callback
     
+    def set_status(self, status_text):
+        """Queue a status change; only the latest pending status is drawn"""
+        self.ui_updates.post(self.status_update_callback(status_text), key="status")
+    
     def update_ui_with_translation(self, source_text, source_lang, translated_text, target_lang):
-        """Update UI with translation results"""
-        # Update source text
-        self.source_text.config(state="normal")
-        self.source_text.delete("1.0", tk.END)
-        self.source_text.insert("1.0", f"{source_text}\n\nDetected Language: {source_lang}")
-        self.source_text.config(state="disabled")
-        
-        # Update translated text
-        self.translated_text.config(state="normal")
-        self.translated_text.delete("1.0", tk.END)
-        self.translated_text.insert("1.0", f"{translated_text}\n\nTranslated to: {target_lang}")
-        self.translated_text.config(state="disabled")
+        """Append translation results to the rolling transcript"""
+        self.transcript.append(source_text, source_lang, translated_text, target_lang)
         
         # Update status
-        self.status_label.config(text="Status: Translation Complete")
+        self.set_status("Status: Translation Complete")
         
-    def save_to_history(self, source_text, source_lang, translated_text, target_lang):
+    def save_to_history(self, source_text, source_lang, translated_text, target_lang, used_fallback=False,
+                        degraded=False):
         """Save translation to database"""
         # First, make sure we have a database path
         if not hasattr(self, 'db_path') or not self.db_path:
-            print("No database path set for save - attempting to resolve")
+            trace.debug("No database path set for save - attempting to resolve")
             
             # Try to initialize the database first
             self.setup_db()
             
             # Check again after setup
             if not hasattr(self, 'db_path') or not self.db_path:
-                print("Still no database path available for save operation - cannot save history")
+                trace.warning("Still no database path available for save operation - cannot save history")
                 return
             
         # Track error count to avoid excessive error messages
         if not hasattr(self, '_db_error_count'):
             self._db_error_count = 0
         
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
         try:
-            print(f"Saving translation to history at {self.db_path}")
-            
-            # Create a new connection for this operation to avoid threading issues
-            # This is critical for thread safety in SQLite
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # First make sure the table exists (important for first run)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT,
-                    source_text TEXT,
-                    source_lang TEXT,
-                    translated_text TEXT,
-                    target_lang TEXT
-                )
-            """)
+            trace.debug("Saving translation to history at %s", self.db_path)
             
-            cursor.execute("""
-                INSERT INTO history (timestamp, source_text, source_lang, translated_text, target_lang)
-                VALUES (?, ?, ?, ?, ?)
-            """, (timestamp, source_text, source_lang, translated_text, target_lang))
-            conn.commit()
-            cursor.close()
-            conn.close()
+            self.pipeline.save_to_history(source_text, source_lang, translated_text, target_lang, used_fallback,
+                                          degraded)
             
-            print(f"Successfully saved translation: {source_lang} -> {target_lang}")
+            trace.debug("Successfully saved translation: %s -> %s", source_lang, target_lang)
             
             # Update history view if visible using the main thread
             # Schedule this using after() to ensure thread safety
             if hasattr(self, 'notebook') and self.notebook.index("current") == 1:  # If history tab is visible
-                self.root.after(0, self.load_history)
+                self.ui_updates.post(self.load_history, key="load_history")
                 
             # Reset error count after success
             self._db_error_count = 0
             
         except sqlite3.OperationalError as sql_e:
-            print(f"SQL error saving to history: {sql_e}")
+            trace.error("SQL error saving to history: %s", sql_e)
             self._db_error_count += 1
             
             # Check for common errors - limit error messages to avoid spamming
@@ -865,221 +4703,225 @@ class VoiceTranslatorApp:
             if ("unable to open database" in error_msg or "readonly database" in error_msg) and self._db_error_count <= 2:
                 # Permission issues - show only first two times
                 error_msg = "Cannot save to history: Database is read-only.\nTry running the application with administrator privileges."
-                self.root.after(0, lambda: messagebox.showerror("Database Error", error_msg))
+                self.ui_updates.post(lambda msg=error_msg: messagebox.showerror("Database Error", msg))
             elif self._db_error_count <= 2:
                 # Other SQL errors - show only first two times
-                self.root.after(0, lambda: messagebox.showerror("Database Error", f"Database error: {str(sql_e)}"))
+                # Bind the message now; sql_e is unset once the except block ends
+                self.ui_updates.post(lambda msg=f"Database error: {str(sql_e)}": messagebox.showerror("Database Error", msg))
                 
         except Exception as e:
-            print(f"General error saving to history: {e}")
+            trace.error("General error saving to history: %s", e)
             self._db_error_count += 1
             
             # Show error message but limit to avoid spamming
             if self._db_error_count <= 2:
                 error_msg = f"Failed to save translation to history: {e}"
-                self.root.after(0, lambda: messagebox.showerror("Database Error", error_msg))
+                self.ui_updates.post(lambda msg=error_msg: messagebox.showerror("Database Error", msg))
+    
+    def show_error(self, title, message):
+        """Show an error dialog from any thread"""
+        if threading.current_thread() is threading.main_thread():
+            messagebox.showerror(title, message)
+        else:
+            self.ui_updates.post(lambda: messagebox.showerror(title, message))
+    
+    def _resolve_db_path(self):
+        """Database path for the database thread, or None when setup_db found no usable location
+
+        setup_db is not called from here: besides the path it sets up the transcript file,
+        recorder and caches, which must not change underneath the Tk thread.
+        """
+        if not self.db_path:
+            trace.debug("No database path set")
+        return self.db_path
     
     def load_history(self):
-        """Load translation history from database"""
+        """Reload the history view; the query runs in the background and rows arrive in chunks"""
         # Check if we have the history tree 
-        if not hasattr(self, 'history_tree'):
-            print("History tree not initialized yet")
+        if not hasattr(self, 'history_loader'):
+            trace.debug("History tree not initialized yet")
             return
+        self.history_loader.load(self._resolve_db_path)
+    
+    def clear_history(self):
+        """Clear all history from database"""
+        # Confirm with user
+        if not messagebox.askyesno("Confirmation", "Are you sure you want to clear all translation history?"):
+            return
+        # A load still running would only show rows that are about to go
+        self.history_loader.cancel()
+        self.history_status_label.config(text="⏳ Clearing history...")
+        self.db_executor.submit(self._clear_history)
+    
+    def _clear_history(self):
+        """Delete every history row (runs on the database thread)"""
+        def finish(dialog, title, message, reload=False):
+            def show():
+                self.history_status_label.config(text="")
+                if reload:
+                    self.load_history()
+                dialog(title, message)
+            self.ui_updates.post(show)
         
-        # Clear existing items
-        for item in self.history_tree.get_children():
-            self.history_tree.delete(item)
-            
-        # First, make sure we have a database path
-        if not hasattr(self, 'db_path') or not self.db_path:
-            print("No database path set - attempting to resolve")
-            
-            # Try to initialize the database first
-            self.setup_db()
-            
-            # Check again after setup
-            if not hasattr(self, 'db_path') or not self.db_path:
-                print("Still no database path available after setup")
-                self.history_tree.insert("", "end", values=("", "", "History unavailable - Database not accessible", "", "", ""))
-                return
-        
-        # Now try to load the history data
+        if not self._resolve_db_path():
+            trace.warning("Still no database path available for clear operation")
+            finish(messagebox.showerror, "Database Error", "Cannot clear history: Database not accessible")
+            return
         try:
-            print(f"Loading history from {self.db_path}")
+            trace.info("Attempting to clear history in %s", self.db_path)
             
             # Create a new connection for this operation
             conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM history ORDER BY timestamp DESC")
-            history_data = cursor.fetchall()
-            cursor.close()
-            conn.close()
-            
-            print(f"Found {len(history_data)} history entries")
-            
-            # Populate treeview
-            for item in history_data:
-                # Format text for display (truncate if too long)
-                source_text = (item[2][:30] + '...') if len(item[2]) > 30 else item[2]
-                translated_text = (item[4][:30] + '...') if len(item[4]) > 30 else item[4]
+            try:
+                cursor = conn.cursor()
                 
-                # Get language names for display
-                source_lang_name = LANGUAGES.get(item[3], "Unknown")
-                target_lang_name = LANGUAGES.get(item[5], "Unknown")
+                # First check if the table exists
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='history'")
+                if not cursor.fetchone():
+                    trace.info("History table doesn't exist yet, nothing to clear")
+                    finish(messagebox.showinfo, "Information", "No history exists yet to clear")
+                    return
                 
-                self.history_tree.insert("", "end", values=(
-                    item[0],  # ID
-                    item[1],  # Timestamp
-                    source_text,
-                    source_lang_name,
-                    translated_text,
-                    target_lang_name
-                ))
+                # If table exists, delete all entries and the statistics derived from them
+                migrate_history_schema(conn)
+                cursor.execute("DELETE FROM history")
+                cursor.execute("DELETE FROM usage_hourly")
+                conn.commit()
+                cursor.close()
+            finally:
+                conn.close()
+            self.pipeline.translation_memory.reset()
+            
+            trace.info("History cleared successfully")
+            finish(messagebox.showinfo, "Success", "Translation history cleared successfully", reload=True)
             
-            # Show status message for empty history
-            if len(history_data) == 0:
-                self.history_tree.insert("", "end", values=("", "", "No translation history available", "", "", ""))
-                
         except sqlite3.OperationalError as sql_e:
-            print(f"SQL error loading history: {sql_e}")
+            trace.warning("SQL error clearing history: %s", sql_e)
             
-            # Special handling for common sqlite errors
+            # Check for common errors
             error_msg = str(sql_e).lower()
-            if "no such table" in error_msg:
-                # Table doesn't exist yet - this is normal for first run
-                self.history_tree.insert("", "end", values=("", "", "No history yet - Start translating to create entries", "", "", ""))
-            elif "unable to open database" in error_msg or "readonly database" in error_msg:
+            if "unable to open database" in error_msg or "readonly database" in error_msg:
                 # Permission issues
-                print("Database permission issues - may need to run as administrator")
-                self.history_tree.insert("", "end", values=("", "", "Cannot access history database - Permission error", "", "", ""))
+                error_msg = "Cannot clear history: Permission error. Try running as administrator."
             else:
-                # Other SQL errors
-                self.history_tree.insert("", "end", values=("", "", f"Database error: {str(sql_e)[:100]}", "", "", ""))
+                error_msg = f"Database error: {str(sql_e)}"
+            
+            finish(messagebox.showerror, "Database Error", error_msg)
             
         except Exception as e:
-            # General errors
-            print(f"Error loading history: {e}")
-            self.history_tree.insert("", "end", values=("", "", f"Error loading history: {str(e)[:100]}", "", "", ""))
+            trace.warning("Error clearing history: %s", e)
+            finish(messagebox.showerror, "Database Error", f"Failed to clear history: {str(e)}")
     
-    def clear_history(self):
-        """Clear all history from database"""
-        # First, make sure we have a database path
-        if not hasattr(self, 'db_path') or not self.db_path:
-            print("No database path set for clear - attempting to resolve")
-            
-            # Try to initialize the database first
-            self.setup_db()
-            
-            # Check again after setup
-            if not hasattr(self, 'db_path') or not self.db_path:
-                print("Still no database path available for clear operation")
-                messagebox.showerror("Database Error", "Cannot clear history: Database not accessible")
-                return
-        
-        # Confirm with user
-        if messagebox.askyesno("Confirmation", "Are you sure you want to clear all translation history?"):
+    def on_tab_changed(self, event=None):
+        """Refresh statistics whenever their tab is opened"""
+        if self.notebook.select() == str(self.statistics_frame):
+            self.refresh_statistics()
+    
+    def refresh_statistics(self):
+        """Read usage statistics for the chosen period in the background and show them"""
+        days = STATISTICS_PERIODS[self.statistics_period.get()]
+        self.statistics_label.config(text="⏳ Loading statistics...")
+        self.db_executor.submit(self._load_statistics, days)
+    
+    def _load_statistics(self, days):
+        """Query the usage buckets (runs on the database thread)"""
+        try:
+            if not self._resolve_db_path():
+                raise sqlite3.OperationalError("Database not accessible")
+            conn = sqlite3.connect(self.db_path)
             try:
-                print(f"Attempting to clear history in {self.db_path}")
-                
-                # Create a new connection for this operation
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                # First check if the table exists
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='history'")
-                if not cursor.fetchone():
-                    print("History table doesn't exist yet, nothing to clear")
-                    cursor.close()
-                    conn.close()
-                    messagebox.showinfo("Information", "No history exists yet to clear")
-                    return
-                
-                # If table exists, delete all entries
-                cursor.execute("DELETE FROM history")
-                conn.commit()
-                cursor.close()
+                migrate_history_schema(conn)
+                totals = UsageStatistics.totals(conn, days)
+                daily = UsageStatistics.daily(conn, days)
+            finally:
                 conn.close()
-                
-                print("History cleared successfully")
-                
-                # Refresh the view
-                self.load_history()
-                messagebox.showinfo("Success", "Translation history cleared successfully")
-                
-            except sqlite3.OperationalError as sql_e:
-                print(f"SQL error clearing history: {sql_e}")
-                
-                # Check for common errors
-                error_msg = str(sql_e).lower()
-                if "unable to open database" in error_msg or "readonly database" in error_msg:
-                    # Permission issues
-                    error_msg = "Cannot clear history: Permission error. Try running as administrator."
-                else:
-                    error_msg = f"Database error: {str(sql_e)}"
-                
-                messagebox.showerror("Database Error", error_msg)
-                
-            except Exception as e:
-                print(f"Error clearing history: {e}")
-                messagebox.showerror("Database Error", f"Failed to clear history: {str(e)}")
+        except Exception as e:
+            trace.warning("Error loading statistics: %s", e)
+            # Bind the message now; e is unset once the except block ends
+            self.ui_updates.post(lambda msg=f"Could not load statistics: {e}": self.statistics_label.config(text=msg),
+                                 key="statistics")
+            return
+        self.ui_updates.post(lambda: self._show_statistics(totals, daily), key="statistics")
     
-    def fallback_translate(self, text, src_lang, dest_lang):
-        """Fallback translation method that uses direct HTTP requests when googletrans has issues"""
-        print(f"Using fallback translation for: {text} from {src_lang} to {dest_lang}")
-        
+    def _show_statistics(self, totals, daily):
+        self.statistics_tree.delete(*self.statistics_tree.get_children())
+        for row in daily:
+            translations = row["translations"] or 1
+            self.statistics_tree.insert("", "end", values=(
+                row["day"],
+                LANGUAGES.get(row["source_lang"], row["source_lang"] or "Unknown"),
+                LANGUAGES.get(row["target_lang"], row["target_lang"] or "Unknown"),
+                row["translations"],
+                f"{row['source_chars']:,}",
+                f"{row['failures']} ({row['failures'] / translations:.0%})",
+                f"{row['fallbacks']} ({row['fallbacks'] / translations:.0%})"
+            ))
+        pairs = len({(row["source_lang"], row["target_lang"]) for row in daily})
+        self.statistics_label.config(text=(
+            f"Translations: {totals['translations']:,}   "
+            f"characters translated: {totals['source_chars']:,} (results: {totals['translated_chars']:,})   "
+            f"language pairs: {pairs}\n"
+            f"Failure rate: {totals['failure_rate']:.1%}   fallback rate: {totals['fallback_rate']:.1%}"
+        ))
+    
+    def export_statistics(self):
+        """Save the statistics for the chosen period as JSON"""
+        path = filedialog.asksaveasfilename(
+            title="Export Statistics",
+            defaultextension=".json",
+            initialfile=datetime.now().strftime("usage-%Y%m%d.json"),
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        days = STATISTICS_PERIODS[self.statistics_period.get()]
+        self.db_executor.submit(self._export_statistics, path, days)
+    
+    def _export_statistics(self, path, days):
+        """Write the JSON export (runs on the database thread)"""
         try:
-            # Simple dictionary of common translations as a last resort
-            common_phrases = {
-                "hello": {"hi": "नमस्ते", "es": "hola", "fr": "bonjour", "de": "hallo"},
-                "how are you": {"hi": "आप कैसे हैं", "es": "cómo estás", "fr": "comment allez-vous", "de": "wie geht es dir"},
-                "thank you": {"hi": "धन्यवाद", "es": "gracias", "fr": "merci", "de": "danke"},
-                "goodbye": {"hi": "अलविदा", "es": "adiós", "fr": "au revoir", "de": "auf wiedersehen"},
-                "yes": {"hi": "हां", "es": "sí", "fr": "oui", "de": "ja"},
-                "no": {"hi": "नहीं", "es": "no", "fr": "non", "de": "nein"}
-            }
-            
-            # Try the common phrases dictionary first
-            text_lower = text.lower()
-            if text_lower in common_phrases and dest_lang in common_phrases[text_lower]:
-                return common_phrases[text_lower][dest_lang]
-            
-            # Use httpx for direct translation API call
+            if not self._resolve_db_path():
+                raise sqlite3.OperationalError("Database not accessible")
+            conn = sqlite3.connect(self.db_path)
             try:
-                print("Attempting direct API call with httpx")
-                import httpx
-                
-                # Use Google Translate API directly
-                # Note: This is a simplified version and may not work as reliably as the full library
-                url = "https://translate.googleapis.com/translate_a/single"
-                params = {
-                    "client": "gtx",
-                    "sl": src_lang,
-                    "tl": dest_lang,
-                    "dt": "t",
-                    "q": text
-                }
-                
-                with httpx.Client() as client:
-                    response = client.get(url, params=params)
-                    if response.status_code == 200:
-                        # Parse the response - typically nested arrays
-                        result = response.json()
-                        if result and len(result) > 0 and len(result[0]) > 0:
-                            translated = ""
-                            # Combine all translation segments
-                            for segment in result[0]:
-                                if segment and len(segment) > 0:
-                                    translated += segment[0]
-                            return translated
-            except Exception as api_error:
-                print(f"Direct API translation error: {api_error}")
-                
-            # If all else fails, return an informative message
-            return f"Translation unavailable for '{text}'. Try again or use another language."
-            
+                migrate_history_schema(conn)
+                UsageStatistics.export(conn, path, days)
+            finally:
+                conn.close()
         except Exception as e:
-            print(f"Fallback translation error: {e}")
-            return f"Translation failed: {str(e)[:50]}"
+            trace.warning("Error exporting statistics: %s", e)
+            self.show_error("Export Error", f"Could not export statistics: {e}")
+            return
+        trace.info("Statistics exported to %s", path)
+        self.ui_updates.post(lambda: messagebox.showinfo("Export Statistics", f"Statistics written to:\n{path}"))
+    
+    def rebuild_statistics(self):
+        """Recompute the statistics from the history rows"""
+        self.statistics_label.config(text="⏳ Rebuilding statistics from history...")
+        self.db_executor.submit(self._rebuild_statistics)
+    
+    def _rebuild_statistics(self):
+        """Replace every usage bucket (runs on the database thread)"""
+        try:
+            if not self._resolve_db_path():
+                raise sqlite3.OperationalError("Database not accessible")
+            conn = sqlite3.connect(self.db_path)
+            try:
+                migrate_history_schema(conn)
+                started = time.perf_counter()
+                UsageStatistics.rebuild(conn)
+                conn.commit()
+            finally:
+                conn.close()
+            trace.info("Usage statistics rebuilt in %.0f ms", (time.perf_counter() - started) * 1000)
+        except Exception as e:
+            trace.warning("Error rebuilding statistics: %s", e)
+            self.show_error("Database Error", f"Could not rebuild statistics: {e}")
+        self.ui_updates.post(self.refresh_statistics)
+    
+    def fallback_translate(self, text, src_lang, dest_lang):
+        """Fallback translation method that uses direct HTTP requests when googletrans has issues"""
+        return self.pipeline.fallback_translate(text, src_lang, dest_lang)
     
     def on_closing(self):
         """Handle window close event"""
@@ -1092,53 +4934,66 @@ class VoiceTranslatorApp:
         
         # No need to close database connections as we're using fresh connections per operation
         
+        self.sources.shutdown()
+        
+        # Abandon any history query still running
+        if hasattr(self, 'history_loader'):
+            self.history_loader.cancel()
+        self.db_executor.shutdown(wait=False, cancel_futures=True)
+        self.phrase_executor.shutdown(wait=False, cancel_futures=True)
+        
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+        self.pipeline.shutdown()
+        self.speech.shutdown()
+        if self.recorder:
+            self.recorder.close()
+        
+        self.ui_updates.stop()
+        if self.transcript_log:
+            self.transcript_log.close()
+        
         # Destroy root window
         self.root.destroy()
 
 def create_initial_data_folder():
     """Create initial data folder for the application on startup"""
-    print("Setting up initial data folder...")
+    trace.info("Setting up initial data folder...")
     
     # Ensure data folder exists in current directory
     if not os.path.exists("data"):
         try:
             os.makedirs("data", exist_ok=True)
-            print("Created data folder in current directory")
+            trace.info("Created data folder in current directory")
         except Exception as e:
-            print(f"Could not create data folder in current directory: {e}")
+            trace.warning("Could not create data folder in current directory: %s", e)
     
     # Try to create a sample database file to ensure it's writable
     try:
         db_path = os.path.join("data", "translation_history.db")
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                source_text TEXT,
-                source_lang TEXT,
-                translated_text TEXT,
-                target_lang TEXT
-            )
-        """)
+        cursor.execute(HISTORY_TABLE_SQL)
         conn.commit()
         cursor.close()
         conn.close()
-        print(f"Created/verified initial database at {db_path}")
+        trace.info("Created/verified initial database at %s", db_path)
     except Exception as e:
-        print(f"Could not create initial database: {e}")
+        trace.warning("Could not create initial database: %s", e)
         
     # Also create the data folder in user's documents as fallback
     try:
         home_path = str(os.path.expanduser("~"))
         docs_data_path = os.path.join(home_path, "Documents", "VoiceTranslatorPro")
         os.makedirs(docs_data_path, exist_ok=True)
-        print(f"Created/verified fallback data folder at {docs_data_path}")
+        trace.info("Created/verified fallback data folder at %s", docs_data_path)
     except Exception as e:
-        print(f"Could not create fallback data folder: {e}")
+        trace.warning("Could not create fallback data folder: %s", e)
 
 if __name__ == "__main__":
+    # Worker processes of a frozen executable start by re-running it; this hands them over to multiprocessing
+    multiprocessing.freeze_support()
+    
     # Create initial data folder on startup
     create_initial_data_folder()
     